@@ -1,31 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException, Form
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from backend.database import get_db
-from backend.auth.utils import create_user, get_user_by_email, verify_password
+from backend.auth.hashing import password_hasher
+from backend.auth.utils import create_user, get_user_by_email
 from backend.auth.jwt_handler import create_access_token, create_refresh_token, decode_refresh_token
 from backend.auth.security import validate_password_strength
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+def _find_user_and_release(db: Session, email: str):
+    # Hand the connection back to the pool before the slow bcrypt step.
+    try:
+        return get_user_by_email(db, email)
+    finally:
+        db.close()
+
 @router.post("/register")
-def register(
+async def register(
     email: str = Form(...),
     password: str = Form(...),
     db: Session = Depends(get_db)
 ):
     validate_password_strength(password)
-    if get_user_by_email(db, email):
+    if await run_in_threadpool(_find_user_and_release, db, email):
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = create_user(db, email, password)
+    hashed = await password_hasher.hash(password)
+    user = await run_in_threadpool(create_user, db, email, hashed_password=hashed)
     return {"message": "User created successfully", "email": user.email}
 
 @router.post("/login")
-def login(
+async def login(
     email: str = Form(...),
     password: str = Form(...),
     db: Session = Depends(get_db)
 ):
-    user = get_user_by_email(db, email)
-    if not user or not verify_password(password, user.hashed_password):
+    user = await run_in_threadpool(_find_user_and_release, db, email)
+    if not user or not await password_hasher.verify(password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     access_token = create_access_token(data={"sub": user.email})
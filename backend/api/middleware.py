@@ -1,36 +1,230 @@
 from __future__ import annotations
 
+import math
 import time
-from collections import defaultdict, deque
+from typing import Callable, Protocol
 
-from fastapi import HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from fastapi import status
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 
-class SimpleRateLimiterMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, max_requests: int, window_seconds: int):
-        super().__init__(app)
+class RateLimitStore(Protocol):
+    async def hit(self, key: str, window: int, window_seconds: int) -> tuple[int, int]:
+        """Count one request for ``key`` in ``window`` and return ``(previous, current)`` counts."""
+        ...
+
+    async def forget(self, key: str, window: int, window_seconds: int) -> None:
+        """Take back a hit counted in ``window`` for a request that was then rejected."""
+        ...
+
+
+class MemoryRateLimitStore:
+    """Per-process store: two counters per key, idle keys swept every ``sweep_seconds``."""
+
+    def __init__(self, sweep_seconds: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self._counters: dict[str, tuple[int, int, int]] = {}
+        self._sweep_seconds = sweep_seconds
+        self._clock = clock
+        self._next_sweep = clock() + sweep_seconds
+
+    async def hit(self, key: str, window: int, window_seconds: int) -> tuple[int, int]:
+        # No awaits below, so the update is atomic on the event loop.
+        last_window, previous, current = self._counters.get(key, (window, 0, 0))
+        if window == last_window + 1:
+            previous, current = current, 0
+        elif window != last_window:
+            previous, current = 0, 0
+        current += 1
+        self._counters[key] = (window, previous, current)
+        self._sweep(window)
+        return previous, current
+
+    async def forget(self, key: str, window: int, window_seconds: int) -> None:
+        last_window, previous, current = self._counters.get(key, (None, 0, 0))
+        if last_window == window and current > 0:
+            self._counters[key] = (window, previous, current - 1)
+
+    def _sweep(self, window: int) -> None:
+        now = self._clock()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self._sweep_seconds
+        # A key whose last hit is two or more windows old contributes nothing to the estimate.
+        idle = [key for key, (last_window, _, _) in self._counters.items() if window - last_window >= 2]
+        for key in idle:
+            del self._counters[key]
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class RedisRateLimitStore:
+    """Store shared by every API worker; Redis expires idle windows on its own.
+
+    Every request waits on Redis, so the timeouts are short: a stalled server
+    fails the limiter open within a fraction of a second instead of hanging
+    the request.
+    """
+
+    prefix = "ratelimit:"
+
+    def __init__(self, url: str, socket_timeout: float = 0.5, socket_connect_timeout: float = 0.5):
+        self._client = aioredis.Redis.from_url(
+            url, socket_timeout=socket_timeout, socket_connect_timeout=socket_connect_timeout
+        )
+
+    async def hit(self, key: str, window: int, window_seconds: int) -> tuple[int, int]:
+        current_key = f"{self.prefix}{key}:{window}"
+        previous_key = f"{self.prefix}{key}:{window - 1}"
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.incr(current_key)
+            pipe.expire(current_key, window_seconds * 2)
+            pipe.get(previous_key)
+            current, _, previous = await pipe.execute()
+        return int(previous or 0), int(current)
+
+    async def forget(self, key: str, window: int, window_seconds: int) -> None:
+        current_key = f"{self.prefix}{key}:{window}"
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.decr(current_key)
+            pipe.expire(current_key, window_seconds * 2)
+            await pipe.execute()
+
+
+class RateLimitMiddleware:
+    """Pure ASGI sliding-window-counter rate limiter keyed by client address.
+
+    The request rate is estimated from the current and previous fixed windows,
+    weighting the previous one by how much of it still overlaps the sliding
+    window. That needs two integers per client rather than one timestamp per
+    request. If the store is unreachable, requests are let through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_requests: int,
+        window_seconds: int,
+        store: RateLimitStore | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.app = app
         self.max_requests = max_requests
         self.window = window_seconds
-        self.hit_map: defaultdict[str, deque[float]] = defaultdict(deque)
+        self.store = store if store is not None else MemoryRateLimitStore(sweep_seconds=window_seconds)
+        self._clock = clock
 
-    async def dispatch(self, request: Request, call_next):
-        identifier = request.client.host if request.client else "anonymous"
-        now = time.time()
-        window_start = now - self.window
-        queue = self.hit_map[identifier]
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        while queue and queue[0] < window_start:
-            queue.popleft()
+        client = scope.get("client")
+        identifier = client[0] if client else "anonymous"
+        now = self._clock()
+        window, offset = divmod(now, self.window)
+        try:
+            previous, current = await self.store.hit(identifier, int(window), self.window)
+        except (RedisError, OSError):
+            await self.app(scope, receive, send)
+            return
 
-        if len(queue) >= self.max_requests:
-            raise HTTPException(
+        estimate = previous * (1 - offset / self.window) + current
+        if estimate > self.max_requests:
+            # Only admitted requests count, so a client that keeps retrying while
+            # blocked is let back in once its admitted rate falls under the limit.
+            try:
+                await self.store.forget(identifier, int(window), self.window)
+            except (RedisError, OSError):
+                pass
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded. Please slow down."},
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded. Please slow down.",
+                headers={"Retry-After": str(max(1, math.ceil(self.window - offset)))},
             )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+class BodyTooLargeError(Exception):
+    pass
+
+
+class BodySizeLimitMiddleware:
+    """Pure ASGI request body limit, per path prefix, enforced before the app reads the body.
+
+    Multipart forms are parsed and spooled to disk before a handler runs, so a
+    size check in the handler only fires once the whole upload has arrived.
+    Here a declared ``Content-Length`` over the limit is answered with 413
+    without reading a byte; bodies without one are counted as they arrive and
+    cut off as soon as they cross it.
+    """
+
+    def __init__(self, app: ASGIApp, limits: dict[str, int | None]):
+        self.app = app
+        # Longest prefix first, so /api/upload/batch wins over /api/upload.
+        self.limits = sorted(
+            ((prefix, limit) for prefix, limit in limits.items() if limit), key=lambda item: -len(item[0])
+        )
+
+    def limit_for(self, path: str) -> int | None:
+        return next((limit for prefix, limit in self.limits if path.startswith(prefix)), None)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        max_bytes = self.limit_for(scope["path"]) if scope["type"] == "http" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or ())
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+            await self._reject(scope, receive, send, max_bytes)
+            return
+
+        received = 0
+        exceeded = response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    exceeded = True
+                    raise BodyTooLargeError(max_bytes)
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            # The app may turn the aborted read into its own error response; 413 replaces it.
+            if exceeded:
+                return
+            response_started = response_started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except BodyTooLargeError:
+            pass
+        if exceeded and not response_started:
+            await self._reject(scope, receive, send, max_bytes)
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, max_bytes: int) -> None:
+        response = JSONResponse(
+            {"detail": f"Request body too large. The limit is {max_bytes} bytes."},
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+        await response(scope, receive, send)
+
 
-        queue.append(now)
-        response: Response = await call_next(request)
-        return response
+def build_rate_limit_store(backend: str, redis_url: str) -> RateLimitStore | None:
+    if backend.lower() == "redis":
+        return RedisRateLimitStore(redis_url)
+    return None
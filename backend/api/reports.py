@@ -1,18 +1,56 @@
+import base64
+import binascii
+import json
+from datetime import datetime
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from redis.exceptions import RedisError
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, load_only
+from starlette.concurrency import run_in_threadpool
 
 from backend.auth.dependencies import get_current_user
+from backend.config import settings
 from backend.database import get_db
-from backend.models import Report, User
+from backend.models import Report, User, delete_orphaned_blobs
+from backend.services import event_bus, search_index
 from backend.services.file_processor import resolve_upload_root
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_QUERY_CHARS = 200
+SSE_RETRY_MILLISECONDS = 3000
+
+_LISTING_COLUMNS = (
+    Report.id,
+    Report.title,
+    Report.status,
+    Report.created_at,
+    Report.pdf_report,
+    Report.summary_preview,
+)
+
+
+def _encode_cursor(report: Report) -> str:
+    position = json.dumps([report.created_at.isoformat(), report.id])
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, report_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(report_id)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
 
 def _serialize(report: Report) -> dict:
-    preview = (report.ai_summary or "")[:500]
+    preview = report.summary_preview
     return {
         "id": report.id,
         "title": report.title,
@@ -24,16 +62,55 @@ def _serialize(report: Report) -> dict:
 
 
 @router.get("/")
-def list_reports(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    reports = (
+def list_reports(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    query = (
         db.query(Report)
+        .options(load_only(*_LISTING_COLUMNS))
         .filter(Report.owner_id == current_user.id)
-        .order_by(Report.created_at.desc())
-        .all()
     )
+    if cursor:
+        # Keyset pagination: resume strictly after the last row of the previous page.
+        created_at, report_id = _decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                Report.created_at < created_at,
+                and_(Report.created_at == created_at, Report.id < report_id),
+            )
+        )
+    reports = query.order_by(Report.created_at.desc(), Report.id.desc()).limit(limit + 1).all()
+
+    if len(reports) > limit:
+        reports = reports[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(reports[-1])
     return [_serialize(report) for report in reports]
 
 
+# Declared before /{report_id} so "search" is not parsed as a report id.
+@router.get("/search")
+def search_reports(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=MAX_SEARCH_QUERY_CHARS),
+    limit: int = Query(DEFAULT_SEARCH_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    hits = search_index.search(db, current_user.id, q, limit=limit + 1, offset=offset)
+    if len(hits) > limit:
+        hits = hits[:limit]
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    return [
+        {"id": hit.report_id, "title": hit.title, "score": round(hit.score, 6), "highlight": hit.highlight}
+        for hit in hits
+    ]
+
+
 @router.get("/{report_id}")
 def get_report(report_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     report = (
@@ -49,10 +126,94 @@ def get_report(report_id: int, db: Session = Depends(get_db), current_user: User
         "status": report.status,
         "created_at": report.created_at,
         "download_pdf": report.pdf_report,
-        "preview": (report.ai_summary or "")[:500],
+        # While the summary streams, the preview is everything generated so far.
+        "preview": report.summary_partial or report.summary_preview or "",
+        "raw_text_bytes": report.raw_text_size,
+        "summary_bytes": report.ai_summary_size,
+        "extraction": json.loads(report.extraction_metadata) if report.extraction_metadata else None,
     }
 
 
+def _find_report_state_and_release(db: Session, report_id: int, owner_id: int) -> dict | None:
+    # A stream may stay open for minutes; give the connection back to the pool right away.
+    try:
+        report = (
+            db.query(Report)
+            .options(load_only(Report.id, Report.status, Report.pdf_report, Report.summary_partial))
+            .filter(Report.id == report_id, Report.owner_id == owner_id)
+            .first()
+        )
+        if report is None:
+            return None
+        state = {"status": report.status}
+        if report.pdf_report:
+            state["pdf_report"] = report.pdf_report
+        if report.summary_partial:
+            state["summary"] = report.summary_partial
+        return state
+    finally:
+        db.close()
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def _event_stream(subscription: event_bus.Subscription, report_id: int, state: dict):
+    try:
+        event = {"type": "status", "report_id": report_id, **state}
+        yield f"retry: {SSE_RETRY_MILLISECONDS}\n" + _sse(event)
+        # The first event carries the summary so far; deltas it already covers are trimmed.
+        summary_chars = len(state.get("summary", ""))
+        while event.get("status") not in event_bus.TERMINAL_STATUSES:
+            received = await subscription.get(timeout=settings.SSE_KEEPALIVE_SECONDS)
+            if received is None:
+                yield ": keepalive\n\n"
+                continue
+            if received["type"] == "reconnect":
+                # The bus lost messages; the client reconnects and gets a fresh state.
+                return
+            if received["type"] == "summary_delta" and received.get("offset", 0) < summary_chars:
+                seen = summary_chars - received["offset"]
+                if seen >= len(received["text"]):
+                    continue
+                received = {**received, "text": received["text"][seen:], "offset": summary_chars}
+            event = received
+            yield _sse(event)
+    finally:
+        await subscription.close()
+
+
+@router.get("/{report_id}/events")
+async def report_events(
+    report_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    # Subscribe before reading the current state so no transition can fall in between.
+    try:
+        subscription = await event_bus.get_event_bus().subscribe(report_id)
+    except (RedisError, OSError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Live updates are unavailable; poll the report instead.",
+            headers={"Retry-After": str(SSE_RETRY_MILLISECONDS // 1000)},
+        )
+    try:
+        state = await run_in_threadpool(_find_report_state_and_release, db, report_id, current_user.id)
+    except BaseException:
+        await subscription.close()
+        raise
+    if state is None:
+        await subscription.close()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
+    return StreamingResponse(
+        _event_stream(subscription, report_id, state),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.delete("/{report_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_report(report_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     report = (
@@ -77,5 +238,9 @@ def delete_report(report_id: int, db: Session = Depends(get_db), current_user: U
             except OSError:
                 pass
 
+    digests = (report.raw_text_digest, report.ai_summary_digest)
+    search_index.remove_report(db, report.id)
     db.delete(report)
+    db.flush()
+    delete_orphaned_blobs(db, digests)
     db.commit()
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, File, UploadFile, status
-from sqlalchemy.orm import Session
+import uuid
+from collections import Counter
+
+from celery import group
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy.orm import Session, load_only
+from starlette.concurrency import run_in_threadpool
 
 from backend.auth.dependencies import get_current_user
 from backend.database import get_db
 from backend.models import Report, User
 from backend.services import file_processor, validator
 from backend.tasks import report_tasks
+from backend.utils.exceptions import UploadTooLargeError
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
@@ -20,19 +26,113 @@ async def upload_file(
     current_user: User = Depends(get_current_user),
 ):
     validator.validate_upload(file.filename or "")
-    content = await file.read()
-    stored_path = file_processor.save_bytes(content, file.filename, UPLOAD_ROOT)
+    validator.validate_upload_size(file.size)
+    try:
+        stored = await file_processor.save_stream(file, file.filename, UPLOAD_ROOT)
+    except UploadTooLargeError as exc:
+        raise validator.upload_too_large(exc.max_bytes) from exc
 
-    report = Report(title=file.filename, status="processing", owner_id=current_user.id)
+    report = Report(title=file.filename, status="queued", owner_id=current_user.id)
     db.add(report)
     db.commit()
     db.refresh(report)
 
-    report_tasks.process_report.delay(report.id, str(stored_path), current_user.id)
+    report_tasks.process_report.delay(report.id, str(stored.path), current_user.id)
 
     return {
         "report_id": report.id,
-        "status": "processing",
+        "status": "queued",
         "message": "File uploaded. OCR + AI report in progress...",
         "check_status": f"/api/reports/{report.id}",
+        "events": f"/api/reports/{report.id}/events",
+        "sha256": stored.sha256,
+        "size_bytes": stored.size,
+    }
+
+
+def _insert_batch(db: Session, batch_id: str, owner_id: int, titles: list[str]) -> list[int]:
+    reports = [Report(title=title, status="queued", owner_id=owner_id, batch_id=batch_id) for title in titles]
+    try:
+        # One flush: PostgreSQL sends all rows as a single INSERT ... RETURNING.
+        db.add_all(reports)
+        db.flush()
+        # Read ids before commit expires the rows, so nothing is re-selected per report.
+        report_ids = [report.id for report in reports]
+        db.commit()
+        return report_ids
+    finally:
+        db.close()
+
+
+@router.post("/batch", status_code=status.HTTP_202_ACCEPTED)
+async def upload_batch(
+    files: list[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    validator.validate_batch_size(len(files))
+    owner_id = current_user.id
+    # Reject the whole batch before anything is written if any file is unacceptable.
+    for file in files:
+        validator.validate_upload(file.filename or "")
+        validator.validate_upload_size(file.size)
+
+    stored: list[file_processor.StoredUpload] = []
+    try:
+        for file in files:
+            stored.append(await file_processor.save_stream(file, file.filename, UPLOAD_ROOT))
+    except BaseException as exc:
+        for upload in stored:
+            upload.path.unlink(missing_ok=True)
+        if isinstance(exc, UploadTooLargeError):
+            raise validator.upload_too_large(exc.max_bytes) from exc
+        raise
+
+    batch_id = uuid.uuid4().hex
+    titles = [file.filename for file in files]
+    report_ids = await run_in_threadpool(_insert_batch, db, batch_id, owner_id, titles)
+
+    group(
+        report_tasks.process_report.s(report_id, str(upload.path), owner_id)
+        for report_id, upload in zip(report_ids, stored)
+    ).apply_async()
+
+    return {
+        "batch_id": batch_id,
+        "status": "queued",
+        "check_status": f"/api/upload/batch/{batch_id}",
+        "reports": [
+            {
+                "report_id": report_id,
+                "title": title,
+                "sha256": upload.sha256,
+                "size_bytes": upload.size,
+            }
+            for report_id, title, upload in zip(report_ids, titles, stored)
+        ],
+    }
+
+
+@router.get("/batch/{batch_id}")
+def batch_status(batch_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    reports = (
+        db.query(Report)
+        .options(load_only(Report.id, Report.title, Report.status))
+        .filter(Report.batch_id == batch_id, Report.owner_id == current_user.id)
+        .order_by(Report.id)
+        .all()
+    )
+    if not reports:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    counts = Counter(report.status for report in reports)
+    finished = counts["completed"] + counts["failed"]
+    return {
+        "batch_id": batch_id,
+        "total": len(reports),
+        "completed": counts["completed"],
+        "failed": counts["failed"],
+        "in_progress": len(reports) - finished,
+        "done": finished == len(reports),
+        "counts": dict(counts),
+        "reports": [{"id": report.id, "title": report.title, "status": report.status} for report in reports],
     }
@@ -0,0 +1,81 @@
+"""Caches that keep JWT decoding and user lookups off the request hot path.
+
+Both caches are per process. Updates made through the ORM in this process
+invalidate the user cache immediately. Changes made elsewhere (another API
+worker, a script) become visible once the short TTL expires.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from backend.auth.jwt_handler import decode_token
+from backend.auth.utils import get_user_by_email
+from backend.config import settings
+from backend.models import User
+from backend.utils.cache import TTLCache
+
+_token_payloads: TTLCache[dict] = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+_users: TTLCache[User] = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def _enabled() -> bool:
+    return settings.AUTH_CACHE_TTL_SECONDS > 0
+
+
+def decode_access_token(token: str) -> dict | None:
+    if not _enabled():
+        return decode_token(token, expected_type="access")
+
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = _token_payloads.get(key)
+    if payload is not None:
+        return payload
+    payload = decode_token(token, expected_type="access")
+    if payload:
+        # Never serve a payload past the token's own expiry.
+        ttl = min(settings.AUTH_CACHE_TTL_SECONDS, payload.get("exp", 0) - time.time())
+        if ttl > 0:
+            _token_payloads.set(key, payload, ttl_seconds=ttl)
+    return payload
+
+
+def load_user(db: Session, email: str) -> User | None:
+    if not _enabled():
+        return get_user_by_email(db, email)
+
+    snapshot = _users.get(email)
+    if snapshot is not None:
+        return db.merge(snapshot, load=False)
+    user = get_user_by_email(db, email)
+    if user is not None:
+        _users.set(email, _snapshot(user))
+    return user
+
+
+def _snapshot(user: User) -> User:
+    # A detached copy owned by the cache, so no request session can expire or mutate it.
+    copy = User(id=user.id, email=user.email, hashed_password=user.hashed_password, is_active=user.is_active)
+    make_transient_to_detached(copy)
+    return copy
+
+
+def invalidate_user(email: str) -> None:
+    _users.delete(email)
+
+
+def clear() -> None:
+    _token_payloads.clear()
+    _users.clear()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target: User) -> None:
+    invalidate_user(target.email)
+    previous_emails = inspect(target).attrs.email.history.deleted or ()
+    for email in previous_emails:
+        invalidate_user(email)
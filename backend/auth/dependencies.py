@@ -1,8 +1,7 @@
 from fastapi import Depends, HTTPException, Header
 from sqlalchemy.orm import Session
 from backend.database import get_db
-from backend.auth.jwt_handler import decode_token
-from backend.auth.utils import get_user_by_email
+from backend.auth.auth_manager import decode_access_token, load_user
 from backend.models import User
 
 def get_current_user(
@@ -13,11 +12,13 @@ def get_current_user(
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     token = authorization.split(" ")[1]
-    payload = decode_token(token, expected_type="access")
+    payload = decode_access_token(token)
     if not payload or payload.get("sub") is None:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
-    user = get_user_by_email(db, payload["sub"])
+    user = load_user(db, payload["sub"])
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail="User is inactive")
     return user
@@ -1,21 +1,16 @@
-from passlib.context import CryptContext
+from backend.auth.hashing import hash_password, pwd_context, verify_password  # noqa: F401
 from backend.models import User
 from backend.database import get_db
 from sqlalchemy.orm import Session
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hash_password(password)
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, email: str, password: str):
-    hashed = get_password_hash(password)
+def create_user(db: Session, email: str, password: str | None = None, hashed_password: str | None = None):
+    hashed = hashed_password or get_password_hash(password)
     db_user = User(email=email, hashed_password=hashed)
     db.add(db_user)
     db.commit()
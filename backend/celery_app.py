@@ -6,5 +6,12 @@ REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", REDIS_URL)
 
 celery_app = Celery("worker", broker=REDIS_URL, backend=RESULT_BACKEND)
-celery_app.conf.task_routes = {"backend.tasks.*": {"queue": "tasks"}}
+celery_app.conf.task_routes = {
+    "backend.tasks.ocr_report": {"queue": "ocr"},
+    "backend.tasks.ocr_page_range": {"queue": "ocr"},
+    "backend.tasks.merge_ocr_pages": {"queue": "ocr"},
+    "backend.tasks.summarize_report": {"queue": "llm"},
+    "backend.tasks.render_report": {"queue": "render"},
+    "backend.tasks.*": {"queue": "tasks"},
+}
 celery_app.autodiscover_tasks(["backend.tasks"])
@@ -12,6 +12,10 @@ def _parse_origins(value: str | None) -> List[str]:
     return [origin.strip() for origin in value.split(",") if origin.strip()]
 
 
+def _parse_ints(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
 class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
     SECRET_KEY: str = os.getenv("SECRET_KEY", "change-me")
@@ -24,8 +28,60 @@ class Settings:
     CORS_ALLOW_ORIGINS: List[str] = _parse_origins(os.getenv("CORS_ALLOW_ORIGINS"))
     RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", 60))
     RATE_LIMIT_WINDOW_SECONDS: int = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", 60))
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    AUTH_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_CACHE_TTL_SECONDS", 30))
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10_000))
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
     PASSWORD_MIN_LENGTH: int = int(os.getenv("PASSWORD_MIN_LENGTH", 12))
     PASSWORD_REQUIRE_SPECIAL: bool = os.getenv("PASSWORD_REQUIRE_SPECIAL", "true").lower() == "true"
+    MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", 100 * 1024 * 1024))
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+    MAX_BATCH_FILES: int = int(os.getenv("MAX_BATCH_FILES", 50))
+    PIPELINE_MAX_RETRIES: int = int(os.getenv("PIPELINE_MAX_RETRIES", 3))
+    OCR_ENGINE: str = os.getenv("OCR_ENGINE", "auto")
+    OCR_WORKERS: int = int(os.getenv("OCR_WORKERS", 1))
+    OCR_MAX_PAGES_IN_FLIGHT: int = int(os.getenv("OCR_MAX_PAGES_IN_FLIGHT", 4))
+    OCR_FANOUT_MIN_PAGES: int = int(os.getenv("OCR_FANOUT_MIN_PAGES", 0))
+    OCR_FANOUT_PAGES_PER_TASK: int = int(os.getenv("OCR_FANOUT_PAGES_PER_TASK", 10))
+    OCR_ADAPTIVE_DPI: bool = os.getenv("OCR_ADAPTIVE_DPI", "false").lower() == "true"
+    OCR_DPI_LADDER: List[int] = _parse_ints(os.getenv("OCR_DPI_LADDER", "150,300,400"))
+    OCR_MIN_CONFIDENCE: float = float(os.getenv("OCR_MIN_CONFIDENCE", 75))
+    OCR_PREPROCESS: bool = os.getenv("OCR_PREPROCESS", "false").lower() == "true"
+    OCR_GRAYSCALE: bool = os.getenv("OCR_GRAYSCALE", "true").lower() == "true"
+    OCR_TARGET_DPI: int = int(os.getenv("OCR_TARGET_DPI", 300))
+    OCR_BINARIZE: bool = os.getenv("OCR_BINARIZE", "true").lower() == "true"
+    OCR_DESKEW: bool = os.getenv("OCR_DESKEW", "true").lower() == "true"
+    OCR_CROP_BORDERS: bool = os.getenv("OCR_CROP_BORDERS", "true").lower() == "true"
+    DICOM_OCR_FRAMES: bool = os.getenv("DICOM_OCR_FRAMES", "false").lower() == "true"
+    DICOM_MAX_OCR_FRAMES: int = int(os.getenv("DICOM_MAX_OCR_FRAMES", 16))
+    OCR_CACHE_DIR: str = os.getenv("OCR_CACHE_DIR", "")
+    OCR_CACHE_MAX_BYTES: int = int(os.getenv("OCR_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "groq")
+    LLM_STUB_LATENCY_SECONDS: float = float(os.getenv("LLM_STUB_LATENCY_SECONDS", 0))
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", 60))
+    LLM_MAX_ATTEMPTS: int = int(os.getenv("LLM_MAX_ATTEMPTS", 4))
+    LLM_RETRY_BASE_SECONDS: float = float(os.getenv("LLM_RETRY_BASE_SECONDS", 1))
+    LLM_RETRY_MAX_SECONDS: float = float(os.getenv("LLM_RETRY_MAX_SECONDS", 30))
+    LLM_RATE_LIMIT_BACKEND: str = os.getenv("LLM_RATE_LIMIT_BACKEND", "redis")
+    LLM_REQUESTS_PER_MINUTE: int = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 30))
+    LLM_TOKENS_PER_MINUTE: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", 0))
+    LLM_MAX_CONCURRENT_CALLS: int = int(os.getenv("LLM_MAX_CONCURRENT_CALLS", 8))
+    # A slot held longer than this (e.g. by a killed worker) is freed for other calls.
+    LLM_CALL_LEASE_SECONDS: float = float(os.getenv("LLM_CALL_LEASE_SECONDS", 300))
+    LLM_CIRCUIT_FAILURES: int = int(os.getenv("LLM_CIRCUIT_FAILURES", 5))
+    LLM_CIRCUIT_RESET_SECONDS: float = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", 30))
+    SUMMARY_CHUNK_CHARS: int = int(os.getenv("SUMMARY_CHUNK_CHARS", 12_000))
+    SUMMARY_MAP_CONCURRENCY: int = int(os.getenv("SUMMARY_MAP_CONCURRENCY", 4))
+    SUMMARY_STREAM_FLUSH_CHARS: int = int(os.getenv("SUMMARY_STREAM_FLUSH_CHARS", 400))
+    SUMMARY_CACHE_BACKEND: str = os.getenv("SUMMARY_CACHE_BACKEND", "sqlite")
+    SUMMARY_CACHE_TTL_SECONDS: int = int(os.getenv("SUMMARY_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60))
+    SUMMARY_CACHE_MAX_ENTRIES: int = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", 1024))
+    SUMMARY_CACHE_PATH: str = os.getenv("SUMMARY_CACHE_PATH", "./summary_cache.db")
+    PDF_RENDERER: str = os.getenv("PDF_RENDERER", "weasyprint")
+    EVENT_BUS_BACKEND: str = os.getenv("EVENT_BUS_BACKEND", "redis")
+    SSE_KEEPALIVE_SECONDS: int = int(os.getenv("SSE_KEEPALIVE_SECONDS", 15))
 
 # ← THIS LINE WAS MISSING IN YOUR FILE
 settings = Settings()
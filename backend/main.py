@@ -2,18 +2,29 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.openapi.docs import get_swagger_ui_html
-from backend.api.middleware import SimpleRateLimiterMiddleware
+from backend.api.middleware import BodySizeLimitMiddleware, RateLimitMiddleware, build_rate_limit_store
 from backend.api.routes import router
+from backend.auth.hashing import password_hasher
 from backend.config import settings
+from backend.services.file_processor import ocr_cache_stats
+from backend.services.validator import upload_body_limit
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    password_hasher.shutdown()
 
 app = FastAPI(
     title="SJWG AI Reporter",
     version="1.0.0",
-    description="Medical/Legal AI Report Generator"
+    description="Medical/Legal AI Report Generator",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -22,12 +33,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-Offset"],
+)
+
+# Checked before the multipart form is parsed; per-file limits are enforced again by the handlers.
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        "/api/upload/batch": upload_body_limit(settings.MAX_BATCH_FILES),
+        "/api/upload": upload_body_limit(1),
+    },
 )
 
 app.add_middleware(
-    SimpleRateLimiterMiddleware,
+    RateLimitMiddleware,
     max_requests=settings.RATE_LIMIT_REQUESTS,
     window_seconds=settings.RATE_LIMIT_WINDOW_SECONDS,
+    store=build_rate_limit_store(settings.RATE_LIMIT_BACKEND, settings.REDIS_URL),
 )
 
 app.include_router(router, prefix="/api")
@@ -44,3 +66,8 @@ def swagger_ui():
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+@app.get("/health/ocr-cache")
+def ocr_cache_health():
+    # Walks the cache directory, so keep it out of liveness probes.
+    return {"ocr_cache": ocr_cache_stats()}
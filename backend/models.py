@@ -1,5 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+import hashlib
+import sqlite3
+import zlib
+from sqlalchemy import (
+    Column, Integer, String, Boolean, Text, DateTime, ForeignKey, Index, LargeBinary, DDL, column, event, select,
+    table,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, relationship, object_session
+from sqlalchemy.orm.exc import DetachedInstanceError
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -14,14 +23,202 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     reports = relationship("Report", back_populates="owner")
 
+SUMMARY_PREVIEW_CHARS = 500
+BLOB_COMPRESSION_LEVEL = 6
+
+class ReportBlob(Base):
+    """Compressed report text, keyed by the SHA-256 of its content so identical texts are stored once."""
+    __tablename__ = "report_blobs"
+    digest = Column(String(64), primary_key=True)
+    encoding = Column(String(16), nullable=False, default="zlib")
+    size = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+    @staticmethod
+    def digest_of(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def encode(text: str) -> dict:
+        raw = text.encode("utf-8")
+        return {
+            "digest": hashlib.sha256(raw).hexdigest(),
+            "encoding": "zlib",
+            "size": len(raw),
+            "data": zlib.compress(raw, BLOB_COMPRESSION_LEVEL),
+        }
+
+    @property
+    def text(self) -> str:
+        return decode_blob(self.encoding, self.data)
+
+
+def decode_blob(encoding: str, data: bytes | None) -> str | None:
+    if data is None:
+        return None
+    if encoding != "zlib":
+        raise ValueError(f"Unknown report blob encoding: {encoding}")
+    return zlib.decompress(data).decode("utf-8")
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    # report_text(encoding, data) lets SQL read blob text; the search index's content view uses it.
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function("report_text", 2, decode_blob, deterministic=True)
+
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (Index("ix_reports_owner_id_created_at", "owner_id", "created_at"),)
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
-    raw_text = Column(Text)
-    ai_summary = Column(Text)
+    # Full OCR text and summary live in report_blobs; the hot table keeps only references and sizes.
+    raw_text_digest = Column(String(64), ForeignKey("report_blobs.digest"))
+    raw_text_size = Column(Integer)
+    ai_summary_digest = Column(String(64), ForeignKey("report_blobs.digest"))
+    ai_summary_size = Column(Integer)
+    summary_preview = Column(String(SUMMARY_PREVIEW_CHARS))
+    # The summary generated so far while the summary stage streams; cleared once it is stored in full.
+    summary_partial = Column(Text)
     pdf_report = Column(Text)
+    extraction_metadata = Column(Text)
     status = Column(String, default="pending")
+    completed_stage = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     owner_id = Column(Integer, ForeignKey("users.id"))
+    batch_id = Column(String(32), index=True)
     owner = relationship("User", back_populates="reports")
+
+    @property
+    def raw_text(self) -> str | None:
+        return self._load_text("raw_text")
+
+    @raw_text.setter
+    def raw_text(self, value: str | None) -> None:
+        self._store_text("raw_text", value)
+
+    @property
+    def ai_summary(self) -> str | None:
+        return self._load_text("ai_summary")
+
+    @ai_summary.setter
+    def ai_summary(self, value: str | None) -> None:
+        self._store_text("ai_summary", value)
+        # Listings read only this column, so the full summary is never loaded to slice it.
+        self.summary_preview = value[:SUMMARY_PREVIEW_CHARS] if value else None
+
+    def _load_text(self, field: str) -> str | None:
+        """Fetch and decompress the text on first access (detail views and pipeline stages only)."""
+        digest = getattr(self, f"{field}_digest")
+        if digest is None:
+            return None
+        texts = self.__dict__.setdefault("_texts", {})
+        if digest not in texts:
+            session = object_session(self)
+            if session is None:
+                raise DetachedInstanceError(f"Report {self.id} is detached; cannot load {field}")
+            texts[digest] = session.get(ReportBlob, digest).text
+        return texts[digest]
+
+    def _store_text(self, field: str, value: str | None) -> None:
+        digest = ReportBlob.digest_of(value) if value is not None else None
+        setattr(self, f"{field}_digest", digest)
+        setattr(self, f"{field}_size", len(value.encode("utf-8")) if value is not None else None)
+        if value is not None:
+            # Written to report_blobs when the session flushes; see _write_report_blobs.
+            self.__dict__.setdefault("_texts", {})[digest] = value
+            self.__dict__.setdefault("_pending_blobs", {})[digest] = value
+
+
+def _insert_blobs_if_absent(session: Session, rows: list[dict]) -> None:
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        # Another worker may store the same text concurrently; the first writer wins.
+        session.execute(insert(ReportBlob).values(rows).on_conflict_do_nothing(index_elements=["digest"]))
+        return
+    existing = set(session.scalars(select(ReportBlob.digest).where(ReportBlob.digest.in_([r["digest"] for r in rows]))))
+    missing = [row for row in rows if row["digest"] not in existing]
+    if missing:
+        session.execute(ReportBlob.__table__.insert(), missing)
+
+
+@event.listens_for(Session, "before_flush")
+def _write_report_blobs(session, flush_context, instances):
+    rows: dict[str, dict] = {}
+    for report in list(session.new) + list(session.dirty):
+        if isinstance(report, Report) and report.__dict__.get("_pending_blobs"):
+            for digest, text in report.__dict__.pop("_pending_blobs").items():
+                rows.setdefault(digest, ReportBlob.encode(text))
+    if rows:
+        _insert_blobs_if_absent(session, list(rows.values()))
+
+
+def delete_orphaned_blobs(session: Session, digests) -> int:
+    """Delete those of ``digests`` that no report references any more; returns how many went."""
+    digests = {digest for digest in digests if digest}
+    if not digests:
+        return 0
+    referenced = set(
+        session.scalars(select(Report.raw_text_digest).where(Report.raw_text_digest.in_(digests)))
+    ) | set(session.scalars(select(Report.ai_summary_digest).where(Report.ai_summary_digest.in_(digests))))
+    for field in (search_rows.c.raw_text_digest, search_rows.c.summary_digest):
+        # The search index must rebuild the exact text it indexed before it can drop a report.
+        referenced |= set(session.scalars(select(field).where(field.in_(digests))))
+    orphaned = digests - referenced
+    if orphaned:
+        session.execute(ReportBlob.__table__.delete().where(ReportBlob.digest.in_(orphaned)))
+    return len(orphaned)
+
+
+# Full-text index over title, summary and OCR text, one row per completed report
+# (backend.services.search_index). The text itself stays compressed in report_blobs:
+# report_search records the digests that were indexed, and only the index is stored
+# next to it. Its shape differs per dialect, so it is plain DDL rather than a mapped
+# table. On SQLite an external-content FTS5 table reads the text back through
+# report_search_content, a view that decompresses the blobs, when it builds snippets
+# or un-indexes a row. On PostgreSQL the row carries a tsvector with a GIN index.
+SEARCH_TABLE = "report_search"
+SEARCH_CONTENT_VIEW = "report_search_content"
+SEARCH_FTS_TABLE = "report_search_fts"
+
+search_rows = table(
+    SEARCH_TABLE,
+    column("report_id", Integer),
+    column("owner_id", Integer),
+    column("title", String),
+    column("summary_digest", String),
+    column("raw_text_digest", String),
+)
+
+_SEARCH_COLUMNS = (
+    "report_id INTEGER PRIMARY KEY REFERENCES reports (id) ON DELETE CASCADE, "
+    "owner_id INTEGER NOT NULL, title TEXT NOT NULL, summary_digest VARCHAR(64), raw_text_digest VARCHAR(64)"
+)
+
+for statement in (
+    f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ({_SEARCH_COLUMNS})",
+    f"CREATE VIEW IF NOT EXISTS {SEARCH_CONTENT_VIEW} AS "
+    "SELECT search.report_id AS report_id, search.title AS title, "
+    "report_text(summary.encoding, summary.data) AS summary, report_text(body.encoding, body.data) AS body, "
+    "CAST(search.owner_id AS TEXT) AS owner_id "
+    f"FROM {SEARCH_TABLE} AS search "
+    "LEFT JOIN report_blobs AS summary ON summary.digest = search.summary_digest "
+    "LEFT JOIN report_blobs AS body ON body.digest = search.raw_text_digest",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_FTS_TABLE} USING fts5(title, summary, body, owner_id, "
+    f"content='{SEARCH_CONTENT_VIEW}', content_rowid='report_id', tokenize='porter unicode61')",
+):
+    event.listen(Report.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+for statement in (
+    f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ({_SEARCH_COLUMNS}, document TSVECTOR NOT NULL)",
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)",
+):
+    event.listen(Report.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+for statement in (
+    f"DROP TABLE IF EXISTS {SEARCH_FTS_TABLE}",
+    f"DROP VIEW IF EXISTS {SEARCH_CONTENT_VIEW}",
+):
+    event.listen(Report.__table__, "before_drop", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Report.__table__, "before_drop", DDL(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+import pydicom
+from PIL import Image
+from pydicom.dataset import Dataset
+
+# Values larger than this (pixel data, embedded documents, overlays) stay on
+# disk until accessed, so reading a multi-gigabyte study costs only its header.
+DEFER_SIZE = "16 KB"
+
+HEADER_FIELDS = (
+    ("PatientName", "Patient"),
+    ("PatientID", "Patient ID"),
+    ("PatientBirthDate", "Birth date"),
+    ("StudyDate", "Study date"),
+    ("Modality", "Modality"),
+    ("StudyDescription", "Study"),
+    ("SeriesDescription", "Series"),
+    ("BodyPartExamined", "Body part"),
+    ("InstitutionName", "Institution"),
+    ("ReferringPhysicianName", "Referring physician"),
+)
+
+
+@dataclass
+class DicomDocument:
+    header: dict[str, str] = field(default_factory=dict)
+    report_text: str = ""
+    pdf: bytes | None = None
+    frames: int = 0
+    modality: str | None = None
+    sop_class: str | None = None
+
+    @property
+    def header_text(self) -> str:
+        return "\n".join(f"{label}: {value}" for label, value in self.header.items())
+
+    def metadata(self) -> dict[str, Any]:
+        return {
+            "modality": self.modality,
+            "sop_class": self.sop_class,
+            "structured_report": bool(self.report_text),
+            "encapsulated_pdf": self.pdf is not None,
+            "frames": self.frames,
+        }
+
+
+def read(file_path: Path) -> DicomDocument:
+    """Read the text-bearing parts of a DICOM file without touching its pixel data."""
+    dataset = pydicom.dcmread(str(file_path), defer_size=DEFER_SIZE, stop_before_pixels=True)
+    document = DicomDocument(
+        header={label: str(dataset.get(keyword)) for keyword, label in HEADER_FIELDS if dataset.get(keyword)},
+        modality=dataset.get("Modality"),
+        sop_class=getattr(dataset.get("SOPClassUID"), "name", None),
+        frames=int(dataset.get("NumberOfFrames") or 1) if "Rows" in dataset else 0,
+    )
+    if "ContentSequence" in dataset:
+        document.report_text = "\n".join(_content_lines(dataset.ContentSequence, depth=0))
+    if dataset.get("MIMETypeOfEncapsulatedDocument") == "application/pdf" and "EncapsulatedDocument" in dataset:
+        # The deferred value is read from disk here, and only here.
+        document.pdf = bytes(dataset.EncapsulatedDocument)
+    return document
+
+
+def _concept_name(item: Dataset) -> str:
+    codes = item.get("ConceptNameCodeSequence")
+    return str(codes[0].CodeMeaning) if codes else ""
+
+
+def _content_value(item: Dataset) -> str:
+    value_type = item.get("ValueType")
+    if value_type == "TEXT":
+        return str(item.get("TextValue", ""))
+    if value_type == "CODE" and item.get("ConceptCodeSequence"):
+        return str(item.ConceptCodeSequence[0].CodeMeaning)
+    if value_type == "NUM" and item.get("MeasuredValueSequence"):
+        measured = item.MeasuredValueSequence[0]
+        units = measured.get("MeasurementUnitsCodeSequence")
+        return f"{measured.NumericValue} {units[0].CodeValue if units else ''}".strip()
+    for keyword in ("PersonName", "Date", "Time", "DateTime", "UID"):
+        if keyword in item:
+            return str(item.get(keyword))
+    return ""
+
+
+def _content_lines(sequence: Any, depth: int) -> Iterator[str]:
+    """Flatten an SR content tree into indented ``Concept: value`` lines."""
+    indent = "  " * depth
+    for item in sequence:
+        name, value = _concept_name(item), _content_value(item)
+        if item.get("ValueType") == "CONTAINER":
+            if name:
+                yield f"{indent}{name}"
+        elif name and value:
+            yield f"{indent}{name}: {value}"
+        elif value:
+            yield f"{indent}{value}"
+        if "ContentSequence" in item:
+            yield from _content_lines(item.ContentSequence, depth + 1)
+
+
+def iter_frame_images(file_path: Path, count: int) -> Iterator[Image.Image]:
+    """Decode the first ``count`` frames and yield them as 8-bit images, one at a time.
+
+    pydicom's ``iter_pixels`` reads each frame from disk as it is requested,
+    so a multi-frame study never has more than one decoded frame in memory.
+    Needs numpy (and a decoder plugin for compressed transfer syntaxes).
+    """
+    from pydicom.pixels import iter_pixels
+
+    header = Dataset()
+    for frame in iter_pixels(str(file_path), indices=range(count), ds_out=header):
+        yield _frame_to_image(frame, header)
+
+
+def _frame_to_image(frame: Any, header: Dataset) -> Image.Image:
+    import numpy as np
+    from pydicom.pixels import apply_voi_lut
+
+    if frame.ndim == 3:
+        return Image.fromarray(frame.astype(np.uint8))
+    # Apply the display window when the file defines one, then stretch to 8 bits.
+    pixels = apply_voi_lut(frame, header).astype(np.float32)
+    low, high = float(pixels.min()), float(pixels.max())
+    scaled = (pixels - low) * (255.0 / (high - low)) if high > low else np.zeros_like(pixels)
+    if header.get("PhotometricInterpretation") == "MONOCHROME1":
+        scaled = 255.0 - scaled
+    return Image.fromarray(scaled.astype(np.uint8))
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from docx import Document
+from docx.table import Table
+from openpyxl import load_workbook
+
+# Spreadsheet cells are joined with tabs so columns stay distinguishable in the raw text.
+CELL_SEPARATOR = "\t"
+TABLE_CELL_SEPARATOR = " | "
+
+
+@dataclass
+class DocumentText:
+    text: str
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+def extract_docx(file_path: Path) -> DocumentText:
+    """Paragraphs and tables of a Word document, in document order."""
+    blocks: list[str] = []
+    paragraphs = tables = 0
+    for item in Document(str(file_path)).iter_inner_content():
+        if isinstance(item, Table):
+            tables += 1
+            blocks.append("\n".join(_table_rows(item)))
+        elif item.text.strip():
+            paragraphs += 1
+            blocks.append(item.text.strip())
+    text = "\n\n".join(block for block in blocks if block)
+    return DocumentText(text, {"format": "docx", "paragraphs": paragraphs, "tables": tables})
+
+
+def _table_rows(table: Any) -> Iterator[str]:
+    for row in table.rows:
+        cells: list[str] = []
+        for cell in row.cells:
+            value = cell.text.strip()
+            # Merged cells are repeated once per grid column they span.
+            if value and (not cells or cells[-1] != value):
+                cells.append(value)
+        if cells:
+            yield TABLE_CELL_SEPARATOR.join(cells)
+
+
+def extract_xlsx(file_path: Path) -> DocumentText:
+    """Cell values of every worksheet, streamed row by row.
+
+    The workbook is opened read-only, so openpyxl parses rows lazily instead of
+    building every cell object up front; ``data_only`` returns cached formula
+    results rather than the formulas.
+    """
+    workbook = load_workbook(str(file_path), read_only=True, data_only=True)
+    sections: list[str] = []
+    sheets: list[dict[str, Any]] = []
+    try:
+        for worksheet in workbook.worksheets:
+            lines = [line for line in (_row_text(row) for row in worksheet.iter_rows(values_only=True)) if line]
+            sheets.append({"name": worksheet.title, "rows": len(lines)})
+            if lines:
+                sections.append("\n".join([f"Sheet: {worksheet.title}", *lines]))
+    finally:
+        # Read-only workbooks keep the file open until closed.
+        workbook.close()
+    return DocumentText("\n\n".join(sections), {"format": "xlsx", "sheets": sheets})
+
+
+def _row_text(row: tuple[Any, ...]) -> str:
+    values = ["" if value is None else str(value).strip() for value in row]
+    while values and not values[-1]:
+        values.pop()
+    return CELL_SEPARATOR.join(values)
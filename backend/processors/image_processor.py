@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from PIL import Image, ImageOps
+
+# Without DPI metadata (typical for phone photos) assume the image shows a
+# US Letter page, so its long edge spans this many inches.
+ASSUMED_PAGE_INCHES = 11.0
+# Only downscale when the image is meaningfully above the target resolution.
+DOWNSCALE_TOLERANCE = 1.2
+DESKEW_SAMPLE_WIDTH = 800
+DESKEW_STEP_DEGREES = 0.5
+DESKEW_MIN_DEGREES = 0.2
+# A border row/column whose mean brightness is below this is scanner background, not page.
+DARK_BORDER_LEVEL = 96
+MARGIN_FRACTION = 0.01
+INK_BLOCK_PIXELS = 8
+INK_BLOCK_LEVEL = 32
+EXIF_ORIENTATION = 0x0112
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    grayscale: bool = True
+    target_dpi: int = 300
+    binarize: bool = True
+    deskew: bool = True
+    max_skew_degrees: float = 5.0
+    crop_borders: bool = True
+
+    def cache_key(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def preprocess(image: Image.Image, options: PreprocessOptions, source_dpi: float | None = None) -> Image.Image:
+    """Return ``image`` prepared for OCR, as a new image unless no step applies.
+
+    Steps run in a fixed order: orientation, grayscale, downscale to
+    ``target_dpi``, deskew, binarize, border crop. ``source_dpi`` overrides
+    the image's own DPI metadata (rasterized PDF pages know theirs exactly).
+    ``image`` itself is never modified.
+    """
+    prepared = image
+    if image.getexif().get(EXIF_ORIENTATION, 1) != 1:
+        # Phone photos are often stored sideways with an orientation tag.
+        prepared = ImageOps.exif_transpose(image)
+    if options.grayscale or options.binarize or options.deskew or options.crop_borders:
+        prepared = prepared.convert("L")
+    if options.target_dpi > 0:
+        prepared = downscale(prepared, options.target_dpi, source_dpi or _image_dpi(image))
+    if options.deskew:
+        prepared = deskew(prepared, options.max_skew_degrees)
+    if options.binarize:
+        prepared = binarize(prepared)
+    if options.crop_borders:
+        prepared = crop_borders(prepared)
+    return prepared
+
+
+def _image_dpi(image: Image.Image) -> float:
+    dpi = image.info.get("dpi")
+    if dpi and dpi[0] > 72:
+        # 72 is what many cameras and editors write when they don't know.
+        return float(dpi[0])
+    return max(image.size) / ASSUMED_PAGE_INCHES
+
+
+def downscale(image: Image.Image, target_dpi: int, source_dpi: float) -> Image.Image:
+    if source_dpi <= target_dpi * DOWNSCALE_TOLERANCE:
+        return image
+    scale = target_dpi / source_dpi
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    # reducing_gap shrinks by integer factors first, which is much faster than a full Lanczos pass.
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+
+def otsu_threshold(image: Image.Image) -> int:
+    histogram = image.histogram()[:256]
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background = background_sum = 0
+    best_level, best_variance = 127, -1.0
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        background_sum += level * count
+        mean_background = background_sum / background
+        mean_foreground = (weighted_total - background_sum) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def binarize(image: Image.Image) -> Image.Image:
+    threshold = otsu_threshold(image)
+    return image.point([0 if level <= threshold else 255 for level in range(256)])
+
+
+def _row_profile(image: Image.Image) -> list[float]:
+    # BOX-resampling to one column averages each row in C.
+    return list(image.resize((1, image.height), Image.Resampling.BOX).getdata())
+
+
+def _column_profile(image: Image.Image) -> list[float]:
+    return list(image.resize((image.width, 1), Image.Resampling.BOX).getdata())
+
+
+def estimate_skew(image: Image.Image, max_degrees: float) -> float:
+    """Angle (degrees, counter-clockwise) that makes text lines horizontal.
+
+    Text lines produce a sharply alternating row profile only when level, so
+    the candidate rotation with the largest row-to-row variation wins.
+    """
+    sample = image
+    if image.width > DESKEW_SAMPLE_WIDTH:
+        ratio = DESKEW_SAMPLE_WIDTH / image.width
+        sample = image.resize((DESKEW_SAMPLE_WIDTH, max(1, round(image.height * ratio))), Image.Resampling.BOX)
+    sample = ImageOps.invert(binarize(sample))
+
+    steps = int(max_degrees / DESKEW_STEP_DEGREES)
+    best_angle, best_score = 0.0, -1.0
+    for step in range(-steps, steps + 1):
+        angle = step * DESKEW_STEP_DEGREES
+        profile = _row_profile(sample.rotate(angle, resample=Image.Resampling.NEAREST, fillcolor=0))
+        score = sum((below - above) ** 2 for above, below in zip(profile, profile[1:]))
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def deskew(image: Image.Image, max_degrees: float) -> Image.Image:
+    angle = estimate_skew(image, max_degrees)
+    if abs(angle) < DESKEW_MIN_DEGREES:
+        return image
+    return image.rotate(angle, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=255)
+
+
+def _trim_dark_edge(profile: list[float]) -> tuple[int, int]:
+    start, end = 0, len(profile)
+    while start < end and profile[start] < DARK_BORDER_LEVEL:
+        start += 1
+    while end > start and profile[end - 1] < DARK_BORDER_LEVEL:
+        end -= 1
+    return start, end
+
+
+def crop_borders(image: Image.Image) -> Image.Image:
+    """Drop dark scanner background around the page, then blank margins around the text."""
+    top, bottom = _trim_dark_edge(_row_profile(image))
+    left, right = _trim_dark_edge(_column_profile(image))
+    if right - left < image.width // 4 or bottom - top < image.height // 4:
+        # Mostly dark: a photo or negative rather than a page with a border.
+        return image
+    page = image.crop((left, top, right, bottom))
+
+    # Find text on a block-averaged copy, so isolated specks of scanner noise
+    # don't count as ink while dense text lines do.
+    blocks = ImageOps.invert(page).reduce(INK_BLOCK_PIXELS)
+    ink = blocks.point([0 if level < INK_BLOCK_LEVEL else 255 for level in range(256)]).getbbox()
+    if ink is None:
+        return page
+    ink = tuple(edge * INK_BLOCK_PIXELS for edge in ink)
+    margin = round(max(page.size) * MARGIN_FRACTION)
+    return page.crop(
+        (
+            max(0, ink[0] - margin),
+            max(0, ink[1] - margin),
+            min(page.width, ink[2] + margin),
+            min(page.height, ink[3] + margin),
+        )
+    )
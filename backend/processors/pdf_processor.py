@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import subprocess
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Sequence
+
+MIN_TEXT_CHARS = 40
+MIN_ALNUM_RATIO = 0.6
+TEXT_LAYER_TIMEOUT_SECONDS = 120
+
+
+@dataclass
+class OcrText:
+    text: str
+    dpi: int | None = None
+    confidence: float | None = None
+    passes: int = 1
+
+
+PageOcr = Callable[[Sequence[int]], Iterable[OcrText]]
+PageProgress = Callable[[int], None]
+
+
+@dataclass
+class PageResult:
+    number: int
+    method: str
+    text: str
+    dpi: int | None = None
+    confidence: float | None = None
+    passes: int | None = None
+
+    def metadata(self) -> dict[str, Any]:
+        entry: dict[str, Any] = {"page": self.number, "method": self.method, "chars": len(self.text)}
+        if self.dpi is not None:
+            entry["dpi"] = self.dpi
+        if self.confidence is not None:
+            entry["confidence"] = round(self.confidence, 1)
+        if self.passes is not None:
+            entry["passes"] = self.passes
+        return entry
+
+
+@dataclass
+class PdfExtraction:
+    pages: list[PageResult] = field(default_factory=list)
+    text_layer_seconds: float = 0.0
+    ocr_seconds: float = 0.0
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(page.text.strip() for page in self.pages if page.text.strip())
+
+    def pages_by_method(self, method: str) -> list[int]:
+        return [page.number for page in self.pages if page.method == method]
+
+    def metadata(self) -> dict[str, Any]:
+        text_pages = self.pages_by_method("text")
+        ocr_pages = self.pages_by_method("ocr")
+        per_page_ocr = self.ocr_seconds / len(ocr_pages) if ocr_pages else 0.0
+        return {
+            "pages": [page.metadata() for page in self.pages],
+            "text_layer_pages": text_pages,
+            "ocr_pages": ocr_pages,
+            "text_layer_seconds": round(self.text_layer_seconds, 3),
+            "ocr_seconds": round(self.ocr_seconds, 3),
+            "estimated_ocr_seconds_saved": round(per_page_ocr * len(text_pages), 3),
+        }
+
+
+def read_text_layer(file_path: Path, first_page: int = 1, last_page: int | None = None) -> list[str]:
+    """Return the embedded text of each page in the range, or an empty list if unavailable.
+
+    Uses poppler's ``pdftotext`` (installed alongside ``pdf2image``), which
+    terminates every page with a form feed.
+    """
+    page_args = ["-f", str(first_page)] + (["-l", str(last_page)] if last_page else [])
+    try:
+        completed = subprocess.run(
+            ["pdftotext", "-layout", "-enc", "UTF-8", *page_args, str(file_path), "-"],
+            capture_output=True,
+            check=True,
+            timeout=TEXT_LAYER_TIMEOUT_SECONDS,
+        )
+    except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return []
+    pages = completed.stdout.decode("utf-8", errors="replace").split("\f")
+    if pages and not pages[-1].strip():
+        pages.pop()
+    return pages
+
+
+def has_usable_text(text: str, min_chars: int = MIN_TEXT_CHARS) -> bool:
+    # Scanned pages often carry an empty or garbage layer (stray glyphs, broken font maps).
+    compact = "".join(text.split())
+    if len(compact) < min_chars:
+        return False
+    alnum = sum(character.isalnum() for character in compact)
+    return alnum / len(compact) >= MIN_ALNUM_RATIO
+
+
+def extract(
+    file_path: Path,
+    first_page: int,
+    last_page: int,
+    ocr_pages: PageOcr,
+    on_page: PageProgress | None = None,
+) -> PdfExtraction:
+    """Extract pages ``first_page..last_page``, OCRing only those without a usable text layer.
+
+    ``ocr_pages`` receives the 1-based page numbers that need OCR and returns
+    (or yields, as pages finish) their ``OcrText`` in the same order.
+    ``on_page`` is called with each page number once its text is available.
+    """
+    started = time.perf_counter()
+    layer = read_text_layer(file_path, first_page, last_page)
+    text_layer_seconds = time.perf_counter() - started
+
+    pages: dict[int, PageResult] = {}
+    scanned: list[int] = []
+    for number in range(first_page, last_page + 1):
+        index = number - first_page
+        embedded = layer[index] if index < len(layer) else ""
+        if has_usable_text(embedded):
+            pages[number] = PageResult(number, "text", embedded)
+        else:
+            scanned.append(number)
+    if on_page:
+        for number in pages:
+            on_page(number)
+
+    ocr_seconds = 0.0
+    if scanned:
+        started = time.perf_counter()
+        for number, result in zip(scanned, ocr_pages(scanned)):
+            pages[number] = PageResult(number, "ocr", result.text, result.dpi, result.confidence, result.passes)
+            if on_page:
+                on_page(number)
+        ocr_seconds = time.perf_counter() - started
+
+    return PdfExtraction(
+        pages=[pages[number] for number in sorted(pages)],
+        text_layer_seconds=text_layer_seconds,
+        ocr_seconds=ocr_seconds,
+    )
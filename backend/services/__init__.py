@@ -1 +1 @@
-from . import export_service, file_processor, report_generator, validator  # noqa: F401
+from . import event_bus, export_service, file_processor, llm, ocr_cache, ocr_engine, report_generator, search_index, summary_cache, validator  # noqa: F401
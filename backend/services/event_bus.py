@@ -0,0 +1,196 @@
+"""Report progress events, published by pipeline tasks and streamed to clients.
+
+Events are fire-and-forget: a subscriber only sees what is published while it
+is subscribed, so readers fetch the current report state after subscribing.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Protocol
+
+import redis
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+Event = dict[str, Any]
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+_event_bus: EventBus | None = None
+
+
+class Subscription:
+    """Events for one report, delivered in publish order."""
+
+    def __init__(self, bus: _LocalHub, report_id: int):
+        self.report_id = report_id
+        self._bus = bus
+        self._queue: asyncio.Queue[Event] = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+
+    def deliver(self, event: Event) -> None:
+        # Publishers may run on another thread (or synchronously on this loop).
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    async def get(self, timeout: float | None = None) -> Event | None:
+        """Return the next event, or ``None`` if none arrives within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self) -> None:
+        await self._bus.unsubscribe(self)
+
+
+class EventBus(Protocol):
+    def publish(self, report_id: int, event: Event) -> None: ...
+
+    async def subscribe(self, report_id: int) -> Subscription: ...
+
+
+class _LocalHub:
+    """Fans events out to the subscriptions held by this process."""
+
+    def __init__(self) -> None:
+        self._subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+
+    def dispatch(self, report_id: int, event: Event) -> None:
+        for subscription in list(self._subscriptions.get(report_id, ())):
+            subscription.deliver(event)
+
+    async def subscribe(self, report_id: int) -> Subscription:
+        subscription = Subscription(self, report_id)
+        self._subscriptions[report_id].add(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscriptions.get(subscription.report_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscriptions[subscription.report_id]
+
+    def subscriber_count(self, report_id: int) -> int:
+        return len(self._subscriptions.get(report_id, ()))
+
+
+class MemoryEventBus(_LocalHub):
+    """In-process bus; only works when the pipeline runs in the API process (tests, eager mode)."""
+
+    def publish(self, report_id: int, event: Event) -> None:
+        self.dispatch(report_id, event)
+
+
+class RedisEventBus(_LocalHub):
+    """Pub/sub through Redis so Celery workers reach every API process.
+
+    Each API process holds one pub/sub connection, subscribed to the channels
+    of reports that currently have at least one local listener.
+    """
+
+    prefix = "report-events:"
+
+    def __init__(self, url: str):
+        super().__init__()
+        self._url = url
+        self._publisher: redis.Redis | None = None
+        self._pubsub: aioredis.client.PubSub | None = None
+        self._reader: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    def channel(self, report_id: int) -> str:
+        return f"{self.prefix}{report_id}"
+
+    def publish(self, report_id: int, event: Event) -> None:
+        if self._publisher is None:
+            self._publisher = redis.Redis.from_url(self._url)
+        self._publisher.publish(self.channel(report_id), json.dumps(event))
+
+    async def subscribe(self, report_id: int) -> Subscription:
+        subscription = await super().subscribe(report_id)
+        if self.subscriber_count(report_id) == 1:
+            try:
+                async with self._lock:
+                    if self._pubsub is None:
+                        self._pubsub = aioredis.Redis.from_url(self._url).pubsub(ignore_subscribe_messages=True)
+                    await self._pubsub.subscribe(self.channel(report_id))
+                    if self._reader is None or self._reader.done():
+                        self._reader = asyncio.create_task(self._read())
+            except BaseException:
+                await super().unsubscribe(subscription)
+                raise
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        await super().unsubscribe(subscription)
+        if self.subscriber_count(subscription.report_id) == 0 and self._pubsub is not None:
+            async with self._lock:
+                try:
+                    await self._pubsub.unsubscribe(self.channel(subscription.report_id))
+                except (RedisError, OSError):
+                    logger.warning("Could not unsubscribe from report %s events", subscription.report_id)
+
+    async def _read(self) -> None:
+        pubsub = self._pubsub
+        assert pubsub is not None
+        while pubsub.subscribed:
+            try:
+                message = await pubsub.get_message(timeout=1.0)
+            except (RedisError, OSError):
+                logger.warning("Lost the report events connection", exc_info=True)
+                self._pubsub = None
+                # Streams close on this and clients reconnect, re-reading the report state.
+                for report_id in list(self._subscriptions):
+                    self.dispatch(report_id, {"type": "reconnect", "report_id": report_id})
+                return
+            if message is None:
+                continue
+            channel = message["channel"].decode("utf-8")
+            try:
+                report_id = int(channel.removeprefix(self.prefix))
+                event = json.loads(message["data"])
+            except (ValueError, TypeError):
+                continue
+            self.dispatch(report_id, event)
+
+
+def build_event_bus(backend: str, redis_url: str) -> EventBus:
+    backend = backend.lower()
+    if backend == "memory":
+        return MemoryEventBus()
+    if backend == "redis":
+        return RedisEventBus(redis_url)
+    raise ValueError(f"Unknown event bus backend: {backend}")
+
+
+def get_event_bus() -> EventBus:
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = build_event_bus(settings.EVENT_BUS_BACKEND, settings.REDIS_URL)
+    return _event_bus
+
+
+def set_event_bus(bus: EventBus | None) -> None:
+    global _event_bus
+    _event_bus = bus
+
+
+def publish(report_id: int, event_type: str, **data: Any) -> None:
+    """Best-effort publish; progress updates must never fail the pipeline."""
+    try:
+        get_event_bus().publish(report_id, {"type": event_type, "report_id": report_id, **data})
+    except (RedisError, OSError):
+        logger.warning("Could not publish %s event for report %s", event_type, report_id, exc_info=True)
+
+
+def publish_status(report_id: int, status: str, **data: Any) -> None:
+    publish(report_id, "status", status=status, **data)
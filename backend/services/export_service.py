@@ -1,19 +1,98 @@
 from __future__ import annotations
 
+import html
 from datetime import datetime
 from pathlib import Path
+from typing import Iterator, Protocol
 
-from weasyprint import HTML
+from backend.config import settings
 
+# Raw OCR text goes into the PDF in blocks of this many lines, so pagination
+# splits small flowables instead of re-splitting one huge block on every page.
+RAW_TEXT_LINES_PER_BLOCK = 40
 
-def render_pdf(summary: str, raw_text: str, destination: Path) -> Path:
+
+class PdfRenderer(Protocol):
+    def render(self, summary: str, raw_text: str, destination: Path) -> None: ...
+
+
+def _title() -> str:
+    return f"Medical Report - {datetime.now().strftime('%Y-%m-%d')}"
+
+
+class WeasyPrintRenderer:
+    """HTML/CSS layout; slower, but suited to rich templates."""
+
+    def render(self, summary: str, raw_text: str, destination: Path) -> None:
+        # Imported lazily: WeasyPrint needs Pango at import time.
+        from weasyprint import HTML
+
+        document = f"""
+        <h1>{_title()}</h1>
+        <h2>AI Summary</h2>
+        <pre>{html.escape(summary)}</pre>
+        <h2>Raw OCR Text</h2>
+        <pre style="font-size:10px">{html.escape(raw_text)}</pre>
+        """
+        HTML(string=document).write_pdf(str(destination))
+
+
+class ReportLabRenderer:
+    """Streams text into paginated ReportLab flowables without an HTML layout pass."""
+
+    raw_font = ("Courier", 7)
+
+    def render(self, summary: str, raw_text: str, destination: Path) -> None:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        from reportlab.platypus import Paragraph, Preformatted, SimpleDocTemplate
+
+        styles = getSampleStyleSheet()
+        raw_style = styles["Code"].clone("RawText", fontName=self.raw_font[0], fontSize=self.raw_font[1], leading=9)
+        document = SimpleDocTemplate(str(destination), pagesize=A4, title=_title())
+        max_chars = int(document.width // stringWidth("M", *self.raw_font))
+
+        story = [Paragraph(html.escape(_title()), styles["Title"]), Paragraph("AI Summary", styles["Heading2"])]
+        story.extend(
+            Paragraph(html.escape(block).replace("\n", "<br/>"), styles["BodyText"])
+            for block in _paragraphs(summary)
+        )
+        story.append(Paragraph("Raw OCR Text", styles["Heading2"]))
+        story.extend(
+            Preformatted(block, raw_style, maxLineLength=max_chars, newLineChars="")
+            for block in _line_blocks(raw_text, RAW_TEXT_LINES_PER_BLOCK)
+        )
+        document.build(story)
+
+
+def _paragraphs(text: str) -> Iterator[str]:
+    for block in text.split("\n\n"):
+        if block.strip():
+            yield block.strip("\n")
+
+
+def _line_blocks(text: str, size: int) -> Iterator[str]:
+    lines = text.expandtabs().splitlines()
+    for start in range(0, len(lines), size):
+        yield "\n".join(lines[start:start + size])
+
+
+RENDERERS: dict[str, type[PdfRenderer]] = {
+    "weasyprint": WeasyPrintRenderer,
+    "reportlab": ReportLabRenderer,
+}
+
+
+def get_renderer(name: str | None = None) -> PdfRenderer:
+    name = (name or settings.PDF_RENDERER).lower()
+    try:
+        return RENDERERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown PDF renderer: {name}") from None
+
+
+def render_pdf(summary: str, raw_text: str, destination: Path, engine: str | None = None) -> Path:
     destination.parent.mkdir(parents=True, exist_ok=True)
-    html = f"""
-    <h1>Medical Report - {datetime.now().strftime('%Y-%m-%d')}</h1>
-    <h2>AI Summary</h2>
-    <pre>{summary}</pre>
-    <h2>Raw OCR Text</h2>
-    <pre style="font-size:10px">{raw_text}</pre>
-    """
-    HTML(string=html).write_pdf(str(destination))
+    get_renderer(engine).render(summary, raw_text, destination)
     return destination
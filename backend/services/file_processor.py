@@ -1,17 +1,54 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import os
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, replace
+from functools import partial
+from itertools import repeat
 from pathlib import Path
-from typing import Iterable
+from typing import IO, Any, Awaitable, Callable, Iterable, Iterator, Protocol, Sequence
 
-import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
 
+from backend.config import settings
+from backend.processors import dicom_processor, document_processor, image_processor, pdf_processor
+from backend.services import ocr_engine
+from backend.services.ocr_cache import OcrCache, file_digest
+from backend.utils.exceptions import UploadTooLargeError
 from backend.utils.validators import normalize_extension
 
-DEFAULT_ALLOWED_EXTENSIONS: tuple[str, ...] = (".pdf", ".png", ".jpg", ".jpeg")
+DEFAULT_ALLOWED_EXTENSIONS: tuple[str, ...] = (".pdf", ".png", ".jpg", ".jpeg", ".dcm", ".docx", ".xlsx")
+NATIVE_EXTRACTORS: dict[str, Callable[[Path], document_processor.DocumentText]] = {
+    ".docx": document_processor.extract_docx,
+    ".xlsx": document_processor.extract_xlsx,
+}
+OCR_LANG = "eng"
+OCR_DPI = 300
+
+
+_ocr_cache: OcrCache | None = None
+
+
+class AsyncReadable(Protocol):
+    def read(self, size: int = -1) -> Awaitable[bytes]: ...
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    sha256: str
+    size: int
+
+
+@dataclass
+class ExtractionResult:
+    text: str
+    metadata: dict[str, Any] = field(default_factory=dict)
 
 
 def ensure_directory(path: Path) -> None:
@@ -32,24 +69,406 @@ def save_bytes(content: bytes, filename: str, upload_dir: Path) -> Path:
     return destination
 
 
+async def save_stream(
+    source: AsyncReadable,
+    filename: str,
+    upload_dir: Path,
+    max_bytes: int | None = None,
+    chunk_size: int | None = None,
+) -> StoredUpload:
+    """Copy ``source`` to disk in fixed-size chunks, hashing as it goes.
+
+    File I/O runs in a worker thread so the event loop never blocks, and only
+    one chunk is held in memory at a time. Raises ``UploadTooLargeError`` as
+    soon as more than ``max_bytes`` have been read; the partial file is removed.
+    """
+    max_bytes = settings.MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    destination = await asyncio.to_thread(build_upload_path, filename, upload_dir)
+    digest = hashlib.sha256()
+    size = 0
+    buffer = await asyncio.to_thread(destination.open, "wb")
+    try:
+        while chunk := await source.read(chunk_size):
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise UploadTooLargeError(max_bytes)
+            await asyncio.to_thread(_write_chunk, buffer, digest, chunk)
+    except BaseException:
+        buffer.close()
+        destination.unlink(missing_ok=True)
+        raise
+    await asyncio.to_thread(buffer.close)
+    return StoredUpload(destination, digest.hexdigest(), size)
+
+
+def _write_chunk(buffer: IO[bytes], digest: Any, chunk: bytes) -> None:
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
 def extract_text(file_path: Path) -> str:
+    return extract_document(file_path).text
+
+
+def extract_document(file_path: Path, on_page: pdf_processor.PageProgress | None = None) -> ExtractionResult:
+    """Extract text from an upload, serving repeat files from the OCR cache.
+
+    ``on_page`` is called with each page number as its text becomes available;
+    it is not called for cache hits.
+    """
+    cache = get_ocr_cache()
+    if cache is None:
+        return _extract_uncached(file_path, on_page)
+
+    key = cache.key(file_digest(file_path), **_ocr_settings(file_path))
+    cached = cache.get(key)
+    if cached is not None:
+        return ExtractionResult(cached["text"], {**cached["metadata"], "cache": "hit"})
+
+    result = _extract_uncached(file_path, on_page)
+    cache.put(key, {"text": result.text, "metadata": result.metadata})
+    result.metadata["cache"] = "miss"
+    return result
+
+
+def get_ocr_cache() -> OcrCache | None:
+    global _ocr_cache
+    if settings.OCR_CACHE_MAX_BYTES <= 0:
+        return None
+    if _ocr_cache is None:
+        _ocr_cache = OcrCache(resolve_ocr_cache_root(), settings.OCR_CACHE_MAX_BYTES)
+    return _ocr_cache
+
+
+def resolve_ocr_cache_root() -> Path:
+    """Cache directory; never under the upload root, which is served without auth at /uploads."""
+    upload_root = resolve_upload_root()
+    root = Path(settings.OCR_CACHE_DIR) if settings.OCR_CACHE_DIR else upload_root.parent / "ocr_cache"
+    if root.resolve().is_relative_to(upload_root.resolve()):
+        raise ValueError(
+            f"OCR_CACHE_DIR {root} is inside the upload directory {upload_root}, which is publicly served; "
+            "cached OCR text would be downloadable"
+        )
+    return root
+
+
+def ocr_cache_stats() -> dict[str, int] | None:
+    cache = get_ocr_cache()
+    return cache.stats() if cache else None
+
+
+def _ocr_settings(file_path: Path) -> dict[str, Any]:
+    # Anything that changes OCR output must be part of the cache key.
+    options = _preprocess_options()
+    return {
+        "extension": normalize_extension(file_path.suffix),
+        "lang": OCR_LANG,
+        "engine": _engine().name,
+        "dpi": OCR_DPI,
+        "adaptive": (
+            {"dpis": settings.OCR_DPI_LADDER, "min_confidence": settings.OCR_MIN_CONFIDENCE}
+            if settings.OCR_ADAPTIVE_DPI
+            else None
+        ),
+        "preprocess": options.cache_key() if options else None,
+        "dicom_frames": settings.DICOM_MAX_OCR_FRAMES if settings.DICOM_OCR_FRAMES else 0,
+    }
+
+
+def _preprocess_options() -> image_processor.PreprocessOptions | None:
+    if not settings.OCR_PREPROCESS:
+        return None
+    return image_processor.PreprocessOptions(
+        grayscale=settings.OCR_GRAYSCALE,
+        target_dpi=settings.OCR_TARGET_DPI,
+        binarize=settings.OCR_BINARIZE,
+        deskew=settings.OCR_DESKEW,
+        crop_borders=settings.OCR_CROP_BORDERS,
+    )
+
+
+def _extract_uncached(file_path: Path, on_page: pdf_processor.PageProgress | None = None) -> ExtractionResult:
     normalized = normalize_extension(file_path.suffix)
     if normalized == ".pdf":
-        return _extract_pdf_text(file_path)
-    return _extract_image_text(file_path)
+        return _extract_pdf(file_path, on_page=on_page)
+    if normalized == ".dcm":
+        result = _extract_dicom(file_path)
+        if on_page:
+            on_page(1)
+        return result
+    if normalized in NATIVE_EXTRACTORS:
+        # Office documents carry their text; no rasterizing or OCR needed.
+        document = NATIVE_EXTRACTORS[normalized](file_path)
+        if on_page:
+            on_page(1)
+        return ExtractionResult(document.text, {"pages": [], "document": document.metadata})
+    text = _extract_image_text(file_path)
+    if on_page:
+        on_page(1)
+    return ExtractionResult(text, {"pages": [{"page": 1, "method": "ocr"}]})
+
+
+def _extract_dicom(file_path: Path) -> ExtractionResult:
+    """Header tags, SR text, embedded PDF text and (if enabled) OCR of burned-in frame text."""
+    document = dicom_processor.read(file_path)
+    sections = [document.header_text, document.report_text]
+    metadata: dict[str, Any] = {"pages": [], "dicom": document.metadata()}
+    if document.pdf is not None:
+        embedded = file_path.with_name(f"{file_path.stem}.{uuid.uuid4().hex}.pdf")
+        embedded.write_bytes(document.pdf)
+        try:
+            pdf = _extract_pdf(embedded)
+        finally:
+            embedded.unlink(missing_ok=True)
+        sections.append(pdf.text)
+        metadata["pages"] = pdf.metadata.get("pages", [])
+    if settings.DICOM_OCR_FRAMES and document.frames:
+        frames = []
+        count = min(document.frames, settings.DICOM_MAX_OCR_FRAMES)
+        for number, image in enumerate(dicom_processor.iter_frame_images(file_path, count), start=1):
+            try:
+                text = _ocr_image(image).strip()
+            finally:
+                image.close()
+            sections.append(text)
+            frames.append({"frame": number, "method": "ocr", "chars": len(text)})
+        metadata["frames"] = frames
+    return ExtractionResult("\n\n".join(section for section in sections if section), metadata)
+
+
+def _extract_pdf(
+    file_path: Path,
+    workers: int | None = None,
+    max_pages_in_flight: int | None = None,
+    on_page: pdf_processor.PageProgress | None = None,
+) -> ExtractionResult:
+    return extract_pdf_pages(file_path, 1, pdf_page_count(file_path), workers, max_pages_in_flight, on_page)
+
+
+def extract_pdf_pages(
+    file_path: Path,
+    first_page: int,
+    last_page: int,
+    workers: int | None = None,
+    max_pages_in_flight: int | None = None,
+    on_page: pdf_processor.PageProgress | None = None,
+) -> ExtractionResult:
+    workers = settings.OCR_WORKERS if workers is None else workers
+    max_pages = max(1, settings.OCR_MAX_PAGES_IN_FLIGHT if max_pages_in_flight is None else max_pages_in_flight)
+    extraction = pdf_processor.extract(
+        file_path,
+        first_page,
+        last_page,
+        ocr_pages=lambda page_numbers: _ocr_pdf_pages(file_path, page_numbers, workers, max_pages),
+        on_page=on_page,
+    )
+    return ExtractionResult(extraction.text, extraction.metadata())
+
+
+def merge_extractions(parts: Sequence[ExtractionResult]) -> ExtractionResult:
+    """Combine per-page-range extraction results, given in page order."""
+    metadata: dict[str, Any] = {"pages": [], "text_layer_pages": [], "ocr_pages": []}
+    for key in ("text_layer_seconds", "ocr_seconds", "estimated_ocr_seconds_saved"):
+        metadata[key] = round(sum(part.metadata.get(key, 0.0) for part in parts), 3)
+    for part in parts:
+        for key in ("pages", "text_layer_pages", "ocr_pages"):
+            metadata[key].extend(part.metadata.get(key, []))
+    text = "\n\n".join(part.text for part in parts if part.text)
+    return ExtractionResult(text, metadata)
+
+
+WindowOcr = Callable[[str, int, int], list[pdf_processor.OcrText]]
+
+
+def _ocr_pdf_pages(
+    file_path: Path,
+    page_numbers: Sequence[int],
+    workers: int,
+    max_pages: int,
+) -> Iterator[pdf_processor.OcrText]:
+    """Yield the OCR result of each page in order, as each window of pages finishes."""
+    ocr_window = _window_ocr()
+    done = 0
+    if workers > 1 and len(page_numbers) > 1:
+        try:
+            for result in _ocr_pdf_parallel(file_path, page_numbers, workers, max_pages, ocr_window):
+                done += 1
+                yield result
+            return
+        except (BrokenProcessPool, OSError, AssertionError):
+            # The pool is unusable here (e.g. inside a daemonic Celery prefork
+            # child) or died mid-document; finish the remaining pages serially.
+            pass
+    for first_page, last_page in _page_windows(page_numbers[done:], max_pages):
+        yield from ocr_window(str(file_path), first_page, last_page)
+
+
+def _window_ocr() -> WindowOcr:
+    if settings.OCR_ADAPTIVE_DPI:
+        return partial(
+            _ocr_pdf_window_adaptive,
+            dpis=tuple(sorted(settings.OCR_DPI_LADDER)),
+            min_confidence=settings.OCR_MIN_CONFIDENCE,
+        )
+    return _ocr_pdf_window_fixed
+
+
+def _ocr_pdf_parallel(
+    file_path: Path,
+    page_numbers: Sequence[int],
+    workers: int,
+    max_pages: int,
+    ocr_window: WindowOcr,
+) -> Iterator[pdf_processor.OcrText]:
+    """OCR page windows across a process pool, yielding page results in order.
+
+    Each worker holds at most one window, so no more than ``max_pages`` pages
+    are rasterized at once.
+    """
+    workers = min(workers, len(page_numbers), max_pages)
+    windows = _page_windows(page_numbers, max_pages // workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(
+            ocr_window,
+            repeat(str(file_path)),
+            [first for first, _ in windows],
+            [last for _, last in windows],
+        )
+        for window in results:
+            yield from window
+
+
+def _page_windows(page_numbers: Sequence[int], size: int) -> list[tuple[int, int]]:
+    """Group ascending page numbers into contiguous ranges of at most ``size`` pages."""
+    windows: list[tuple[int, int]] = []
+    for number in page_numbers:
+        if windows and number == windows[-1][1] + 1 and number - windows[-1][0] < size:
+            windows[-1] = (windows[-1][0], number)
+        else:
+            windows.append((number, number))
+    return windows
+
+
+def _ocr_pdf_window_fixed(file_path: str, first_page: int, last_page: int) -> list[pdf_processor.OcrText]:
+    return [pdf_processor.OcrText(text, dpi=OCR_DPI) for text in _ocr_pdf_window(file_path, first_page, last_page)]
+
+
+def _ocr_pdf_window_adaptive(
+    file_path: str,
+    first_page: int,
+    last_page: int,
+    dpis: Sequence[int],
+    min_confidence: float,
+) -> list[pdf_processor.OcrText]:
+    """OCR pages at the lowest DPI first and re-rasterize only low-confidence pages at the next one.
+
+    Each page keeps its most confident result, so a higher DPI never makes a page worse.
+    """
+    best: dict[int, pdf_processor.OcrText] = {}
+    passes: dict[int, int] = {}
+    pending = list(range(first_page, last_page + 1))
+    for dpi in dpis:
+        for first, last in _page_windows(pending, len(pending)):
+            for number, result in zip(range(first, last + 1), _ocr_rasterized(file_path, first, last, dpi)):
+                passes[number] = passes.get(number, 0) + 1
+                if number not in best or _confidence(result) > _confidence(best[number]):
+                    best[number] = result
+        pending = [number for number in pending if _confidence(best[number]) < min_confidence]
+        if not pending:
+            break
+    return [replace(best[number], passes=passes[number]) for number in range(first_page, last_page + 1)]
+
+
+def _confidence(result: pdf_processor.OcrText) -> float:
+    return result.confidence if result.confidence is not None else -1.0
+
+
+def _ocr_rasterized(file_path: str, first_page: int, last_page: int, dpi: int) -> Iterator[pdf_processor.OcrText]:
+    images = convert_from_path(file_path, dpi=dpi, first_page=first_page, last_page=last_page)
+    while images:
+        image = images.pop(0)
+        try:
+            yield _ocr_image_data(image, dpi)
+        finally:
+            image.close()
+
+
+def _ocr_pdf_window(file_path: str, first_page: int, last_page: int) -> list[str]:
+    # Rasterize only this page range and release each page as soon as it is read.
+    images = convert_from_path(file_path, dpi=OCR_DPI, first_page=first_page, last_page=last_page)
+    chunks: list[str] = []
+    while images:
+        image = images.pop(0)
+        try:
+            chunks.append(_ocr_image(image, source_dpi=OCR_DPI))
+        finally:
+            image.close()
+    return chunks
+
+
+def pdf_page_count(file_path: Path) -> int:
+    return int(pdfinfo_from_path(str(file_path))["Pages"])
+
+
+def page_count(file_path: Path) -> int:
+    if normalize_extension(file_path.suffix) == ".pdf":
+        return pdf_page_count(file_path)
+    return 1
+
+
+def _ocr_image_data(image: Image.Image, dpi: int) -> pdf_processor.OcrText:
+    options = _preprocess_options()
+    prepared = image
+    if options is not None:
+        # The page was rasterized at exactly the DPI under test; don't scale it back down.
+        prepared = image_processor.preprocess(image, replace(options, target_dpi=0), dpi)
+    try:
+        data = _engine().image_to_data(prepared)
+    finally:
+        if prepared is not image:
+            prepared.close()
+    text, confidence = _words_to_text(data)
+    return pdf_processor.OcrText(text, dpi=dpi, confidence=confidence)
+
+
+def _words_to_text(data: dict[str, list]) -> tuple[str, float | None]:
+    """Rebuild page text from Tesseract's word table and average the word confidences."""
+    paragraphs: dict[tuple[int, int], dict[int, list[str]]] = {}
+    confidences: list[float] = []
+    for index, word in enumerate(data["text"]):
+        word = str(word).strip()
+        confidence = float(data["conf"][index])
+        if not word or confidence < 0:
+            continue
+        confidences.append(confidence)
+        paragraph = paragraphs.setdefault((data["block_num"][index], data["par_num"][index]), {})
+        paragraph.setdefault(data["line_num"][index], []).append(word)
+    text = "\n\n".join(
+        "\n".join(" ".join(words) for words in lines.values()) for lines in paragraphs.values()
+    )
+    return text, (sum(confidences) / len(confidences) if confidences else None)
+
+
+def _engine() -> ocr_engine.OcrEngine:
+    return ocr_engine.get_engine(settings.OCR_ENGINE, OCR_LANG)
 
 
-def _extract_pdf_text(file_path: Path) -> str:
-    text_chunks: list[str] = []
-    images = convert_from_path(str(file_path), dpi=300)
-    for image in images:
-        text_chunks.append(pytesseract.image_to_string(image, lang="eng"))
-    return "\n\n".join(chunk.strip() for chunk in text_chunks if chunk.strip())
+def _ocr_image(image: Image.Image, source_dpi: float | None = None) -> str:
+    options = _preprocess_options()
+    if options is None:
+        return _engine().image_to_string(image)
+    prepared = image_processor.preprocess(image, options, source_dpi)
+    try:
+        return _engine().image_to_string(prepared)
+    finally:
+        if prepared is not image:
+            prepared.close()
 
 
 def _extract_image_text(file_path: Path) -> str:
     with Image.open(file_path) as img:
-        return pytesseract.image_to_string(img, lang="eng").strip()
+        return _ocr_image(img).strip()
 
 
 def allowed_file(filename: str, allowed_extensions: Iterable[str] | None = None) -> bool:
@@ -0,0 +1,647 @@
+"""LLM calls: provider adapters plus the pacing, retry and circuit-breaking around them.
+
+One ``LlmClient`` lives per worker process (see ``report_generator``), so the
+provider's HTTP connection pool is reused across summaries and chunk calls.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Protocol
+
+import groq
+import redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# The stub echoes this many trailing words of the prompt, so its "summaries"
+# are short and deterministic, like a real model's.
+STUB_SUMMARY_WORDS = 60
+# Rough English average, used to pace prompts against a tokens-per-minute quota before they are sent.
+CHARS_PER_TOKEN = 4
+
+
+class LlmError(Exception):
+    pass
+
+
+class RetryableLlmError(LlmError):
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitedError(RetryableLlmError):
+    """The provider throttled us (HTTP 429); it is up, so this does not trip the circuit breaker."""
+
+
+class ProviderUnavailableError(RetryableLlmError):
+    """Timeouts, connection failures and 5xx responses."""
+
+
+class CircuitOpenError(LlmError):
+    pass
+
+
+class LlmRequestError(LlmError):
+    """The provider refused the request itself (bad key, 400, 404); retrying won't change the answer."""
+
+
+@dataclass
+class Completion:
+    text: str
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+
+
+class LlmProvider(Protocol):
+    name: str
+    model: str
+
+    def complete(self, prompt: str, **params: Any) -> Completion:
+        """Send one single-message ``prompt``; raise ``RetryableLlmError`` for transient failures."""
+        ...
+
+    def stream(self, prompt: str, **params: Any) -> Iterator[str]:
+        """Like ``complete``, but yield the reply as it is generated, in text deltas."""
+        ...
+
+
+class LlmBackend(Protocol):
+    """What ``report_generator`` calls: a model name and a prompt-in, text-out ``complete``."""
+
+    model: str
+
+    def complete(self, prompt: str, **params: Any) -> str: ...
+
+    def stream(self, prompt: str, **params: Any) -> Iterator[str]: ...
+
+
+class GroqProvider:
+    name = "groq"
+
+    def __init__(self, client: Any, model: str, params: dict[str, Any]):
+        self.client = client
+        self.model = model
+        self.params = params
+
+    def complete(self, prompt: str, **params: Any) -> Completion:
+        with _groq_errors():
+            chat_completion = self._create(prompt, params)
+        usage = getattr(chat_completion, "usage", None)
+        return Completion(
+            chat_completion.choices[0].message.content,
+            getattr(usage, "prompt_tokens", None),
+            getattr(usage, "completion_tokens", None),
+        )
+
+    def stream(self, prompt: str, **params: Any) -> Iterator[str]:
+        with _groq_errors():
+            for chunk in self._create(prompt, {**params, "stream": True}):
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    def _create(self, prompt: str, params: dict[str, Any]) -> Any:
+        return self.client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=self.model,
+            **{**self.params, **params},
+        )
+
+
+@contextmanager
+def _groq_errors() -> Iterator[None]:
+    try:
+        yield
+    except groq.RateLimitError as exc:
+        raise RateLimitedError(str(exc), _retry_after(exc.response.headers)) from exc
+    except (groq.APIConnectionError, groq.InternalServerError) as exc:
+        # APITimeoutError is a subclass of APIConnectionError.
+        raise ProviderUnavailableError(str(exc)) from exc
+    except groq.APIStatusError as exc:
+        raise LlmRequestError(str(exc)) from exc
+
+
+def _retry_after(headers: Any) -> float | None:
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class StubProvider:
+    """Offline provider for tests and benchmarks.
+
+    Sleeps ``latency_seconds`` and echoes the end of the prompt. ``errors``
+    are raised, one per call, before it starts answering, to simulate an
+    unreliable provider.
+    """
+
+    name = "stub"
+    model = "stub"
+
+    def __init__(self, latency_seconds: float = 0.0, errors: Iterable[Exception] = ()):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+        self._errors = list(errors)
+        self._lock = threading.Lock()
+
+    def complete(self, prompt: str, **params: Any) -> Completion:
+        self._next_call()
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        text = self._reply(prompt)
+        return Completion(text, len(prompt) // CHARS_PER_TOKEN, len(text) // CHARS_PER_TOKEN)
+
+    def stream(self, prompt: str, **params: Any) -> Iterator[str]:
+        """Yield the reply word by word, spreading ``latency_seconds`` across the words."""
+        self._next_call()
+        words = self._reply(prompt).split(" ")
+        for index, word in enumerate(words):
+            if self.latency_seconds:
+                time.sleep(self.latency_seconds / len(words))
+            yield word if index == 0 else f" {word}"
+
+    def _next_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+            error = self._errors.pop(0) if self._errors else None
+        if error is not None:
+            raise error
+
+    def _reply(self, prompt: str) -> str:
+        return " ".join(prompt.split()[-STUB_SUMMARY_WORDS:])
+
+
+class RateLimiter(Protocol):
+    def acquire(self, amount: float = 1.0) -> None:
+        """Block until ``amount`` can be spent."""
+        ...
+
+    def charge(self, amount: float) -> None:
+        """Spend ``amount`` without waiting, e.g. tokens only known after a call; later callers wait it off."""
+        ...
+
+
+class TokenBucket:
+    """Thread-safe token bucket for this process.
+
+    Callers reserve tokens up front and sleep off any deficit outside the
+    lock, so concurrent callers queue up in arrival order.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = per_minute / 60
+        self.capacity = capacity or per_minute
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Spend ``amount`` now and return how many seconds the caller must wait before using it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate) - amount
+            self._updated = now
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, amount: float = 1.0) -> None:
+        wait = self.reserve(amount)
+        if wait > 0:
+            self._sleep(wait)
+
+    def charge(self, amount: float) -> None:
+        self.reserve(amount)
+
+
+# Same algorithm as TokenBucket, run atomically in Redis so every worker process shares one quota.
+_RESERVE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local amount = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * rate) - amount
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+if tokens >= 0 then return '0' end
+return tostring(-tokens / rate)
+"""
+
+
+class _RedisFallback:
+    """Tracks whether a Redis-backed limit has fallen back to this process alone.
+
+    An outage is logged once when it starts and once when Redis answers
+    again, rather than on every call in between.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.active = False
+        self._lock = threading.Lock()
+
+    def failed(self, exc: Exception) -> None:
+        with self._lock:
+            started, self.active = not self.active, True
+        if started:
+            logger.warning("LLM limit %s unavailable (%s); enforcing it per process until Redis is back", self.key, exc)
+
+    def recovered(self) -> None:
+        with self._lock:
+            ended, self.active = self.active, False
+        if ended:
+            logger.info("LLM limit %s reachable again; sharing it across workers", self.key)
+
+
+class RedisTokenBucket:
+    """Token bucket shared through Redis; falls back to a per-process bucket while Redis is unreachable."""
+
+    prefix = "llm-quota:"
+
+    def __init__(self, url: str, name: str, per_minute: float, capacity: float | None = None):
+        self.key = f"{self.prefix}{name}"
+        self.rate = per_minute / 60
+        self.capacity = capacity or per_minute
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_RESERVE_SCRIPT)
+        self._fallback = TokenBucket(per_minute, capacity)
+        self.fallback = _RedisFallback(self.key)
+
+    def reserve(self, amount: float) -> float:
+        try:
+            wait = float(self._script(keys=[self.key], args=[self.rate, self.capacity, amount]))
+        except (RedisError, OSError) as exc:
+            self.fallback.failed(exc)
+            return self._fallback.reserve(amount)
+        self.fallback.recovered()
+        return wait
+
+    def acquire(self, amount: float = 1.0) -> None:
+        wait = self.reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+
+    def charge(self, amount: float) -> None:
+        self.reserve(amount)
+
+
+class ConcurrencyLimiter(Protocol):
+    def slot(self) -> AbstractContextManager[None]:
+        """Hold one of the limited call slots for the duration of the ``with`` block."""
+        ...
+
+
+class Semaphore:
+    """Caps the LLM calls in flight in this process."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._semaphore:
+            yield
+
+
+# Holders are members of a sorted set scored by lease expiry, so a worker that dies
+# mid-call frees its slot once the lease runs out instead of leaking it.
+_ACQUIRE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local lease = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= limit then return 0 end
+redis.call('ZADD', KEYS[1], now + lease, ARGV[3])
+redis.call('EXPIRE', KEYS[1], math.ceil(lease) + 60)
+return 1
+"""
+
+
+class RedisSemaphore:
+    """Caps the LLM calls in flight across every worker process; per-process while Redis is unreachable."""
+
+    prefix = "llm-slots:"
+
+    def __init__(self, url: str, name: str, limit: int, lease_seconds: float, poll_seconds: float = 0.1):
+        self.key = f"{self.prefix}{name}"
+        self.limit = limit
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_ACQUIRE_SCRIPT)
+        self._fallback = Semaphore(limit)
+        self.fallback = _RedisFallback(self.key)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        token = uuid.uuid4().hex
+        while True:
+            try:
+                acquired = int(self._script(keys=[self.key], args=[self.limit, self.lease_seconds, token]))
+            except (RedisError, OSError) as exc:
+                self.fallback.failed(exc)
+                with self._fallback.slot():
+                    yield
+                return
+            self.fallback.recovered()
+            if acquired:
+                break
+            time.sleep(self.poll_seconds)
+        try:
+            yield
+        finally:
+            try:
+                self._client.zrem(self.key, token)
+            except (RedisError, OSError) as exc:
+                # The lease frees the slot anyway once it runs out.
+                self.fallback.failed(exc)
+
+
+def build_rate_limiter(backend: str, redis_url: str, name: str, per_minute: float) -> RateLimiter | None:
+    if per_minute <= 0:
+        return None
+    backend = backend.lower()
+    if backend == "memory":
+        return TokenBucket(per_minute)
+    if backend == "redis":
+        return RedisTokenBucket(redis_url, name, per_minute)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+def build_concurrency_limiter(
+    backend: str, redis_url: str, name: str, limit: int, lease_seconds: float
+) -> ConcurrencyLimiter | None:
+    if limit <= 0:
+        return None
+    backend = backend.lower()
+    if backend == "memory":
+        return Semaphore(limit)
+    if backend == "redis":
+        return RedisSemaphore(redis_url, name, limit, lease_seconds)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+class CircuitBreaker:
+    """Fails calls fast after ``failure_threshold`` consecutive provider outages.
+
+    After ``reset_seconds`` one trial call is let through (half-open): success
+    closes the circuit, another failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if self._clock() - self._opened_at >= self.reset_seconds else "open"
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_seconds - (self._clock() - self._opened_at)
+            if remaining > 0 or self._trial_running:
+                raise CircuitOpenError(f"LLM provider unavailable; circuit open for {max(remaining, 0):.0f}s more")
+            self._trial_running = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+
+@dataclass
+class CallMetrics:
+    provider: str
+    model: str
+    outcome: str
+    attempts: int
+    latency_seconds: float
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+
+
+class LlmClient:
+    """Wraps a provider with quota pacing, a cap on calls in flight, jittered retries, a circuit breaker and per-call metrics.
+
+    Thread-safe; map-reduce summarization shares one instance across its threads.
+    """
+
+    def __init__(
+        self,
+        provider: LlmProvider,
+        request_limiter: RateLimiter | None = None,
+        token_limiter: RateLimiter | None = None,
+        breaker: CircuitBreaker | None = None,
+        concurrency: ConcurrencyLimiter | None = None,
+        max_attempts: int = 4,
+        backoff_base_seconds: float = 1.0,
+        backoff_max_seconds: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep,
+        on_call: Callable[[CallMetrics], None] | None = None,
+    ):
+        self.provider = provider
+        self.model = provider.model
+        self.request_limiter = request_limiter
+        self.token_limiter = token_limiter
+        self.breaker = breaker
+        self.concurrency = concurrency
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self._sleep = sleep
+        self._on_call = on_call
+        self._stats = {"calls": 0, "failures": 0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._latency_total = 0.0
+        self._lock = threading.Lock()
+
+    def complete(self, prompt: str, **params: Any) -> str:
+        started = time.perf_counter()
+        attempts = 0
+        try:
+            while True:
+                attempts += 1
+                self._before_attempt(prompt)
+                try:
+                    with self._slot():
+                        completion = self.provider.complete(prompt, **params)
+                except Exception as exc:
+                    self._attempt_failed(exc, attempts, can_retry=True)
+                    continue
+                if self.breaker:
+                    self.breaker.record_success()
+                break
+        except Exception:
+            self._record(CallMetrics(self.provider.name, self.model, "error", attempts, time.perf_counter() - started))
+            raise
+        self._finish(started, attempts, completion.prompt_tokens, completion.completion_tokens)
+        return completion.text
+
+    def stream(self, prompt: str, **params: Any) -> Iterator[str]:
+        """Yield the reply as text deltas.
+
+        Failures before the first delta are retried like ``complete``; once
+        text has been yielded a failure is raised, since it can't be taken back.
+        """
+        started = time.perf_counter()
+        attempts = 0
+        chars = 0
+        # True while an attempt has passed the breaker but its outcome is not recorded yet.
+        unsettled = False
+        try:
+            while True:
+                attempts += 1
+                self._before_attempt(prompt)
+                unsettled = True
+                try:
+                    with self._slot():
+                        for delta in self.provider.stream(prompt, **params):
+                            chars += len(delta)
+                            yield delta
+                except Exception as exc:
+                    unsettled = False
+                    self._attempt_failed(exc, attempts, can_retry=chars == 0)
+                    continue
+                unsettled = False
+                if self.breaker:
+                    self.breaker.record_success()
+                break
+        except Exception:
+            self._record(CallMetrics(self.provider.name, self.model, "error", attempts, time.perf_counter() - started))
+            raise
+        finally:
+            if unsettled:
+                # Abandoned mid-reply (closed early, or the consumer raised): count it as a
+                # failure so a half-open trial is released rather than blocking every later call.
+                if self.breaker:
+                    self.breaker.record_failure()
+                self._record(
+                    CallMetrics(self.provider.name, self.model, "abandoned", attempts, time.perf_counter() - started)
+                )
+        # Streams don't report usage reliably across providers; estimate it.
+        self._finish(started, attempts, math.ceil(len(prompt) / CHARS_PER_TOKEN), math.ceil(chars / CHARS_PER_TOKEN))
+
+    def _before_attempt(self, prompt: str) -> None:
+        if self.breaker:
+            self.breaker.before_call()
+        self._pace(prompt)
+
+    def _slot(self) -> AbstractContextManager[None]:
+        # Held per attempt, not across backoff sleeps, so waiting retries don't block other calls.
+        return self.concurrency.slot() if self.concurrency else nullcontext()
+
+    def _attempt_failed(self, exc: Exception, attempts: int, can_retry: bool) -> None:
+        """Update the breaker, then re-raise ``exc`` or sleep before the next attempt."""
+        if not isinstance(exc, RetryableLlmError):
+            # The provider answered but rejected the request; it is not down.
+            if self.breaker:
+                self.breaker.record_success()
+            raise exc
+        if self.breaker:
+            if isinstance(exc, ProviderUnavailableError):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        if not can_retry or attempts >= self.max_attempts:
+            raise exc
+        self._sleep(self._backoff(attempts, exc.retry_after))
+
+    def _finish(self, started: float, attempts: int, prompt_tokens: int | None, completion_tokens: int | None) -> None:
+        if self.token_limiter and completion_tokens:
+            self.token_limiter.charge(completion_tokens)
+        self._record(
+            CallMetrics(
+                self.provider.name,
+                self.model,
+                "ok",
+                attempts,
+                time.perf_counter() - started,
+                prompt_tokens,
+                completion_tokens,
+            )
+        )
+
+    def _pace(self, prompt: str) -> None:
+        if self.request_limiter:
+            self.request_limiter.acquire(1)
+        if self.token_limiter:
+            self.token_limiter.acquire(math.ceil(len(prompt) / CHARS_PER_TOKEN))
+
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        # Full jitter keeps workers that failed together from retrying together.
+        delay = random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** (attempt - 1)))
+        return max(delay, retry_after or 0.0)
+
+    def _record(self, metrics: CallMetrics) -> None:
+        logger.info(
+            "LLM call provider=%s model=%s outcome=%s attempts=%d latency=%.3fs prompt_tokens=%s completion_tokens=%s",
+            metrics.provider,
+            metrics.model,
+            metrics.outcome,
+            metrics.attempts,
+            metrics.latency_seconds,
+            metrics.prompt_tokens,
+            metrics.completion_tokens,
+        )
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["failures"] += metrics.outcome != "ok"
+            self._stats["retries"] += metrics.attempts - 1
+            self._stats["prompt_tokens"] += metrics.prompt_tokens or 0
+            self._stats["completion_tokens"] += metrics.completion_tokens or 0
+            self._latency_total += metrics.latency_seconds
+        if self._on_call:
+            self._on_call(metrics)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            calls = self._stats["calls"]
+            return {
+                **self._stats,
+                "mean_latency_seconds": round(self._latency_total / calls, 3) if calls else 0.0,
+                "circuit": self.breaker.state if self.breaker else "closed",
+                # Shared limits currently enforced per process because Redis is unreachable.
+                "limits_falling_back": [
+                    limiter.fallback.key
+                    for limiter in (self.request_limiter, self.token_limiter, self.concurrency)
+                    if getattr(limiter, "fallback", None) and limiter.fallback.active
+                ],
+            }
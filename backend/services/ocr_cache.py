@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any
+
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with file_path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(DIGEST_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OcrCache:
+    """On-disk cache of extraction results keyed by file digest and OCR settings.
+
+    Entries are JSON files under ``root``. A hit refreshes the entry's mtime,
+    and once the store grows past ``max_bytes`` the least recently used
+    entries are deleted. Each instance also keeps its hit and miss counts in
+    ``root/counters``, so ``stats`` adds up every worker sharing the directory.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._counter_path = root / "counters" / f"{uuid.uuid4().hex}.counts"
+
+    @staticmethod
+    def key(digest: str, **ocr_settings: Any) -> str:
+        material = json.dumps({"digest": digest, **ocr_settings}, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        path = self._path(key)
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+        self._count("hits")
+        return payload
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            counts = json.dumps({"hits": self.hits, "misses": self.misses})
+            try:
+                self._counter_path.parent.mkdir(parents=True, exist_ok=True)
+                temporary = self._counter_path.with_suffix(".tmp")
+                temporary.write_text(counts, encoding="utf-8")
+                os.replace(temporary, self._counter_path)
+            except OSError:
+                pass  # The counts are diagnostics; a lookup never fails over them.
+
+    def put(self, key: str, payload: dict[str, Any]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(f".{os.getpid()}.tmp")
+        temporary.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(temporary, path)
+        self._evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+    def stats(self) -> dict[str, int]:
+        """Hits and misses of every cache instance sharing ``root``, plus the store's size."""
+        totals = {"hits": 0, "misses": 0}
+        for path in self.root.glob("counters/*.counts"):
+            try:
+                counts = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            for outcome in totals:
+                totals[outcome] += counts.get(outcome, 0)
+        entries = self._entries()
+        return {**totals, "entries": len(entries), "bytes": sum(size for _, size, _ in entries)}
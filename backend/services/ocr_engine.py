@@ -0,0 +1,118 @@
+"""Tesseract backends behind one interface.
+
+``pytesseract`` shells out to the ``tesseract`` binary for every image, which
+reloads the language model each time. ``tesserocr`` binds libtesseract
+directly, so one initialised API handle is reused for every page a worker
+process reads. It is optional (it compiles against the system libtesseract):
+``pip install tesserocr``.
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+from typing import Any, Protocol
+
+import pytesseract
+from PIL import Image
+
+WordData = dict[str, list[Any]]
+
+_engines: dict[tuple[str, str], OcrEngine] = {}
+_engines_pid: int | None = None
+
+
+class OcrEngine(Protocol):
+    name: str
+
+    def image_to_string(self, image: Image.Image) -> str: ...
+
+    def image_to_data(self, image: Image.Image) -> WordData:
+        """Word table in pytesseract's ``Output.DICT`` shape (text, conf, block/par/line numbers)."""
+        ...
+
+
+class PytesseractEngine:
+    name = "pytesseract"
+
+    def __init__(self, lang: str):
+        self.lang = lang
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(image, lang=self.lang)
+
+    def image_to_data(self, image: Image.Image) -> WordData:
+        return pytesseract.image_to_data(image, lang=self.lang, output_type=pytesseract.Output.DICT)
+
+
+class TesserocrEngine:
+    """Keeps one warm libtesseract handle; calls are serialised because the handle is not thread-safe."""
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self._api = tesserocr.PyTessBaseAPI(lang=lang)
+        self._lock = threading.Lock()
+        atexit.register(self._api.End)
+
+    def image_to_string(self, image: Image.Image) -> str:
+        with self._lock:
+            self._api.SetImage(image)
+            return self._api.GetUTF8Text()
+
+    def image_to_data(self, image: Image.Image) -> WordData:
+        level = self._tesserocr.RIL
+        data: WordData = {"text": [], "conf": [], "block_num": [], "par_num": [], "line_num": []}
+        with self._lock:
+            self._api.SetImage(image)
+            self._api.Recognize()
+            iterator = self._api.GetIterator()
+            if iterator is None:
+                return data
+            block = paragraph = line = 0
+            for word in self._tesserocr.iterate_level(iterator, level.WORD):
+                if word.IsAtBeginningOf(level.BLOCK):
+                    block, paragraph = block + 1, 0
+                if word.IsAtBeginningOf(level.PARA):
+                    paragraph, line = paragraph + 1, 0
+                if word.IsAtBeginningOf(level.TEXTLINE):
+                    line += 1
+                data["text"].append(word.GetUTF8Text(level.WORD) or "")
+                data["conf"].append(word.Confidence(level.WORD))
+                data["block_num"].append(block)
+                data["par_num"].append(paragraph)
+                data["line_num"].append(line)
+        return data
+
+
+def _create(name: str, lang: str) -> OcrEngine:
+    if name == "pytesseract":
+        return PytesseractEngine(lang)
+    if name == "tesserocr":
+        return TesserocrEngine(lang)
+    if name == "auto":
+        try:
+            return TesserocrEngine(lang)
+        except (ImportError, RuntimeError):
+            return PytesseractEngine(lang)
+    raise ValueError(f"Unknown OCR engine: {name}")
+
+
+def get_engine(name: str, lang: str) -> OcrEngine:
+    """Return this process's engine, creating (and warming) it on first use.
+
+    Engines are never shared across ``fork``: a child that inherits the
+    parent's cache starts a fresh one instead of reusing a native handle.
+    """
+    global _engines_pid
+    if _engines_pid != os.getpid():
+        _engines.clear()
+        _engines_pid = os.getpid()
+    key = (name.lower(), lang)
+    engine = _engines.get(key)
+    if engine is None:
+        engine = _engines[key] = _create(key[0], lang)
+    return engine
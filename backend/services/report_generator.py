@@ -1,45 +1,239 @@
 from __future__ import annotations
 
 import os
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable
 
 from groq import Groq
 
+from backend.config import settings
+from backend.services import llm, summary_cache
 from backend.utils.formatters import truncate_text
 
 DEFAULT_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-70b-versatile")
+# Bump whenever the prompt wording changes so cached summaries are not reused.
+PROMPT_VERSION = "3"
+GENERATION_PARAMS = {"temperature": 0.3, "max_tokens": 2000}
+# Chunk notes feed the reduce call, so they are kept much shorter than a full report.
+MAP_PARAMS = {"temperature": 0.2, "max_tokens": 600}
+MAX_PROMPT_CHARS = 15_000
+# Coarsest first: page breaks, paragraphs/sections, lines, words.
+CHUNK_SEPARATORS = ("\f", "\n\n", "\n", " ")
+# If chunk notes still don't fit one reduce prompt, they are condensed again, at most this many times.
+MAX_REDUCE_ROUNDS = 3
+
+_summary_cache: summary_cache.SummaryCacheBackend | None = None
+_summary_cache_ready = False
+_llm_client: llm.LlmClient | None = None
+_llm_client_pid: int | None = None
 
 
 def _client() -> Groq | None:
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
         return None
-    return Groq(api_key=api_key)
+    # Retries are LlmClient's job, so they can be paced and circuit-broken.
+    return Groq(api_key=api_key, max_retries=0, timeout=settings.LLM_TIMEOUT_SECONDS)
+
+
+def _provider() -> llm.LlmProvider | None:
+    if settings.LLM_BACKEND == "stub":
+        return llm.StubProvider(settings.LLM_STUB_LATENCY_SECONDS)
+    client = _client()
+    if client is None:
+        return None
+    return llm.GroqProvider(client, DEFAULT_MODEL, GENERATION_PARAMS)
+
+
+def get_llm_backend() -> llm.LlmClient | None:
+    """Return this worker process's long-lived LLM client, or ``None`` without credentials.
+
+    Reusing it keeps the provider's HTTP connections (and TLS sessions) warm,
+    and keeps circuit-breaker state across summaries. It is rebuilt after a
+    fork rather than sharing the parent's sockets.
+    """
+    global _llm_client, _llm_client_pid
+    if _llm_client is not None and _llm_client_pid == os.getpid():
+        return _llm_client
+    provider = _provider()
+    if provider is None:
+        return None
+    limiter = partial(llm.build_rate_limiter, settings.LLM_RATE_LIMIT_BACKEND, settings.REDIS_URL)
+    _llm_client = llm.LlmClient(
+        provider,
+        request_limiter=limiter(f"{provider.name}:requests", settings.LLM_REQUESTS_PER_MINUTE),
+        token_limiter=limiter(f"{provider.name}:tokens", settings.LLM_TOKENS_PER_MINUTE),
+        breaker=llm.CircuitBreaker(settings.LLM_CIRCUIT_FAILURES, settings.LLM_CIRCUIT_RESET_SECONDS),
+        concurrency=llm.build_concurrency_limiter(
+            settings.LLM_RATE_LIMIT_BACKEND,
+            settings.REDIS_URL,
+            f"{provider.name}:calls",
+            settings.LLM_MAX_CONCURRENT_CALLS,
+            settings.LLM_CALL_LEASE_SECONDS,
+        ),
+        max_attempts=settings.LLM_MAX_ATTEMPTS,
+        backoff_base_seconds=settings.LLM_RETRY_BASE_SECONDS,
+        backoff_max_seconds=settings.LLM_RETRY_MAX_SECONDS,
+    )
+    _llm_client_pid = os.getpid()
+    return _llm_client
+
+
+def llm_stats() -> dict | None:
+    return _llm_client.stats() if _llm_client is not None else None
+
+
+def get_summary_cache() -> summary_cache.SummaryCacheBackend | None:
+    global _summary_cache, _summary_cache_ready
+    if not _summary_cache_ready:
+        _summary_cache = summary_cache.build_backend(
+            settings.SUMMARY_CACHE_BACKEND,
+            max_entries=settings.SUMMARY_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.SUMMARY_CACHE_TTL_SECONDS,
+            path=Path(settings.SUMMARY_CACHE_PATH),
+            redis_url=settings.REDIS_URL,
+        )
+        _summary_cache_ready = True
+    return _summary_cache
 
 
 def build_prompt(raw_text: str) -> str:
-    trimmed = truncate_text(raw_text, 15_000)
+    trimmed = truncate_text(raw_text, MAX_PROMPT_CHARS)
     return (
         "You are an expert medical-legal reporter. Generate a professional,\n"
         "structured medical report from this raw OCR text. Use clear sections\n"
         "(Patient Info, History, Examination, Diagnosis, Plan) and keep it concise.\n\n"
-        f"Raw text (captured {datetime.utcnow().isoformat()} UTC):\n{trimmed}"
+        f"Raw text:\n{trimmed}"
     )
 
 
-def generate_summary(raw_text: str) -> str:
-    client = _client()
-    if client is None:
+def build_chunk_prompt(chunk: str, index: int, total: int) -> str:
+    return (
+        f"You are an expert medical-legal reporter. Below is part {index} of {total} of the raw\n"
+        "OCR text of one patient's records. List every clinically or legally relevant fact\n"
+        "it contains (identifiers, dates, history, findings, diagnoses, treatment, plan) as\n"
+        "terse bullet points. Do not add anything that is not in the text.\n\n"
+        f"Raw text:\n{chunk}"
+    )
+
+
+def build_reduce_prompt(notes: str) -> str:
+    return (
+        "You are an expert medical-legal reporter. Generate a professional,\n"
+        "structured medical report from these notes, taken in order from consecutive\n"
+        "parts of one patient's records. Use clear sections (Patient Info, History,\n"
+        "Examination, Diagnosis, Plan), merge duplicates and keep it concise.\n\n"
+        f"Notes:\n{notes}"
+    )
+
+
+def split_text(text: str, max_chars: int) -> list[str]:
+    """Split ``text`` into chunks of at most ``max_chars``, breaking at the coarsest boundary that fits."""
+    return [chunk for chunk in _split(text.strip(), max_chars, CHUNK_SEPARATORS) if chunk.strip()]
+
+
+def _split(text: str, max_chars: int, separators: tuple[str, ...]) -> list[str]:
+    if len(text) <= max_chars:
+        return [text]
+    if not separators:
+        return [text[start:start + max_chars] for start in range(0, len(text), max_chars)]
+    separator, finer = separators[0], separators[1:]
+    chunks: list[str] = []
+    current = ""
+    for piece in text.split(separator):
+        if len(piece) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(_split(piece, max_chars, finer))
+            continue
+        candidate = f"{current}{separator}{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+PartialSummary = Callable[[str], None]
+
+
+def summarize(
+    raw_text: str,
+    backend: llm.LlmBackend,
+    chunk_chars: int | None = None,
+    concurrency: int | None = None,
+    on_partial: PartialSummary | None = None,
+) -> str:
+    """Summarize ``raw_text`` in one call, or map-reduce it when it is longer than ``chunk_chars``.
+
+    Chunks are summarized concurrently (at most ``concurrency`` calls in
+    flight) and their notes are merged, in document order, by a final call.
+    With ``on_partial``, that final call is streamed and ``on_partial`` gets
+    the summary so far every ``SUMMARY_STREAM_FLUSH_CHARS`` characters.
+    """
+    chunk_chars = chunk_chars or settings.SUMMARY_CHUNK_CHARS
+    concurrency = max(1, concurrency or settings.SUMMARY_MAP_CONCURRENCY)
+    if len(raw_text) <= chunk_chars:
+        return _final_call(backend, build_prompt(raw_text), on_partial)
+
+    notes = raw_text
+    for _ in range(MAX_REDUCE_ROUNDS):
+        chunks = split_text(notes, chunk_chars)
+        prompts = [build_chunk_prompt(chunk, index, len(chunks)) for index, chunk in enumerate(chunks, start=1)]
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(prompts))) as pool:
+            notes = "\n\n".join(pool.map(lambda prompt: backend.complete(prompt, **MAP_PARAMS), prompts))
+        if len(notes) <= chunk_chars:
+            break
+    return _final_call(backend, build_reduce_prompt(truncate_text(notes, MAX_PROMPT_CHARS)), on_partial)
+
+
+def _final_call(backend: llm.LlmBackend, prompt: str, on_partial: PartialSummary | None) -> str:
+    flush_chars = settings.SUMMARY_STREAM_FLUSH_CHARS
+    if on_partial is None or flush_chars <= 0:
+        return backend.complete(prompt)
+    parts: list[str] = []
+    size = flushed = 0
+    for delta in backend.stream(prompt):
+        parts.append(delta)
+        size += len(delta)
+        if size - flushed >= flush_chars:
+            on_partial("".join(parts))
+            flushed = size
+    return "".join(parts)
+
+
+def generate_summary(raw_text: str, on_partial: PartialSummary | None = None) -> str:
+    """Return the report summary, from the cache when possible.
+
+    ``on_partial`` is called with the growing summary while a fresh one is
+    generated; it is not called for cache hits.
+    """
+    backend = get_llm_backend()
+    cache = get_summary_cache()
+    key = summary_cache.summary_key(
+        raw_text,
+        backend.model if backend else DEFAULT_MODEL,
+        PROMPT_VERSION,
+        chunk_chars=settings.SUMMARY_CHUNK_CHARS,
+        **GENERATION_PARAMS,
+    )
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    if backend is None:
         return "AI summary unavailable: GROQ_API_KEY not configured."
 
-    try:
-        prompt = build_prompt(raw_text)
-        chat_completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model=DEFAULT_MODEL,
-            temperature=0.3,
-            max_tokens=2000,
-        )
-        return chat_completion.choices[0].message.content
-    except Exception as exc:  # pragma: no cover - network call best-effort
-        return f"AI summary failed: {exc}"
+    # LlmError propagates: the pipeline stage retries with backoff instead of
+    # saving the error text as the report's summary.
+    summary = summarize(raw_text, backend, on_partial=on_partial)
+    if cache is not None and summary:
+        cache.set(key, summary)
+    return summary
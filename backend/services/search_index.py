@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import html
+import re
+from dataclasses import dataclass
+
+from sqlalchemy import bindparam, delete, insert, select, text
+from sqlalchemy.orm import Session
+
+from backend.models import (
+    SEARCH_CONTENT_VIEW, SEARCH_FTS_TABLE, SEARCH_TABLE, Report, ReportBlob, decode_blob, search_rows,
+)
+
+# The engines wrap matches in these; they can't occur in extracted text, so the
+# snippet can be HTML-escaped before they are turned into <mark> tags.
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+SNIPPET_TOKENS = 24
+
+# bm25 column weights on SQLite: title, summary, body; the owner column only scopes.
+_SQLITE_WEIGHTS = "10.0, 4.0, 1.0, 0.0"
+_HEADLINE_OPTIONS = (
+    f"StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords={SNIPPET_TOKENS}, MinWords=8, "
+    'MaxFragments=2, FragmentDelimiter=" … "'
+)
+
+
+@dataclass
+class SearchHit:
+    report_id: int
+    title: str
+    score: float
+    highlight: str
+
+
+def search_terms(query: str) -> list[str]:
+    """Words of a user query; every term must match. Operators and quotes are ignored."""
+    return re.findall(r"[^\W_]+", query.lower())
+
+
+def _fts5_match(owner_id: int, terms: list[str]) -> str:
+    # The owner id is an indexed token, so the column filter narrows the match
+    # inside the index instead of ranking every owner's hits first.
+    # Terms are confined to the text columns so a number can't match the owner id.
+    phrases = " ".join(f'"{term}"' for term in terms)
+    return f'owner_id : "{owner_id}" AND {{title summary body}} : ({phrases})'
+
+
+def highlight_html(snippet: str) -> str:
+    escaped = html.escape(snippet or "", quote=False)
+    return escaped.replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def _dialect(session: Session) -> str:
+    return session.get_bind().dialect.name
+
+
+def index_report(session: Session, report: Report) -> None:
+    """Insert or replace ``report`` in the index; the caller commits."""
+    # The index reads the text back from report_blobs, so pending blobs must be written first.
+    session.flush()
+    row = {
+        "report_id": report.id,
+        "owner_id": report.owner_id,
+        "title": report.title or "",
+        "summary_digest": report.ai_summary_digest,
+        "raw_text_digest": report.raw_text_digest,
+    }
+    if _dialect(session) == "sqlite":
+        # FTS5 has no upsert; the delete and insert land in the same transaction.
+        remove_report(session, report.id)
+        session.execute(insert(search_rows).values(**row))
+        session.execute(
+            text(
+                f"INSERT INTO {SEARCH_FTS_TABLE} (rowid, title, summary, body, owner_id) "
+                f"SELECT report_id, title, summary, body, owner_id FROM {SEARCH_CONTENT_VIEW} "
+                "WHERE report_id = :report_id"
+            ),
+            {"report_id": report.id},
+        )
+    else:
+        session.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} (report_id, owner_id, title, summary_digest, raw_text_digest, document) "
+                "VALUES (:report_id, :owner_id, :title, :summary_digest, :raw_text_digest, "
+                "setweight(to_tsvector('english', :title), 'A') || "
+                "setweight(to_tsvector('english', :summary), 'B') || "
+                "setweight(to_tsvector('english', :body), 'C')) "
+                "ON CONFLICT (report_id) DO UPDATE SET owner_id = excluded.owner_id, title = excluded.title, "
+                "summary_digest = excluded.summary_digest, raw_text_digest = excluded.raw_text_digest, "
+                "document = excluded.document"
+            ),
+            {**row, "summary": report.ai_summary or "", "body": report.raw_text or ""},
+        )
+
+
+def remove_report(session: Session, report_id: int) -> None:
+    if _dialect(session) == "sqlite":
+        # An external-content FTS5 table forgets a row only when handed the values it
+        # indexed; the content view rebuilds them from the recorded digests.
+        session.execute(
+            text(
+                f"INSERT INTO {SEARCH_FTS_TABLE} ({SEARCH_FTS_TABLE}, rowid, title, summary, body, owner_id) "
+                f"SELECT 'delete', report_id, title, summary, body, owner_id FROM {SEARCH_CONTENT_VIEW} "
+                "WHERE report_id = :report_id"
+            ),
+            {"report_id": report_id},
+        )
+    session.execute(delete(search_rows).where(search_rows.c.report_id == report_id))
+
+
+def search(session: Session, owner_id: int, query: str, limit: int, offset: int = 0) -> list[SearchHit]:
+    """Best-ranked reports of ``owner_id`` matching every term of ``query``."""
+    terms = search_terms(query)
+    if not terms:
+        return []
+    if _dialect(session) == "sqlite":
+        return _search_fts5(session, _fts5_match(owner_id, terms), limit, offset)
+    return _search_tsvector(session, owner_id, " ".join(terms), limit, offset)
+
+
+def _search_tsvector(session: Session, owner_id: int, terms: str, limit: int, offset: int) -> list[SearchHit]:
+    ranked = session.execute(
+        text(
+            "SELECT report_id, title, summary_digest, raw_text_digest, ts_rank_cd(document, query) AS score "
+            f"FROM {SEARCH_TABLE}, plainto_tsquery('english', :terms) AS query "
+            "WHERE owner_id = :owner_id AND document @@ query "
+            "ORDER BY score DESC, report_id DESC LIMIT :limit OFFSET :offset"
+        ),
+        {"owner_id": owner_id, "terms": terms, "limit": limit, "offset": offset},
+    ).all()
+    if not ranked:
+        return []
+    # Only the tsvector is stored, so ts_headline gets the page's text from report_blobs.
+    digests = {row.summary_digest for row in ranked} | {row.raw_text_digest for row in ranked}
+    blobs = session.execute(
+        select(ReportBlob.digest, ReportBlob.encoding, ReportBlob.data).where(ReportBlob.digest.in_(digests - {None}))
+    )
+    texts = {blob.digest: decode_blob(blob.encoding, blob.data) for blob in blobs}
+    documents = [f"{texts.get(row.summary_digest, '')} {texts.get(row.raw_text_digest, '')}" for row in ranked]
+    headlines = session.scalars(
+        text(
+            "SELECT ts_headline('english', document, plainto_tsquery('english', :terms), :options) "
+            "FROM unnest(CAST(:documents AS TEXT[])) WITH ORDINALITY AS page (document, position) "
+            "ORDER BY position"
+        ),
+        {"terms": terms, "options": _HEADLINE_OPTIONS, "documents": documents},
+    ).all()
+    return [
+        SearchHit(row.report_id, row.title, float(row.score), highlight_html(headline))
+        for row, headline in zip(ranked, headlines)
+    ]
+
+
+def _search_fts5(session: Session, match: str, limit: int, offset: int) -> list[SearchHit]:
+    # Ranking needs only the index; snippets decompress text through the content view,
+    # so they are built for the page's rows alone.
+    ranked = session.execute(
+        text(
+            f"SELECT {SEARCH_FTS_TABLE}.rowid AS report_id, {SEARCH_TABLE}.title AS title, "
+            f"-bm25({SEARCH_FTS_TABLE}, {_SQLITE_WEIGHTS}) AS score FROM {SEARCH_FTS_TABLE} "
+            f"JOIN {SEARCH_TABLE} ON {SEARCH_TABLE}.report_id = {SEARCH_FTS_TABLE}.rowid "
+            f"WHERE {SEARCH_FTS_TABLE} MATCH :match "
+            f"ORDER BY score DESC, {SEARCH_FTS_TABLE}.rowid DESC LIMIT :limit OFFSET :offset"
+        ),
+        {"match": match, "limit": limit, "offset": offset},
+    ).all()
+    if not ranked:
+        return []
+    snippets = dict(
+        session.execute(
+            text(
+                f"SELECT rowid, snippet({SEARCH_FTS_TABLE}, -1, :start, :end, ' … ', {SNIPPET_TOKENS}) "
+                f"FROM {SEARCH_FTS_TABLE} WHERE {SEARCH_FTS_TABLE} MATCH :match AND rowid IN :ids"
+            ).bindparams(bindparam("ids", expanding=True)),
+            {"match": match, "start": _MARK_START, "end": _MARK_END, "ids": [row.report_id for row in ranked]},
+        ).all()
+    )
+    return [
+        SearchHit(row.report_id, row.title, float(row.score), highlight_html(snippets.get(row.report_id, "")))
+        for row in ranked
+    ]
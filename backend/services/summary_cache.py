@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Protocol
+
+import redis
+
+from backend.utils.cache import TTLCache
+
+
+class SummaryCacheBackend(Protocol):
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+
+def normalize_text(raw_text: str) -> str:
+    # OCR output differs run to run only in whitespace; collapse it so those hit too.
+    return " ".join(raw_text.split())
+
+
+def summary_key(raw_text: str, model: str, prompt_version: str, **params: Any) -> str:
+    material = json.dumps(
+        {"text": normalize_text(raw_text), "model": model, "prompt_version": prompt_version, "params": params},
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class MemorySummaryBackend:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._cache: TTLCache[str] = TTLCache(max_entries, ttl_seconds)
+
+    def get(self, key: str) -> str | None:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        self._cache.set(key, value)
+
+
+class SQLiteSummaryBackend:
+    """File-backed cache shared by every worker process on one host."""
+
+    def __init__(self, path: Path, max_entries: int, ttl_seconds: float, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_summaries_accessed_at ON summaries (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=5)
+
+    def get(self, key: str) -> str | None:
+        now = self._clock()
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute("SELECT value, expires_at FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                connection.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                return None
+            connection.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = self._clock()
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO summaries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now),
+            )
+            connection.execute("DELETE FROM summaries WHERE expires_at <= ?", (now,))
+            connection.execute(
+                "DELETE FROM summaries WHERE key IN "
+                "(SELECT key FROM summaries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+class RedisSummaryBackend:
+    """Cache shared across hosts. Entries expire through Redis TTLs; size-based
+    eviction is delegated to the server's ``allkeys-lru`` maxmemory policy."""
+
+    prefix = "summary:"
+
+    def __init__(self, url: str, ttl_seconds: float):
+        self._client = redis.Redis.from_url(url)
+        self.ttl_seconds = int(ttl_seconds)
+
+    def get(self, key: str) -> str | None:
+        value = self._client.get(self.prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key: str, value: str) -> None:
+        self._client.set(self.prefix + key, value, ex=self.ttl_seconds)
+
+
+def build_backend(name: str, *, max_entries: int, ttl_seconds: float, path: Path, redis_url: str):
+    name = name.lower()
+    if name == "memory":
+        return MemorySummaryBackend(max_entries, ttl_seconds)
+    if name == "sqlite":
+        return SQLiteSummaryBackend(path, max_entries, ttl_seconds)
+    if name == "redis":
+        return RedisSummaryBackend(redis_url, ttl_seconds)
+    if name in ("", "none", "off"):
+        return None
+    raise ValueError(f"Unknown summary cache backend: {name}")
@@ -1,5 +1,6 @@
 from fastapi import HTTPException, status
 
+from backend.config import settings
 from backend.services.file_processor import DEFAULT_ALLOWED_EXTENSIONS, allowed_file
 
 
@@ -7,5 +8,41 @@ def validate_upload(filename: str) -> None:
     if not allowed_file(filename, DEFAULT_ALLOWED_EXTENSIONS):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Unsupported file type. Please upload a PDF or image.",
+            detail="Unsupported file type. Please upload a PDF, image, DICOM, Word (.docx) or Excel (.xlsx) file.",
+        )
+
+
+def upload_too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. The limit is {max_bytes} bytes.",
+    )
+
+
+def validate_upload_size(size: int | None, max_bytes: int | None = None) -> None:
+    max_bytes = settings.MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    if size is not None and max_bytes and size > max_bytes:
+        raise upload_too_large(max_bytes)
+
+
+# Multipart framing around each file: boundary line and part headers.
+MULTIPART_PART_OVERHEAD_BYTES = 16 * 1024
+
+
+def upload_body_limit(max_files: int, max_bytes: int | None = None) -> int | None:
+    """Largest acceptable request body for ``max_files`` files of at most ``max_bytes`` each."""
+    max_bytes = settings.MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    if not max_bytes or not max_files:
+        return None
+    return max_files * (max_bytes + MULTIPART_PART_OVERHEAD_BYTES)
+
+
+def validate_batch_size(count: int, max_files: int | None = None) -> None:
+    max_files = settings.MAX_BATCH_FILES if max_files is None else max_files
+    if count == 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No files uploaded.")
+    if max_files and count > max_files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many files. A batch may contain at most {max_files}.",
         )
@@ -1 +1,8 @@
-from .report_tasks import process_report  # noqa: F401
+from .report_tasks import (  # noqa: F401
+    merge_ocr_pages,
+    ocr_page_range,
+    ocr_report,
+    process_report,
+    render_report,
+    summarize_report,
+)
@@ -1,47 +1,287 @@
 from __future__ import annotations
 
+import inspect
+import json
+import logging
+import zipfile
 from pathlib import Path
 
+from celery import Task, chain, chord
+from pdf2image.exceptions import PDFPageCountError, PDFSyntaxError
+from PIL import UnidentifiedImageError
+from pydicom.errors import InvalidDicomError
+
 from backend.celery_app import celery_app
+from backend.config import settings
 from backend.database import SessionLocal
-from backend.models import Report
-from backend.services import export_service, file_processor, report_generator
+from backend.models import SUMMARY_PREVIEW_CHARS, Report
+from backend.services import event_bus, export_service, file_processor, llm, report_generator, search_index
+from backend.utils.validators import normalize_extension
+
+# Each stage records itself in ``Report.completed_stage`` once its output is
+# persisted, so re-running the pipeline skips straight to the first unfinished stage.
+STAGES = ("ocr", "summary", "render")
+
+logger = logging.getLogger(__name__)
+
+# Retrying can't fix these: the upload is unreadable, or the provider refused the request.
+PERMANENT_ERRORS = (
+    FileNotFoundError,
+    PDFPageCountError,
+    PDFSyntaxError,
+    UnidentifiedImageError,
+    InvalidDicomError,
+    zipfile.BadZipFile,
+    llm.LlmRequestError,
+)
+
+
+class PipelineStage(Task):
+    autoretry_for = (Exception,)
+    dont_autoretry_for = PERMANENT_ERRORS
+    max_retries = settings.PIPELINE_MAX_RETRIES
+    retry_backoff = True
+    retry_jitter = True
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        # Runs once retries are exhausted; completed stages stay intact for a later resume.
+        # The upload is kept too: OCR is the stage most likely to fail, and a resume
+        # needs the file. Only a finished OCR stage deletes it.
+        call = inspect.signature(self.run).bind_partial(*args, **kwargs).arguments
+        report_id = call.get("report_id")
+        db = SessionLocal()
+        try:
+            report = _load(db, report_id)
+            if report:
+                report.status = "failed"
+                if not _stage_done(report, "summary"):
+                    report.ai_summary = f"Processing failed: {exc}"[:1000]
+                    report.summary_partial = None
+                db.commit()
+                event_bus.publish_status(report_id, "failed", detail=str(exc)[:200])
+        finally:
+            db.close()
+
+
+def _stage_done(report: Report, stage: str) -> bool:
+    if report.completed_stage is None:
+        return False
+    return STAGES.index(report.completed_stage) >= STAGES.index(stage)
+
+
+def _load(db, report_id: int) -> Report | None:
+    return db.query(Report).filter(Report.id == report_id).first()
+
+
+def _set_status(db, report: Report, status: str, **data) -> None:
+    changed = report.status != status
+    report.status = status
+    db.commit()
+    if changed:
+        event_bus.publish_status(report.id, status, **data)
+
+
+class _SummaryStream:
+    """Saves each partial summary to the report and publishes the newly generated text.
+
+    Partial texts go to ``summary_partial`` rather than ``ai_summary``: each
+    would otherwise leave a dead blob behind in report_blobs.
+    """
+
+    def __init__(self, db, report: Report):
+        self.db = db
+        self.report = report
+        self.report_id = report.id
+        self.sent = ""
+
+    def __call__(self, text: str) -> None:
+        # Committed before the delta goes out, so a late subscriber's snapshot covers every delta it missed.
+        self.report.summary_partial = text
+        self.report.summary_preview = text[:SUMMARY_PREVIEW_CHARS]
+        self.db.commit()
+        self._publish(text)
+
+    def finish(self, summary: str) -> None:
+        # A failure message replaces, rather than continues, what was streamed.
+        if self.sent and summary.startswith(self.sent):
+            self._publish(summary)
+
+    def _publish(self, text: str) -> None:
+        if len(text) > len(self.sent):
+            event_bus.publish(self.report_id, "summary_delta", text=text[len(self.sent):], offset=len(self.sent))
+            self.sent = text
+
+
+def _page_progress(report_id: int, path: Path):
+    total = None
+
+    def on_page(page: int) -> None:
+        nonlocal total
+        if total is None:
+            # Looked up on the first page only, so cache hits never touch the file.
+            total = file_processor.page_count(path)
+        event_bus.publish(report_id, "ocr_progress", page=page, pages=total)
+
+    return on_page
+
+
+def _discard_upload(path: Path) -> None:
+    if path.exists():
+        try:
+            path.unlink()
+        except OSError:
+            pass
 
 
 @celery_app.task(name="backend.tasks.process_report")
 def process_report(report_id: int, file_path: str, owner_id: int) -> None:
-    path = Path(file_path)
     db = SessionLocal()
     try:
-        raw_text = file_processor.extract_text(path)
-        summary = report_generator.generate_summary(raw_text)
-        report_dir = file_processor.resolve_upload_root() / "reports"
-        report_dir.mkdir(parents=True, exist_ok=True)
-        pdf_path = report_dir / f"report_{report_id}.pdf"
-        export_service.render_pdf(summary, raw_text, pdf_path)
-
         report = (
             db.query(Report)
             .filter(Report.id == report_id, Report.owner_id == owner_id)
             .first()
         )
         if report is None:
+            _discard_upload(Path(file_path))
             return
-        report.raw_text = raw_text
-        report.ai_summary = summary
-        report.pdf_report = f"/uploads/reports/{pdf_path.name}"
-        report.status = "completed"
-        db.commit()
+        pending = [stage for stage in STAGES if not _stage_done(report, stage)]
+    finally:
+        db.close()
+
+    signatures = {
+        "ocr": _ocr_signature(report_id, file_path),
+        "summary": summarize_report.si(report_id),
+        "render": render_report.si(report_id),
+    }
+    if pending:
+        chain(*(signatures[stage] for stage in pending)).apply_async()
+
+
+def _ocr_signature(report_id: int, file_path: str):
+    """OCR the whole file in one task, or fan large PDFs out as page-range subtasks."""
+    path = Path(file_path)
+    min_pages = settings.OCR_FANOUT_MIN_PAGES
+    if min_pages <= 0 or normalize_extension(path.suffix) != ".pdf":
+        return ocr_report.si(report_id, file_path)
+    try:
+        page_count = file_processor.pdf_page_count(path)
     except Exception as exc:
-        report = db.query(Report).filter(Report.id == report_id).first()
-        if report:
-            report.status = "failed"
-            report.ai_summary = f"Processing failed: {exc}"[:1000]
-            db.commit()
+        # This entry task has no failure handling; the single OCR stage hits the same
+        # error and marks the report failed.
+        logger.warning("Could not count pages of %s for report %s: %s", path.name, report_id, exc)
+        return ocr_report.si(report_id, file_path)
+    if page_count < min_pages:
+        return ocr_report.si(report_id, file_path)
+
+    step = max(1, settings.OCR_FANOUT_PAGES_PER_TASK)
+    ranges = [
+        ocr_page_range.si(file_path, first, min(first + step - 1, page_count), report_id=report_id)
+        for first in range(1, page_count + 1, step)
+    ]
+    return chord(ranges, merge_ocr_pages.s(report_id=report_id, file_path=file_path))
+
+
+@celery_app.task(name="backend.tasks.ocr_report", base=PipelineStage)
+def ocr_report(report_id: int, file_path: str) -> None:
+    path = Path(file_path)
+    db = SessionLocal()
+    try:
+        report = _load(db, report_id)
+        if report is None or _stage_done(report, "ocr"):
+            return
+        _set_status(db, report, "processing")
+
+        extraction = file_processor.extract_document(path, on_page=_page_progress(report_id, path))
+        report.raw_text = extraction.text
+        report.extraction_metadata = json.dumps(extraction.metadata)
+        report.completed_stage = "ocr"
+        _set_status(db, report, "summarizing")
+    finally:
+        db.close()
+    _discard_upload(path)
+
+
+@celery_app.task(name="backend.tasks.ocr_page_range", base=PipelineStage)
+def ocr_page_range(file_path: str, first_page: int, last_page: int, report_id: int) -> dict:
+    # Retried on its own, so one failing range never re-OCRs the rest of the document.
+    # The PDF is shared with the other ranges; only merge_ocr_pages deletes it, once all succeeded.
+    db = SessionLocal()
+    try:
+        started = (
+            db.query(Report)
+            .filter(Report.id == report_id, Report.status == "queued")
+            .update({Report.status: "processing"}, synchronize_session=False)
+        )
+        db.commit()
+    finally:
+        db.close()
+    if started:
+        event_bus.publish_status(report_id, "processing")
+
+    path = Path(file_path)
+    result = file_processor.extract_pdf_pages(
+        path, first_page, last_page, on_page=_page_progress(report_id, path)
+    )
+    return {"text": result.text, "metadata": result.metadata}
+
+
+@celery_app.task(name="backend.tasks.merge_ocr_pages", base=PipelineStage)
+def merge_ocr_pages(parts: list[dict], report_id: int, file_path: str) -> None:
+    merged = file_processor.merge_extractions(
+        [file_processor.ExtractionResult(part["text"], part["metadata"]) for part in parts]
+    )
+    db = SessionLocal()
+    try:
+        report = _load(db, report_id)
+        if report is None or _stage_done(report, "ocr"):
+            return
+        report.raw_text = merged.text
+        report.extraction_metadata = json.dumps(merged.metadata)
+        report.completed_stage = "ocr"
+        _set_status(db, report, "summarizing")
+    finally:
+        db.close()
+    _discard_upload(Path(file_path))
+
+
+@celery_app.task(name="backend.tasks.summarize_report", base=PipelineStage)
+def summarize_report(report_id: int) -> None:
+    db = SessionLocal()
+    try:
+        report = _load(db, report_id)
+        if report is None or _stage_done(report, "summary"):
+            return
+        _set_status(db, report, "summarizing")
+
+        stream = _SummaryStream(db, report)
+        report.ai_summary = report_generator.generate_summary(report.raw_text or "", on_partial=stream)
+        report.summary_partial = None
+        stream.finish(report.ai_summary)
+        report.completed_stage = "summary"
+        _set_status(db, report, "rendering")
+    finally:
+        db.close()
+
+
+@celery_app.task(name="backend.tasks.render_report", base=PipelineStage)
+def render_report(report_id: int) -> None:
+    db = SessionLocal()
+    try:
+        report = _load(db, report_id)
+        if report is None or _stage_done(report, "render"):
+            return
+        _set_status(db, report, "rendering")
+
+        report_dir = file_processor.resolve_upload_root() / "reports"
+        report_dir.mkdir(parents=True, exist_ok=True)
+        pdf_path = report_dir / f"report_{report_id}.pdf"
+        export_service.render_pdf(report.ai_summary or "", report.raw_text or "", pdf_path)
+
+        report.pdf_report = f"/uploads/reports/{pdf_path.name}"
+        report.completed_stage = "render"
+        # Indexed in the same commit that marks the report completed, so search never lags behind.
+        search_index.index_report(db, report)
+        _set_status(db, report, "completed", pdf_report=report.pdf_report)
     finally:
         db.close()
-        if path.exists():
-            try:
-                path.unlink()
-            except OSError:
-                pass
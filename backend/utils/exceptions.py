@@ -0,0 +1,4 @@
+class UploadTooLargeError(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the {max_bytes} byte limit.")
+        self.max_bytes = max_bytes
@@ -0,0 +1,80 @@
+"""p50/p99 latency of ``GET /api/reports`` with and without the auth cache.
+
+Runs the FastAPI app in-process against a throwaway SQLite database.
+
+    python -m benchmarks.auth_cache --requests 2000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("RATE_LIMIT_REQUESTS", str(10**9))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.auth import auth_manager  # noqa: E402
+from backend.config import settings  # noqa: E402
+from backend.database import get_db  # noqa: E402
+from backend.main import app  # noqa: E402
+from backend.models import Base  # noqa: E402
+
+PASSWORD = "Very$ecure123"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    return statistics.quantiles(samples, n=100)[int(pct) - 1]
+
+
+def measure(client: TestClient, headers: dict, requests: int) -> list[float]:
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        client.get("/api/reports", headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{workdir}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        with TestClient(app) as client:
+            client.post("/api/auth/register", data={"email": "bench@example.com", "password": PASSWORD})
+            token = client.post(
+                "/api/auth/login", data={"email": "bench@example.com", "password": PASSWORD}
+            ).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            ttl = settings.AUTH_CACHE_TTL_SECONDS or 30
+            print(f"{'mode':>10} {'p50 ms':>8} {'p99 ms':>8}")
+            for mode, cache_ttl in (("no cache", 0), ("cache", ttl)):
+                settings.AUTH_CACHE_TTL_SECONDS = cache_ttl
+                auth_manager.clear()
+                measure(client, headers, 50)
+                samples = measure(client, headers, args.requests)
+                print(f"{mode:>10} {percentile(samples, 50):>8.3f} {percentile(samples, 99):>8.3f}")
+        app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
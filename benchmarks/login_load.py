@@ -0,0 +1,95 @@
+"""Concurrent-login throughput and its effect on an unrelated endpoint.
+
+Fires a burst of logins while probing ``GET /health`` and reports logins/s
+plus probe p50/p99, once with bcrypt on the shared threadpool and once with
+the dedicated process pool.
+
+    python -m benchmarks.login_load --logins 200 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("RATE_LIMIT_REQUESTS", str(10**9))
+
+import httpx  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.auth.hashing import password_hasher  # noqa: E402
+from backend.database import get_db  # noqa: E402
+from backend.main import app  # noqa: E402
+from backend.models import Base  # noqa: E402
+
+PASSWORD = "Very$ecure123"
+CREDENTIALS = {"email": "bench@example.com", "password": PASSWORD}
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, samples: list[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def burst(client: httpx.AsyncClient, logins: int) -> tuple[float, list[float], int]:
+    stop = asyncio.Event()
+    samples: list[float] = []
+    prober = asyncio.create_task(probe(client, stop, samples))
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(client.post("/api/auth/login", data=CREDENTIALS) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+    shed = sum(response.status_code == 503 for response in responses)
+    return elapsed, samples, shed
+
+
+async def run(logins: int, workers: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/auth/register", data=CREDENTIALS)
+        print(f"{'mode':>10} {'logins/s':>9} {'shed':>5} {'/health p50':>12} {'/health p99':>12}")
+        for mode, pool_workers in (("threadpool", 0), ("processes", workers)):
+            password_hasher.shutdown()
+            password_hasher.workers = pool_workers
+            password_hasher.max_pending = logins
+            await client.post("/api/auth/login", data=CREDENTIALS)
+            elapsed, samples, shed = await burst(client, logins)
+            p50 = statistics.median(samples)
+            p99 = statistics.quantiles(samples, n=100)[98] if len(samples) > 1 else p50
+            print(f"{mode:>10} {logins / elapsed:>9.1f} {shed:>5} {p50:>12.2f} {p99:>12.2f}")
+    password_hasher.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{workdir}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        asyncio.run(run(args.logins, args.workers))
+        app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
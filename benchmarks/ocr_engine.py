@@ -0,0 +1,58 @@
+"""Per-page OCR latency of each Tesseract engine.
+
+Every engine OCRs the same synthetic 300 DPI pages. The first page includes
+engine start-up (loading the language model), so it is reported separately
+from the steady-state pages. Engines that cannot be loaded are skipped.
+
+    python -m benchmarks.ocr_engine --pages 10
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+import pytesseract
+
+from backend.processors import image_processor
+from backend.services import ocr_engine
+from benchmarks.ocr_preprocess import text_page
+
+ENGINES = ("pytesseract", "tesserocr")
+
+
+def measure(name: str, pages: int, lang: str) -> list[float] | None:
+    page = image_processor.preprocess(text_page(300), image_processor.PreprocessOptions(), source_dpi=300)
+    timings = []
+    try:
+        for _ in range(pages):
+            started = time.perf_counter()
+            ocr_engine.get_engine(name, lang).image_to_string(page)
+            timings.append(time.perf_counter() - started)
+    except (ImportError, RuntimeError, pytesseract.TesseractNotFoundError):
+        return None
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES))
+    args = parser.parse_args()
+
+    print(f"{'engine':>12} {'first s':>8} {'p50 s':>7} {'mean s':>7} {'pages/s':>8}")
+    for name in args.engines:
+        timings = measure(name, args.pages, args.lang)
+        if timings is None:
+            print(f"{name:>12} {'unavailable':>8}")
+            continue
+        steady = timings[1:] or timings
+        print(
+            f"{name:>12} {timings[0]:>8.3f} {statistics.median(steady):>7.3f}"
+            f" {statistics.mean(steady):>7.3f} {1 / statistics.mean(steady):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
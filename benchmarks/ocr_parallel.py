@@ -0,0 +1,58 @@
+"""Wall-clock comparison of serial vs. process-pool PDF OCR.
+
+Generates synthetic text PDFs with reportlab and OCRs them through
+``file_processor._extract_pdf``. Requires tesseract and poppler.
+
+    python -m benchmarks.ocr_parallel --pages 1 5 20 50 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from backend.services import file_processor
+
+LINE = "Patient presents with lumbar pain radiating to the left leg. ROM limited."
+
+
+def build_pdf(destination: Path, pages: int) -> Path:
+    pdf = canvas.Canvas(str(destination), pagesize=letter)
+    for page in range(1, pages + 1):
+        text = pdf.beginText(72, 720)
+        text.textLine(f"Synthetic chart page {page}")
+        for _ in range(40):
+            text.textLine(LINE)
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+    return destination
+
+
+def timed(file_path: Path, workers: int) -> float:
+    started = time.perf_counter()
+    file_processor._extract_pdf(file_path, workers=workers)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'serial s':>10} {'parallel s':>11} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for pages in args.pages:
+            pdf_path = build_pdf(Path(workdir) / f"synthetic_{pages}.pdf", pages)
+            serial = timed(pdf_path, workers=1)
+            parallel = timed(pdf_path, workers=args.workers)
+            print(f"{pages:>6} {serial:>10.2f} {parallel:>11.2f} {serial / parallel:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""OCR time per page with and without image preprocessing.
+
+Generates synthetic pages that mimic what intake staff upload (an oversized
+600 DPI scan, a skewed phone photo on a dark desk, a noisy 300 DPI fax) and
+OCRs each one raw and after ``image_processor.preprocess``. Requires
+tesseract; without it only the preprocessing cost and pixel counts are shown.
+
+    python -m benchmarks.ocr_preprocess --repeat 3
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import pytesseract
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from backend.processors import image_processor
+
+LINES = [
+    "Patient presents with lumbar pain radiating to the left leg.",
+    "Range of motion limited in flexion; straight leg raise positive at 40 degrees.",
+    "Assessment: lumbar strain with possible L5 radiculopathy.",
+    "Plan: chiropractic adjustment twice weekly, re-evaluate in four weeks.",
+]
+
+
+def text_page(dpi: int) -> Image.Image:
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    page = Image.new("L", (width, height), 245)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=dpi // 8)
+    line_height = dpi // 5
+    for index, top in enumerate(range(dpi, height - dpi, line_height)):
+        draw.text((dpi, top), LINES[index % len(LINES)], fill=20, font=font)
+    return page
+
+
+def add_noise(image: Image.Image, amount: float, seed: int = 7) -> Image.Image:
+    rng = random.Random(seed)
+    noisy = image.copy()
+    pixels = noisy.load()
+    for _ in range(int(image.width * image.height * amount)):
+        x, y = rng.randrange(image.width), rng.randrange(image.height)
+        pixels[x, y] = rng.choice((0, 255))
+    return noisy
+
+
+def samples() -> dict[str, tuple[Image.Image, float | None]]:
+    scan = text_page(600)
+
+    page = text_page(250).rotate(3.0, expand=True, fillcolor=245, resample=Image.Resampling.BICUBIC)
+    desk = Image.new("L", (page.width + 400, page.height + 300), 35)
+    desk.paste(page, (200, 150))
+    photo = desk.filter(ImageFilter.GaussianBlur(1)).convert("RGB")
+
+    fax = add_noise(text_page(300), amount=0.01)
+    return {"scan 600dpi": (scan, 600), "phone photo": (photo, None), "noisy fax": (fax, 300)}
+
+
+def ocr_seconds(image: Image.Image, repeat: int) -> float | None:
+    try:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            pytesseract.image_to_string(image)
+        return (time.perf_counter() - started) / repeat
+    except pytesseract.TesseractNotFoundError:
+        return None
+
+
+def fmt(seconds: float | None) -> str:
+    return f"{seconds:.2f}" if seconds is not None else "n/a"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    options = image_processor.PreprocessOptions()
+
+    print(f"{'sample':>12} {'raw Mpx':>8} {'prep Mpx':>9} {'prep s':>7} {'raw OCR s':>10} {'prep OCR s':>11}")
+    for name, (image, dpi) in samples().items():
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            prepared = image_processor.preprocess(image, options, source_dpi=dpi)
+        prep_seconds = (time.perf_counter() - started) / args.repeat
+        print(
+            f"{name:>12} {image.width * image.height / 1e6:>8.1f} {prepared.width * prepared.height / 1e6:>9.1f}"
+            f" {prep_seconds:>7.2f} {fmt(ocr_seconds(image, args.repeat)):>10}"
+            f" {fmt(ocr_seconds(prepared, args.repeat)):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
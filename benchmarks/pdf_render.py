@@ -0,0 +1,68 @@
+"""Render time and peak memory of the PDF engines across raw-text sizes.
+
+Each measurement runs in a fresh process so peak RSS (which includes
+WeasyPrint's native layout memory, invisible to tracemalloc) is not
+inherited from earlier runs. Engines that cannot be imported are skipped.
+
+    python -m benchmarks.pdf_render --chars 10000 100000 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from backend.services import export_service
+
+LINE = "Patient presents with lumbar pain radiating to the left leg. ROM limited, SLR positive at 40 degrees."
+SUMMARY = "Diagnosis: lumbar strain.\n\nPlan: physical therapy twice weekly, re-evaluate in four weeks."
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(engine: str, chars: int, workdir: str) -> tuple[float, float, float]:
+    raw_text = "\n".join([LINE] * (chars // (len(LINE) + 1) + 1))[:chars]
+    renderer = export_service.get_renderer(engine)
+    # Warm up imports and font loading so they count towards the baseline, not the render.
+    renderer.render("warm-up", "warm-up", Path(workdir) / f"warmup_{engine}.pdf")
+    baseline = _peak_rss_mb()
+    started = time.perf_counter()
+    renderer.render(SUMMARY, raw_text, Path(workdir) / f"{engine}_{chars}.pdf")
+    return time.perf_counter() - started, baseline, _peak_rss_mb()
+
+
+def measure(engine: str, chars: int, workdir: str) -> tuple[float, float, float] | None:
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        try:
+            return pool.apply(_measure, (engine, chars, workdir))
+        except (ImportError, OSError):
+            return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chars", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--engines", nargs="+", default=list(export_service.RENDERERS))
+    args = parser.parse_args()
+
+    print(f"{'engine':>11} {'chars':>9} {'seconds':>8} {'peak MB':>8} {'+MB':>7}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for chars in args.chars:
+            for engine in args.engines:
+                result = measure(engine, chars, workdir)
+                if result is None:
+                    print(f"{engine:>11} {chars:>9} {'unavailable':>8}")
+                    continue
+                seconds, baseline, peak = result
+                print(f"{engine:>11} {chars:>9} {seconds:>8.2f} {peak:>8.1f} {peak - baseline:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
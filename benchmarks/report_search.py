@@ -0,0 +1,117 @@
+"""Full-text report search latency against a LIKE scan, over synthetic reports.
+
+Builds a throwaway SQLite database, indexes every report the way the render
+stage does, then times ``search_index.search`` and an owner-scoped
+``LIKE '%term%'`` over the same, decompressed text for a few rare and common terms.
+
+    python -m benchmarks.report_search --reports 20000 --owners 50 --queries 200
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from backend.models import SEARCH_CONTENT_VIEW, Base, Report, User
+from backend.services import search_index
+
+COMMON = (
+    "patient lumbar cervical pain flexion extension range motion adjustment spine muscle tenderness "
+    "posture radiating left right leg arm shoulder neck plan weekly follow review"
+).split()
+RARE = "spondylolisthesis syringomyelia scheuermann kyphoplasty".split()
+QUERIES = ("lumbar", "lumbar pain", "spondylolisthesis", "scheuermann kyphoplasty", "tenderness shoulder neck")
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    return statistics.quantiles(samples, n=100)[int(pct) - 1]
+
+
+def synthetic_text(rng: random.Random, words: int) -> str:
+    tokens = rng.choices(COMMON, k=words)
+    if rng.random() < 0.01:
+        tokens[rng.randrange(words)] = rng.choice(RARE)
+    return " ".join(tokens)
+
+
+def build(session, reports: int, owners: int, words: int, rng: random.Random) -> float:
+    users = [User(email=f"owner{index}@example.com", hashed_password="x") for index in range(owners)]
+    session.add_all(users)
+    session.commit()
+    owner_ids = [user.id for user in users]
+    started = time.perf_counter()
+    for first in range(0, reports, 1000):
+        batch = [
+            Report(
+                title=f"scan-{first + index}.pdf",
+                owner_id=rng.choice(owner_ids),
+                status="completed",
+                raw_text=synthetic_text(rng, words),
+                ai_summary=synthetic_text(rng, 60),
+            )
+            for index in range(min(1000, reports - first))
+        ]
+        session.add_all(batch)
+        session.flush()
+        for report in batch:
+            search_index.index_report(session, report)
+        session.commit()
+        session.expunge_all()
+    return time.perf_counter() - started
+
+
+def like_scan(session, owner_id: int, query: str, limit: int) -> list:
+    # Reads the text the way the index does, decompressing each of the owner's reports.
+    conditions = " AND ".join(f"body LIKE :term{index}" for index, _ in enumerate(query.split()))
+    params = {f"term{index}": f"%{term}%" for index, term in enumerate(query.split())}
+    return session.execute(
+        text(
+            f"SELECT report_id FROM {SEARCH_CONTENT_VIEW} WHERE owner_id = :owner_id AND {conditions} "
+            "ORDER BY report_id DESC LIMIT :limit"
+        ),
+        {**params, "owner_id": str(owner_id), "limit": limit},
+    ).all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=20000)
+    parser.add_argument("--owners", type=int, default=50)
+    parser.add_argument("--words", type=int, default=400, help="OCR words per report")
+    parser.add_argument("--queries", type=int, default=200, help="timed queries per term and mode")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{workdir}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        seconds = build(session, args.reports, args.owners, args.words, rng)
+        print(f"indexed {args.reports} reports in {seconds:.1f}s ({seconds / args.reports * 1000:.2f} ms/report)\n")
+
+        owner_ids = session.scalars(text("SELECT id FROM users")).all()
+        modes = {
+            "fts": lambda owner_id, query: search_index.search(session, owner_id, query, limit=args.limit),
+            "like": lambda owner_id, query: like_scan(session, owner_id, query, args.limit),
+        }
+        print(f"{'query':>26} {'mode':>5} {'p50 ms':>8} {'p99 ms':>8}")
+        for query in QUERIES:
+            for mode, run in modes.items():
+                samples = []
+                for _ in range(args.queries):
+                    owner_id = rng.choice(owner_ids)
+                    started = time.perf_counter()
+                    run(owner_id, query)
+                    samples.append((time.perf_counter() - started) * 1000)
+                print(f"{query:>26} {mode:>5} {percentile(samples, 50):>8.3f} {percentile(samples, 99):>8.3f}")
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
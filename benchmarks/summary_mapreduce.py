@@ -0,0 +1,45 @@
+"""Summarization wall time against document length and map concurrency.
+
+Uses the offline stub backend, which answers every call after a fixed
+delay, so the numbers show how the map-reduce schedule scales rather than
+provider speed: one call for short texts, then roughly
+ceil(chunks / concurrency) + 1 call latencies for long ones.
+
+    python -m benchmarks.summary_mapreduce --pages 5 20 80 --concurrency 1 4 8 --latency 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from backend.config import settings
+from backend.services import llm, report_generator
+
+PAGE = (
+    "Patient presents with lumbar pain radiating to the left leg. Range of motion limited in flexion; "
+    "straight leg raise positive at 40 degrees. Plan: chiropractic adjustment twice weekly.\n"
+) * 12
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20, 80])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per stub LLM call")
+    parser.add_argument("--chunk-chars", type=int, default=settings.SUMMARY_CHUNK_CHARS)
+    args = parser.parse_args()
+    backend = llm.LlmClient(llm.StubProvider(latency_seconds=args.latency))
+
+    print(f"{'pages':>6} {'chars':>9} {'chunks':>7} {'concurrency':>12} {'seconds':>8}")
+    for pages in args.pages:
+        raw_text = "\n\n".join([PAGE] * pages)
+        chunks = len(report_generator.split_text(raw_text, args.chunk_chars))
+        for concurrency in args.concurrency:
+            started = time.perf_counter()
+            report_generator.summarize(raw_text, backend, chunk_chars=args.chunk_chars, concurrency=concurrency)
+            seconds = time.perf_counter() - started
+            print(f"{pages:>6} {len(raw_text):>9} {chunks:>7} {concurrency:>12} {seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ export default function App() {
   const [password, setPassword] = useState('');
   const [file, setFile] = useState(null);
   const [reports, setReports] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
 
@@ -34,19 +35,22 @@ export default function App() {
     setAuth({ access: '', refresh: '' });
   };
 
-  const fetchReports = async () => {
+  // Without a cursor the list restarts at the newest report; with one, the next page is appended.
+  const fetchReports = async (cursor = null) => {
     if (!isAuthenticated) return;
+    const show = (page) => {
+      setReports((current) => (cursor ? [...current, ...page.reports] : page.reports));
+      setNextCursor(page.nextCursor);
+    };
     try {
-      const data = await api.listReports(auth.access);
-      setReports(data);
+      show(await api.listReports(auth.access, cursor));
     } catch (err) {
       console.error(err);
       if (err.message.includes('401') && auth.refresh) {
         try {
           const refreshed = await api.refresh(auth.refresh);
           persistAuth(refreshed.access_token, auth.refresh);
-          const retry = await api.listReports(refreshed.access_token);
-          setReports(retry);
+          show(await api.listReports(refreshed.access_token, cursor));
         } catch (refreshError) {
           clearAuth();
         }
@@ -97,7 +101,8 @@ export default function App() {
   const handleDelete = async (id) => {
     try {
       await api.deleteReport(id, auth.access);
-      fetchReports();
+      // Dropped in place, so pages loaded with "Load more" stay on screen.
+      setReports((current) => current.filter((report) => report.id !== id));
     } catch (err) {
       setError(err.message);
     }
@@ -163,7 +168,7 @@ export default function App() {
           <div style={{ display: 'flex', justify-content: 'space-between', alignItems: 'center' }}>
             <h3>Your Reports</h3>
             <div className="grid grid-2" style={{ gap: '0.5rem' }}>
-              <button style={buttonStyle('secondary')} onClick={fetchReports}>
+              <button style={buttonStyle('secondary')} onClick={() => fetchReports()}>
                 Refresh
               </button>
             </div>
@@ -205,6 +210,11 @@ export default function App() {
               ))}
             </div>
           )}
+          {nextCursor && (
+            <button style={{ ...buttonStyle('secondary'), marginTop: '1rem' }} onClick={() => fetchReports(nextCursor)}>
+              Load more
+            </button>
+          )}
         </section>
       </div>
     </div>
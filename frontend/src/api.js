@@ -1,6 +1,6 @@
 const API_BASE = (import.meta.env.VITE_API_BASE || '/api').replace(/\/$/, '');
 
-async function request(path, options = {}) {
+async function send(path, options = {}) {
   const response = await fetch(`${API_BASE}${path}`, {
     ...options,
     headers: {
@@ -12,6 +12,11 @@ async function request(path, options = {}) {
     const error = await response.json().catch(() => ({ detail: response.statusText }));
     throw new Error(error.detail || 'Request failed');
   }
+  return response;
+}
+
+async function request(path, options = {}) {
+  const response = await send(path, options);
   if (response.status === 204) return null;
   return response.json();
 }
@@ -32,10 +37,14 @@ export const api = {
       method: 'POST',
       body: new URLSearchParams({ refresh_token: refreshToken })
     }),
-  listReports: (token) =>
-    request('/reports', {
+  // One page, newest first; pass nextCursor back to get the page after it (null on the last page).
+  listReports: async (token, cursor) => {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const response = await send(`/reports${query}`, {
       headers: { Authorization: `Bearer ${token}` }
-    }),
+    });
+    return { reports: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') };
+  },
   getReport: (id, token) =>
     request(`/reports/${id}`, {
       headers: { Authorization: `Bearer ${token}` }
@@ -0,0 +1,26 @@
+"""add report extraction metadata
+
+Revision ID: 3f1c9a7d2e54
+Revises: 888cc4d31f87
+Create Date: 2026-10-18 09:12:41.204417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2e54'
+down_revision: Union[str, None] = '888cc4d31f87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('reports', sa.Column('extraction_metadata', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('reports', 'extraction_metadata')
@@ -0,0 +1,32 @@
+"""add report summary preview and owner listing index
+
+Revision ID: 5c8e1f2b7a90
+Revises: a7e2d4c91b03
+Create Date: 2026-10-18 11:24:05.318742
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8e1f2b7a90'
+down_revision: Union[str, None] = 'a7e2d4c91b03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('reports', sa.Column('summary_preview', sa.String(length=500), nullable=True))
+    op.execute(
+        "UPDATE reports SET summary_preview = substr(ai_summary, 1, 500) "
+        "WHERE ai_summary IS NOT NULL AND ai_summary != ''"
+    )
+    op.create_index('ix_reports_owner_id_created_at', 'reports', ['owner_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reports_owner_id_created_at', table_name='reports')
+    op.drop_column('reports', 'summary_preview')
@@ -0,0 +1,27 @@
+"""add report completed stage
+
+Revision ID: a7e2d4c91b03
+Revises: 3f1c9a7d2e54
+Create Date: 2026-10-18 10:02:17.551930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e2d4c91b03'
+down_revision: Union[str, None] = '3f1c9a7d2e54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('reports', sa.Column('completed_stage', sa.String(), nullable=True))
+    op.execute("UPDATE reports SET completed_stage = 'render' WHERE status = 'completed'")
+
+
+def downgrade() -> None:
+    op.drop_column('reports', 'completed_stage')
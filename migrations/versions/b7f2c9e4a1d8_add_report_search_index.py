@@ -0,0 +1,145 @@
+"""add full-text report search index
+
+Revision ID: b7f2c9e4a1d8
+Revises: e8a3c5f1d276
+Create Date: 2026-10-18 18:40:27.902114
+
+"""
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f2c9e4a1d8'
+down_revision: Union[str, None] = 'e8a3c5f1d276'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+SEARCH_COLUMNS = (
+    "report_id INTEGER PRIMARY KEY REFERENCES reports (id) ON DELETE CASCADE, "
+    "owner_id INTEGER NOT NULL, title TEXT NOT NULL, summary_digest VARCHAR(64), raw_text_digest VARCHAR(64)"
+)
+
+reports = sa.table(
+    'reports',
+    sa.column('id', sa.Integer),
+    sa.column('owner_id', sa.Integer),
+    sa.column('title', sa.String),
+    sa.column('status', sa.String),
+    sa.column('raw_text_digest', sa.String),
+    sa.column('ai_summary_digest', sa.String),
+)
+report_blobs = sa.table(
+    'report_blobs',
+    sa.column('digest', sa.String),
+    sa.column('data', sa.LargeBinary),
+)
+
+
+def upgrade() -> None:
+    _require_online()
+    connection = op.get_bind()
+    if connection.dialect.name == 'sqlite':
+        _upgrade_sqlite(connection)
+    else:
+        _upgrade_postgresql(connection)
+
+
+def _upgrade_sqlite(connection) -> None:
+    # The content view decompresses blobs with report_text(), which the app registers
+    # on its own connections; the rebuild below needs it on this one too.
+    connection.connection.driver_connection.create_function('report_text', 2, _blob_text, deterministic=True)
+    op.execute(f"CREATE TABLE report_search ({SEARCH_COLUMNS})")
+    op.execute(
+        "CREATE VIEW report_search_content AS "
+        "SELECT search.report_id AS report_id, search.title AS title, "
+        "report_text(summary.encoding, summary.data) AS summary, report_text(body.encoding, body.data) AS body, "
+        "CAST(search.owner_id AS TEXT) AS owner_id "
+        "FROM report_search AS search "
+        "LEFT JOIN report_blobs AS summary ON summary.digest = search.summary_digest "
+        "LEFT JOIN report_blobs AS body ON body.digest = search.raw_text_digest"
+    )
+    op.execute(
+        "CREATE VIRTUAL TABLE report_search_fts USING fts5(title, summary, body, owner_id, "
+        "content='report_search_content', content_rowid='report_id', tokenize='porter unicode61')"
+    )
+    # Index the reports that are already completed; new ones are indexed by the render stage.
+    op.execute(
+        "INSERT INTO report_search (report_id, owner_id, title, summary_digest, raw_text_digest) "
+        "SELECT id, owner_id, COALESCE(title, ''), ai_summary_digest, raw_text_digest "
+        "FROM reports WHERE status = 'completed'"
+    )
+    op.execute("INSERT INTO report_search_fts (report_search_fts) VALUES ('rebuild')")
+
+
+def _upgrade_postgresql(connection) -> None:
+    op.execute(f"CREATE TABLE report_search ({SEARCH_COLUMNS}, document TSVECTOR NOT NULL)")
+    insert = sa.text(
+        "INSERT INTO report_search (report_id, owner_id, title, summary_digest, raw_text_digest, document) "
+        "VALUES (:report_id, :owner_id, :title, :summary_digest, :raw_text_digest, "
+        "setweight(to_tsvector('english', :title), 'A') || "
+        "setweight(to_tsvector('english', :summary), 'B') || "
+        "setweight(to_tsvector('english', :body), 'C'))"
+    )
+
+    # Index the reports that are already completed; new ones are indexed by the render stage.
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(reports)
+            .where(reports.c.status == 'completed', reports.c.id > last_id)
+            .order_by(reports.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        digests = ({row.raw_text_digest for row in rows} | {row.ai_summary_digest for row in rows}) - {None}
+        blobs = connection.execute(
+            sa.select(report_blobs.c.digest, report_blobs.c.data).where(report_blobs.c.digest.in_(digests))
+        )
+        texts = {blob.digest: zlib.decompress(blob.data).decode('utf-8') for blob in blobs}
+        connection.execute(
+            insert,
+            [
+                {
+                    'report_id': row.id,
+                    'owner_id': row.owner_id,
+                    'title': row.title or '',
+                    'summary_digest': row.ai_summary_digest,
+                    'raw_text_digest': row.raw_text_digest,
+                    'summary': texts.get(row.ai_summary_digest, ''),
+                    'body': texts.get(row.raw_text_digest, ''),
+                }
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    # Built after the backfill: one bulk build is far cheaper than growing the index row by row.
+    op.execute("CREATE INDEX ix_report_search_document ON report_search USING GIN (document)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS report_search_fts")
+        op.execute("DROP VIEW IF EXISTS report_search_content")
+    op.execute("DROP TABLE IF EXISTS report_search")
+
+
+def _blob_text(encoding, data):
+    if data is None:
+        return None
+    if encoding != 'zlib':
+        raise ValueError(f'Unknown report blob encoding: {encoding}')
+    return zlib.decompress(data).decode('utf-8')
+
+
+def _require_online() -> None:
+    # The backfill decompresses report_blobs in Python, which static SQL cannot do.
+    if op.get_context().as_sql:
+        raise RuntimeError('b7f2c9e4a1d8 backfills the search index from report_blobs; run it against a live database')
@@ -0,0 +1,27 @@
+"""add report summary partial
+
+Revision ID: c3d9a6e2f4b1
+Revises: b7f2c9e4a1d8
+Create Date: 2026-10-18 21:12:44.518230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d9a6e2f4b1'
+down_revision: Union[str, None] = 'b7f2c9e4a1d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('reports', sa.Column('summary_partial', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('reports') as batch_op:
+        batch_op.drop_column('summary_partial')
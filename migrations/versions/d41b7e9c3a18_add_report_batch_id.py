@@ -0,0 +1,28 @@
+"""add report batch id
+
+Revision ID: d41b7e9c3a18
+Revises: 5c8e1f2b7a90
+Create Date: 2026-10-18 12:47:31.904215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41b7e9c3a18'
+down_revision: Union[str, None] = '5c8e1f2b7a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('reports', sa.Column('batch_id', sa.String(length=32), nullable=True))
+    op.create_index(op.f('ix_reports_batch_id'), 'reports', ['batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reports_batch_id'), table_name='reports')
+    op.drop_column('reports', 'batch_id')
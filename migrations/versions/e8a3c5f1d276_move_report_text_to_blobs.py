@@ -0,0 +1,170 @@
+"""move report text to compressed blobs
+
+Revision ID: e8a3c5f1d276
+Revises: d41b7e9c3a18
+Create Date: 2026-10-18 16:02:11.418377
+
+"""
+import hashlib
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a3c5f1d276'
+down_revision: Union[str, None] = 'd41b7e9c3a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows are moved this many at a time, so only one batch of report text is in memory.
+BATCH_SIZE = 500
+
+reports = sa.table(
+    'reports',
+    sa.column('id', sa.Integer),
+    sa.column('raw_text', sa.Text),
+    sa.column('ai_summary', sa.Text),
+    sa.column('raw_text_digest', sa.String),
+    sa.column('raw_text_size', sa.Integer),
+    sa.column('ai_summary_digest', sa.String),
+    sa.column('ai_summary_size', sa.Integer),
+)
+report_blobs = sa.table(
+    'report_blobs',
+    sa.column('digest', sa.String),
+    sa.column('encoding', sa.String),
+    sa.column('size', sa.Integer),
+    sa.column('data', sa.LargeBinary),
+)
+
+
+def _encode(text):
+    # Frozen copy of ReportBlob.encode, so later model changes can't alter this migration.
+    raw = text.encode('utf-8')
+    return {
+        'digest': hashlib.sha256(raw).hexdigest(),
+        'encoding': 'zlib',
+        'size': len(raw),
+        'data': zlib.compress(raw, 6),
+    }
+
+
+def _batches(connection, columns, condition):
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(reports.c.id, *columns)
+            .where(condition, reports.c.id > last_id)
+            .order_by(reports.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    _require_online()
+    op.create_table(
+        'report_blobs',
+        sa.Column('digest', sa.String(length=64), nullable=False),
+        sa.Column('encoding', sa.String(length=16), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('digest'),
+    )
+    op.add_column('reports', sa.Column('raw_text_digest', sa.String(length=64), nullable=True))
+    op.add_column('reports', sa.Column('raw_text_size', sa.Integer(), nullable=True))
+    op.add_column('reports', sa.Column('ai_summary_digest', sa.String(length=64), nullable=True))
+    op.add_column('reports', sa.Column('ai_summary_size', sa.Integer(), nullable=True))
+
+    connection = op.get_bind()
+    condition = sa.or_(reports.c.raw_text.isnot(None), reports.c.ai_summary.isnot(None))
+    for rows in _batches(connection, (reports.c.raw_text, reports.c.ai_summary), condition):
+        blobs = {}
+        updates = []
+        for row in rows:
+            raw = _encode(row.raw_text) if row.raw_text is not None else None
+            summary = _encode(row.ai_summary) if row.ai_summary is not None else None
+            for blob in (raw, summary):
+                if blob is not None:
+                    blobs[blob['digest']] = blob
+            updates.append({
+                'report_id': row.id,
+                'raw_digest': raw and raw['digest'],
+                'raw_size': raw and raw['size'],
+                'summary_digest': summary and summary['digest'],
+                'summary_size': summary and summary['size'],
+            })
+        existing = set(connection.scalars(
+            sa.select(report_blobs.c.digest).where(report_blobs.c.digest.in_(list(blobs)))
+        ))
+        missing = [blob for digest, blob in blobs.items() if digest not in existing]
+        if missing:
+            connection.execute(report_blobs.insert(), missing)
+        connection.execute(
+            reports.update()
+            .where(reports.c.id == sa.bindparam('report_id'))
+            .values(
+                raw_text_digest=sa.bindparam('raw_digest'),
+                raw_text_size=sa.bindparam('raw_size'),
+                ai_summary_digest=sa.bindparam('summary_digest'),
+                ai_summary_size=sa.bindparam('summary_size'),
+            ),
+            updates,
+        )
+
+    # Batch mode so SQLite, which can't ALTER constraints, rebuilds the table instead.
+    with op.batch_alter_table('reports') as batch_op:
+        batch_op.create_foreign_key('fk_reports_raw_text_digest', 'report_blobs', ['raw_text_digest'], ['digest'])
+        batch_op.create_foreign_key('fk_reports_ai_summary_digest', 'report_blobs', ['ai_summary_digest'], ['digest'])
+        batch_op.drop_column('raw_text')
+        batch_op.drop_column('ai_summary')
+
+
+def downgrade() -> None:
+    _require_online()
+    with op.batch_alter_table('reports') as batch_op:
+        batch_op.add_column(sa.Column('ai_summary', sa.TEXT(), autoincrement=False, nullable=True))
+        batch_op.add_column(sa.Column('raw_text', sa.TEXT(), autoincrement=False, nullable=True))
+        batch_op.drop_constraint('fk_reports_ai_summary_digest', type_='foreignkey')
+        batch_op.drop_constraint('fk_reports_raw_text_digest', type_='foreignkey')
+
+    connection = op.get_bind()
+    condition = sa.or_(reports.c.raw_text_digest.isnot(None), reports.c.ai_summary_digest.isnot(None))
+    for rows in _batches(connection, (reports.c.raw_text_digest, reports.c.ai_summary_digest), condition):
+        digests = ({row.raw_text_digest for row in rows} | {row.ai_summary_digest for row in rows}) - {None}
+        blobs = connection.execute(
+            sa.select(report_blobs.c.digest, report_blobs.c.data).where(report_blobs.c.digest.in_(digests))
+        )
+        texts = {blob.digest: zlib.decompress(blob.data).decode('utf-8') for blob in blobs}
+        connection.execute(
+            reports.update()
+            .where(reports.c.id == sa.bindparam('report_id'))
+            .values(raw_text=sa.bindparam('raw'), ai_summary=sa.bindparam('summary')),
+            [
+                {
+                    'report_id': row.id,
+                    'raw': texts.get(row.raw_text_digest),
+                    'summary': texts.get(row.ai_summary_digest),
+                }
+                for row in rows
+            ],
+        )
+
+    with op.batch_alter_table('reports') as batch_op:
+        batch_op.drop_column('ai_summary_size')
+        batch_op.drop_column('ai_summary_digest')
+        batch_op.drop_column('raw_text_size')
+        batch_op.drop_column('raw_text_digest')
+    op.drop_table('report_blobs')
+
+
+def _require_online() -> None:
+    # The text columns are dropped after their rows are copied, which static SQL cannot do.
+    if op.get_context().as_sql:
+        raise RuntimeError('e8a3c5f1d276 moves report text row by row; run it against a live database, not with --sql')
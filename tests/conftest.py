@@ -5,9 +5,11 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from backend.auth import auth_manager
 from backend.database import get_db
 from backend.main import app
 from backend.models import Base
+from backend.services import event_bus
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(
@@ -20,6 +22,8 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 def client():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    auth_manager.clear()
+    event_bus.set_event_bus(event_bus.MemoryEventBus())
 
     def override_get_db():
         db = TestingSessionLocal()
@@ -29,11 +33,14 @@ def client():
             db.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    # Rebuilt on the next request, so each test starts with empty rate-limit counters.
+    app.middleware_stack = None
 
     with TestClient(app) as test_client:
         yield test_client
 
     app.dependency_overrides.clear()
+    event_bus.set_event_bus(None)
 
 
 @pytest.fixture()
@@ -1,9 +1,28 @@
+import asyncio
+import hashlib
 import io
+import json
+from datetime import datetime
 
-from fastapi import status
+import fakeredis
+import pytest
+from fastapi import File, UploadFile, status
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
 
-from backend.models import Report, User
+from backend.api import middleware
+from backend.api import upload as upload_api
+from backend.api.middleware import (
+    BodySizeLimitMiddleware, MemoryRateLimitStore, RateLimitMiddleware, RedisRateLimitStore,
+)
+from backend.auth.hashing import password_hasher
+from backend.celery_app import celery_app
+from backend.config import settings
+from backend.models import SEARCH_FTS_TABLE, SEARCH_TABLE, Report, ReportBlob, User
+from backend.services import event_bus, file_processor, search_index
+from backend.services.ocr_cache import OcrCache
 from backend.tasks import report_tasks
+from tests.conftest import engine
 
 
 def _register_and_login(client, password="Very$ecure123"):
@@ -30,6 +49,53 @@ def test_register_and_login_lists_reports(client):
     assert reports.json() == []
 
 
+def test_authenticated_requests_skip_user_lookup(client, db_session):
+    token = _register_and_login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/api/reports", headers=headers)
+    user_queries = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            user_queries.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert client.get("/api/reports", headers=headers).status_code == status.HTTP_200_OK
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert user_queries == []
+
+    user = db_session.query(User).filter_by(email="user@example.com").first()
+    user.is_active = False
+    db_session.commit()
+    assert client.get("/api/reports", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_login_sheds_load_when_hash_queue_is_full(monkeypatch, client):
+    _register_and_login(client)
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = client.post(
+        "/api/auth/login",
+        data={"email": "user@example.com", "password": "Very$ecure123"},
+    )
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "2"
+
+
+def test_ocr_cache_counters_are_exposed(monkeypatch, client, tmp_path):
+    cache = OcrCache(tmp_path, max_bytes=1024)
+    monkeypatch.setattr(file_processor, "_ocr_cache", cache)
+    cache.get("ab" * 32)
+
+    response = client.get("/health/ocr-cache")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"ocr_cache": {"hits": 0, "misses": 1, "entries": 0, "bytes": 0}}
+
+
 def test_reports_require_auth(client):
     response = client.get("/api/reports")
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -53,6 +119,138 @@ def test_upload_enqueues_celery_task(monkeypatch, client):
     assert response.status_code == status.HTTP_202_ACCEPTED
     assert captured["report_id"] == 1
     assert captured["file_path"].endswith("scan.pdf")
+    assert response.json()["sha256"] == hashlib.sha256(b"fake pdf").hexdigest()
+    assert response.json()["size_bytes"] == len(b"fake pdf")
+
+
+def test_upload_rejects_oversized_files(monkeypatch, client):
+    token = _register_and_login(client)
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 4)
+    monkeypatch.setattr(report_tasks.process_report, "delay", lambda *args: None)
+
+    response = client.post(
+        "/api/upload",
+        headers={"Authorization": f"Bearer {token}"},
+        files={"file": ("scan.pdf", io.BytesIO(b"fake pdf"), "application/pdf")},
+    )
+
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+def _call_asgi(app, headers, chunks):
+    reads, sent = [], []
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages[-1]["more_body"] = False
+
+    async def receive():
+        reads.append(len(reads))
+        return messages[len(reads) - 1] if len(reads) <= len(messages) else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/api/upload/", "headers": headers, "query_string": b""}
+    asyncio.run(app(scope, receive, send))
+    return len(reads), sent[0]["status"]
+
+
+def test_body_limit_rejects_oversized_uploads_before_reading_the_body():
+    handled = []
+
+    async def inner(scope, receive, send):
+        while (await receive()).get("more_body"):
+            pass
+        handled.append(scope["path"])
+        await send({"type": "http.response.start", "status": 202, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    app = BodySizeLimitMiddleware(inner, limits={"/api/upload": 1024, "/api/upload/batch": None})
+
+    # A declared length over the limit is refused without a single receive().
+    reads, status_code = _call_asgi(app, [(b"content-length", b"5000000000")], [b"x" * 10])
+    assert (reads, status_code) == (0, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    # Without Content-Length, reading stops at the first chunk past the limit.
+    reads, status_code = _call_asgi(app, [], [b"x" * 600] * 10)
+    assert (reads, status_code) == (2, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    too_long = _call_asgi(app, [(b"content-length", b"1200")], [b"x" * 600] * 2)
+    assert too_long == (0, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    assert _call_asgi(app, [(b"content-length", b"1000")], [b"x" * 500] * 2) == (2, status.HTTP_202_ACCEPTED)
+    assert handled == ["/api/upload/"]
+
+
+def test_body_limit_replaces_the_form_parse_error_with_413():
+    from fastapi import FastAPI
+
+    inner = FastAPI()
+
+    @inner.post("/api/upload/")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": file.size}
+
+    client = TestClient(BodySizeLimitMiddleware(inner, limits={"/api/upload": 1024}))
+
+    def chunked_body():
+        yield b'--b\r\nContent-Disposition: form-data; name="file"; filename="scan.pdf"\r\n\r\n'
+        for _ in range(8):
+            yield b"x" * 512
+
+    response = client.post(
+        "/api/upload/", headers={"Content-Type": "multipart/form-data; boundary=b"}, content=chunked_body()
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    small = client.post("/api/upload/", files={"file": ("scan.pdf", io.BytesIO(b"fake pdf"), "application/pdf")})
+    assert small.json() == {"size": 8}
+
+
+def test_batch_upload_inserts_reports_and_dispatches_group(monkeypatch, client, db_session, tmp_path):
+    token = _register_and_login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    dispatched = []
+    monkeypatch.setattr(upload_api, "UPLOAD_ROOT", tmp_path)
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(
+        report_tasks.process_report, "run", lambda report_id, file_path, owner_id: dispatched.append(report_id)
+    )
+
+    response = client.post(
+        "/api/upload/batch",
+        headers=headers,
+        files=[("files", (f"scan{n}.pdf", io.BytesIO(b"pdf %d" % n), "application/pdf")) for n in range(3)],
+    )
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    body = response.json()
+    report_ids = [item["report_id"] for item in body["reports"]]
+    assert sorted(dispatched) == report_ids
+    assert [item["title"] for item in body["reports"]] == ["scan0.pdf", "scan1.pdf", "scan2.pdf"]
+    assert body["reports"][1]["sha256"] == hashlib.sha256(b"pdf 1").hexdigest()
+
+    db_session.query(Report).filter_by(id=report_ids[0]).update({"status": "completed"})
+    db_session.query(Report).filter_by(id=report_ids[1]).update({"status": "failed"})
+    db_session.commit()
+    progress = client.get(body["check_status"], headers=headers).json()
+    assert (progress["total"], progress["completed"], progress["failed"], progress["in_progress"]) == (3, 1, 1, 1)
+    assert progress["done"] is False
+
+
+def test_batch_upload_rejects_whole_batch_on_bad_file(monkeypatch, client, db_session, tmp_path):
+    token = _register_and_login(client)
+    monkeypatch.setattr(upload_api, "UPLOAD_ROOT", tmp_path)
+
+    response = client.post(
+        "/api/upload/batch",
+        headers={"Authorization": f"Bearer {token}"},
+        files=[
+            ("files", ("scan.pdf", io.BytesIO(b"pdf"), "application/pdf")),
+            ("files", ("notes.exe", io.BytesIO(b"MZ"), "application/octet-stream")),
+        ],
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert db_session.query(Report).count() == 0
+    assert list(tmp_path.iterdir()) == []
 
 
 def test_report_detail_and_delete_flow(client, db_session):
@@ -75,3 +273,257 @@ def test_report_detail_and_delete_flow(client, db_session):
     )
     assert delete.status_code == status.HTTP_204_NO_CONTENT
     assert db_session.query(Report).filter_by(id=report.id).first() is None
+
+
+def test_report_text_is_stored_once_compressed_and_pruned_on_delete(client, db_session):
+    token = _register_and_login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    user = db_session.query(User).filter_by(email="user@example.com").first()
+    raw_text = "Lumbar spine, flexion limited.\n" * 400
+    first = Report(title="a.pdf", owner_id=user.id, status="completed", raw_text=raw_text, ai_summary="Summary A")
+    second = Report(title="b.pdf", owner_id=user.id, status="completed", raw_text=raw_text, ai_summary="Summary B")
+    db_session.add_all([first, second])
+    db_session.commit()
+
+    # Identical OCR text is stored once, compressed; each summary gets its own blob.
+    assert first.raw_text_digest == second.raw_text_digest
+    assert db_session.query(ReportBlob).count() == 3
+    blob = db_session.get(ReportBlob, first.raw_text_digest)
+    assert len(blob.data) < blob.size == len(raw_text)
+    assert first.summary_preview == "Summary A"
+
+    db_session.expunge_all()
+    detail = client.get(f"/api/reports/{first.id}", headers=headers).json()
+    assert detail["preview"] == "Summary A"
+    assert detail["raw_text_bytes"] == len(raw_text)
+    assert detail["summary_bytes"] == len("Summary A")
+
+    assert client.delete(f"/api/reports/{first.id}", headers=headers).status_code == status.HTTP_204_NO_CONTENT
+    # The shared raw text survives for the second report; the first summary is gone.
+    assert {blob.digest for blob in db_session.query(ReportBlob)} == {
+        second.raw_text_digest,
+        second.ai_summary_digest,
+    }
+    assert db_session.get(Report, second.id).raw_text == raw_text
+
+
+def test_search_ranks_highlights_and_scopes_to_owner(client, db_session):
+    token = _register_and_login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    user = db_session.query(User).filter_by(email="user@example.com").first()
+    other = User(email="other@example.com", hashed_password="x")
+    db_session.add(other)
+    db_session.commit()
+    reports = [
+        Report(title=title, owner_id=owner_id, status="completed", raw_text=raw_text, ai_summary="s")
+        for title, owner_id, raw_text in (
+            ("Lumbar MRI", user.id, "Lumbar stenosis at L4 <b>"),
+            ("knee.pdf", user.id, "Mild lumbar strain noted."),
+            ("shoulder.pdf", user.id, "Rotator cuff tear."),
+            ("Lumbar MRI", other.id, "Lumbar stenosis"),
+        )
+    ]
+    db_session.add_all(reports)
+    db_session.flush()
+    for report in reports:
+        search_index.index_report(db_session, report)
+    db_session.commit()
+
+    response = client.get("/api/reports/search", params={"q": "lumbar", "limit": 1}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    # The title match ranks first; the other user's identical report never shows up.
+    assert [hit["id"] for hit in response.json()] == [reports[0].id]
+    assert response.headers["X-Next-Offset"] == "1"
+
+    rest = client.get("/api/reports/search", params={"q": "lumbar", "offset": 1}, headers=headers)
+    assert [hit["id"] for hit in rest.json()] == [reports[1].id]
+    assert "X-Next-Offset" not in rest.headers
+
+    [hit] = search_index.search(db_session, user.id, "stenosis", limit=10)
+    assert hit.highlight == "Lumbar <mark>stenosis</mark> at L4 &lt;b&gt;"
+    # Query syntax is not passed through to the index.
+    assert [hit.report_id for hit in search_index.search(db_session, user.id, 'cuff* -"tear")', limit=10)] == [
+        reports[2].id
+    ]
+    assert search_index.search(db_session, user.id, "***", limit=10) == []
+
+    client.delete(f"/api/reports/{reports[1].id}", headers=headers)
+    assert client.get("/api/reports/search", params={"q": "strain"}, headers=headers).json() == []
+    # Only digests are stored next to the index; it still agrees with the text in report_blobs.
+    stored = db_session.execute(text(f"SELECT * FROM {SEARCH_TABLE}")).all()
+    assert len(stored) == 3 and not any("stenosis" in str(value) for row in stored for value in row)
+    db_session.execute(text(f"INSERT INTO {SEARCH_FTS_TABLE} ({SEARCH_FTS_TABLE}) VALUES ('integrity-check')"))
+
+
+def test_list_reports_pages_with_keyset_cursor(client, db_session):
+    token = _register_and_login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    user = db_session.query(User).filter_by(email="user@example.com").first()
+    same_time = datetime(2025, 1, 5, 18, 23)
+    for index in range(5):
+        created_at = same_time if index < 3 else datetime(2025, 1, index)
+        report = Report(title=f"scan{index}.pdf", owner_id=user.id, created_at=created_at)
+        report.ai_summary = "x" * 800
+        db_session.add(report)
+    db_session.commit()
+    assert len(db_session.query(Report).first().summary_preview) == 500
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+        page = client.get("/api/reports", headers=headers, params=params)
+        assert page.status_code == status.HTTP_200_OK
+        assert len(page.json()) <= 2
+        seen.extend(item["id"] for item in page.json())
+        cursor = page.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    expected = [r.id for r in db_session.query(Report).order_by(Report.created_at.desc(), Report.id.desc())]
+    assert seen == expected
+    assert page.json()[-1]["preview"] == "x" * 500 + "..."
+
+    assert client.get("/api/reports", headers=headers, params={"cursor": "nope"}).status_code == 400
+    assert client.get("/api/reports", headers=headers, params={"limit": 1000}).status_code == 422
+
+
+def test_report_events_stream_until_completed(monkeypatch, client, db_session):
+    token = _register_and_login(client)
+    user = db_session.query(User).filter_by(email="user@example.com").first()
+    report = Report(title="scan.pdf", owner_id=user.id, status="processing")
+    db_session.add(report)
+    db_session.commit()
+
+    bus = event_bus.get_event_bus()
+    subscribe = bus.subscribe
+
+    async def subscribe_while_worker_runs(report_id):
+        subscription = await subscribe(report_id)
+        # Stands in for a Celery worker publishing while the client is connected.
+        event_bus.publish(report_id, "ocr_progress", page=1, pages=2)
+        event_bus.publish(report_id, "ocr_progress", page=2, pages=2)
+        event_bus.publish_status(report_id, "summarizing")
+        event_bus.publish_status(report_id, "completed", pdf_report="/uploads/reports/r.pdf")
+        return subscription
+
+    monkeypatch.setattr(bus, "subscribe", subscribe_while_worker_runs)
+
+    response = client.get(f"/api/reports/{report.id}/events", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert [(event["type"], event.get("status", event.get("page"))) for event in events] == [
+        ("status", "processing"),
+        ("ocr_progress", 1),
+        ("ocr_progress", 2),
+        ("status", "summarizing"),
+        ("status", "completed"),
+    ]
+    assert bus.subscriber_count(report.id) == 0
+
+
+def test_late_subscriber_gets_the_summary_so_far_without_repeats(monkeypatch, client, db_session):
+    token = _register_and_login(client)
+    user = db_session.query(User).filter_by(email="user@example.com").first()
+    report = Report(title="scan.pdf", owner_id=user.id, status="summarizing", summary_partial="Lumbar strain")
+    db_session.add(report)
+    db_session.commit()
+
+    bus = event_bus.get_event_bus()
+    subscribe = bus.subscribe
+
+    async def subscribe_mid_stream(report_id):
+        subscription = await subscribe(report_id)
+        # Published after the subscription but already part of the saved partial summary.
+        event_bus.publish(report_id, "summary_delta", text="Lumbar ", offset=0)
+        event_bus.publish(report_id, "summary_delta", text="strain, mild.", offset=7)
+        event_bus.publish_status(report_id, "completed")
+        return subscription
+
+    monkeypatch.setattr(bus, "subscribe", subscribe_mid_stream)
+
+    response = client.get(f"/api/reports/{report.id}/events", headers={"Authorization": f"Bearer {token}"})
+
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert events[0]["summary"] == "Lumbar strain"
+    assert [event["text"] for event in events if event["type"] == "summary_delta"] == [", mild."]
+
+
+def test_report_events_for_missing_report_is_404(client):
+    token = _register_and_login(client)
+
+    response = client.get("/api/reports/999/events", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert event_bus.get_event_bus().subscriber_count(999) == 0
+
+
+def _limited_app(store, clock, max_requests=2):
+    from fastapi import FastAPI
+
+    inner = FastAPI()
+
+    @inner.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    return RateLimitMiddleware(inner, max_requests=max_requests, window_seconds=10, store=store, clock=clock)
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    opened = []
+
+    def from_url(url, **options):
+        opened.append(options)
+        return fakeredis.FakeAsyncRedis(server=server)
+
+    monkeypatch.setattr(middleware.aioredis.Redis, "from_url", from_url)
+    return server, opened
+
+
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+def test_rate_limit_is_shared_across_workers(backend, request):
+    now = [1000.0]
+    if backend == "redis":
+        request.getfixturevalue("fake_redis")
+        stores = [RedisRateLimitStore("redis://limits:6379/0") for _ in range(2)]
+    else:
+        stores = [MemoryRateLimitStore()] * 2
+    workers = [TestClient(_limited_app(store, lambda: now[0])) for store in stores]
+
+    assert workers[0].get("/ping").status_code == status.HTTP_200_OK
+    assert workers[1].get("/ping").status_code == status.HTTP_200_OK
+    for _ in range(3):
+        blocked = workers[0].get("/ping")
+        assert blocked.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(blocked.headers["Retry-After"]) >= 1
+
+    # Halfway into the next window the two admitted requests weigh 1; the rejected ones weigh nothing.
+    now[0] += 15
+    assert workers[1].get("/ping").status_code == status.HTTP_200_OK
+
+
+def test_redis_rate_limit_store_fails_open_with_short_timeouts(fake_redis):
+    server, opened = fake_redis
+    store = RedisRateLimitStore("redis://limits:6379/0")
+    worker = TestClient(_limited_app(store, lambda: 1000.0, max_requests=1))
+    assert opened == [{"socket_timeout": 0.5, "socket_connect_timeout": 0.5}]
+
+    assert worker.get("/ping").status_code == status.HTTP_200_OK
+    assert worker.get("/ping").status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    server.connected = False
+    assert worker.get("/ping").status_code == status.HTTP_200_OK
+
+
+def test_memory_rate_limit_store_evicts_idle_clients():
+    clock = [0.0]
+    store = MemoryRateLimitStore(sweep_seconds=10, clock=lambda: clock[0])
+    for client_id in range(100):
+        asyncio.run(store.hit(f"10.0.0.{client_id}", window=1, window_seconds=10))
+    assert len(store) == 100
+
+    clock[0] = 30
+    asyncio.run(store.hit("10.0.0.1", window=3, window_seconds=10))
+    assert len(store) == 1
@@ -1,7 +1,436 @@
+import sys
+import time
+import tracemalloc
+
+import pytest
+from PIL import Image, ImageDraw
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+from backend.processors import dicom_processor, image_processor, pdf_processor
+from backend.services import file_processor, ocr_engine
 from backend.services.file_processor import allowed_file
+from backend.services.ocr_cache import OcrCache
+
+PAGE_BYTES = 2 * 1024 * 1024
+
+
+class _FakePage:
+    def __init__(self, number):
+        self.number = number
+        self.pixels = bytearray(PAGE_BYTES)
+
+    def close(self):
+        self.pixels = None
+
+
+def _fake_convert(path, dpi, first_page, last_page):
+    return [_FakePage(number) for number in range(first_page, last_page + 1)]
+
+
+def _fake_ocr_window(file_path, first_page, last_page):
+    return [f"page {number}" for number in range(first_page, last_page + 1)]
+
+
+@pytest.fixture(autouse=True)
+def no_text_layer(monkeypatch):
+    monkeypatch.setattr(pdf_processor, "read_text_layer", lambda path, first_page, last_page: [])
+
+
+@pytest.fixture(autouse=True)
+def no_preprocessing(monkeypatch):
+    # The fake pages below are not real images.
+    monkeypatch.setattr(file_processor.settings, "OCR_PREPROCESS", False)
+
+
+@pytest.fixture(autouse=True)
+def pytesseract_engine(monkeypatch):
+    # Tests fake Tesseract by patching pytesseract, even where tesserocr is installed.
+    monkeypatch.setattr(file_processor.settings, "OCR_ENGINE", "pytesseract")
+
+
+@pytest.fixture(autouse=True)
+def ocr_cache(monkeypatch, tmp_path):
+    cache = OcrCache(tmp_path / "ocr_cache", max_bytes=1024 * 1024)
+    monkeypatch.setattr(file_processor, "_ocr_cache", cache)
+    return cache
 
 
 def test_allowed_file_helpers():
     assert allowed_file("report.pdf") is True
     assert allowed_file("report.jpeg") is True
     assert allowed_file("report.exe") is False
+
+
+def test_parallel_pdf_ocr_preserves_page_order(monkeypatch, tmp_path):
+    monkeypatch.setattr(file_processor, "pdf_page_count", lambda path: 5)
+    monkeypatch.setattr(file_processor, "_ocr_pdf_window", _fake_ocr_window)
+
+    text = file_processor._extract_pdf(tmp_path / "scan.pdf", workers=3, max_pages_in_flight=6).text
+
+    assert text.split("\n\n") == [f"page {n}" for n in range(1, 6)]
+
+
+def test_parallel_pdf_ocr_falls_back_to_serial(monkeypatch, tmp_path):
+    class UnavailablePool:
+        def __init__(self, *args, **kwargs):
+            raise OSError("no processes here")
+
+    monkeypatch.setattr(file_processor, "ProcessPoolExecutor", UnavailablePool)
+    monkeypatch.setattr(file_processor, "pdf_page_count", lambda path: 2)
+    monkeypatch.setattr(file_processor, "convert_from_path", _fake_convert)
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_string", lambda image, lang: f"text {image.number}")
+
+    assert file_processor._extract_pdf(tmp_path / "scan.pdf", workers=4).text == "text 1\n\ntext 2"
+
+
+def test_streaming_pdf_ocr_memory_stays_flat(monkeypatch, tmp_path):
+    monkeypatch.setattr(file_processor, "convert_from_path", _fake_convert)
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_string", lambda image, lang: "text")
+
+    def peak_bytes(pages):
+        monkeypatch.setattr(file_processor, "pdf_page_count", lambda path: pages)
+        tracemalloc.start()
+        try:
+            file_processor._extract_pdf(tmp_path / "scan.pdf", workers=1, max_pages_in_flight=2)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small, large = peak_bytes(4), peak_bytes(40)
+    assert large < 3 * PAGE_BYTES
+    assert large < small * 1.5
+
+
+def test_pdf_text_layer_pages_skip_ocr(monkeypatch, tmp_path):
+    discharge = "Discharge summary: patient stable, follow up with PT in two weeks. " * 2
+    monkeypatch.setattr(pdf_processor, "read_text_layer", lambda path, first_page, last_page: [discharge, "  \n", discharge, "~~ ."])
+    monkeypatch.setattr(file_processor, "pdf_page_count", lambda path: 4)
+    requested = []
+
+    def fake_window(file_path, first_page, last_page):
+        requested.append((first_page, last_page))
+        return [f"scanned {number}" for number in range(first_page, last_page + 1)]
+
+    monkeypatch.setattr(file_processor, "_ocr_pdf_window", fake_window)
+
+    chart = tmp_path / "chart.pdf"
+    chart.write_bytes(b"%PDF-1.4 chart")
+
+    result = file_processor.extract_document(chart)
+
+    assert requested == [(2, 2), (4, 4)]
+    assert result.text.split("\n\n") == [discharge.strip(), "scanned 2", discharge.strip(), "scanned 4"]
+    assert result.metadata["text_layer_pages"] == [1, 3]
+    assert result.metadata["ocr_pages"] == [2, 4]
+
+
+def test_duplicate_uploads_hit_ocr_cache(monkeypatch, tmp_path, ocr_cache):
+    calls = []
+    monkeypatch.setattr(file_processor, "pdf_page_count", lambda path: 1)
+    monkeypatch.setattr(
+        file_processor, "_ocr_pdf_window", lambda path, first, last: calls.append(path) or ["intake form"]
+    )
+    first = tmp_path / "a_intake.pdf"
+    second = tmp_path / "b_intake.pdf"
+    first.write_bytes(b"%PDF-1.4 same bytes")
+    second.write_bytes(b"%PDF-1.4 same bytes")
+
+    assert file_processor.extract_document(first).metadata["cache"] == "miss"
+    duplicate = file_processor.extract_document(second)
+
+    assert duplicate.text == "intake form"
+    assert duplicate.metadata["cache"] == "hit"
+    assert len(calls) == 1
+    assert file_processor.ocr_cache_stats()["hits"] == 1
+    assert file_processor.ocr_cache_stats()["misses"] == 1
+
+
+def test_ocr_cache_stats_add_up_every_worker(tmp_path):
+    workers = [OcrCache(tmp_path, max_bytes=1024), OcrCache(tmp_path, max_bytes=1024)]
+    workers[0].put("ab" * 32, {"text": "x"})
+
+    assert workers[0].get("ab" * 32) is not None
+    assert workers[1].get("ab" * 32) is not None
+    assert workers[1].get("cd" * 32) is None
+
+    assert workers[0].stats() == {"hits": 2, "misses": 1, "entries": 1, "bytes": len('{"text": "x"}')}
+
+
+def test_ocr_cache_stays_out_of_the_public_upload_root(monkeypatch, tmp_path):
+    monkeypatch.setattr(file_processor, "resolve_upload_root", lambda: tmp_path / "uploads")
+    monkeypatch.setattr(file_processor.settings, "OCR_CACHE_DIR", "")
+    assert file_processor.resolve_ocr_cache_root() == tmp_path / "ocr_cache"
+
+    monkeypatch.setattr(file_processor.settings, "OCR_CACHE_DIR", str(tmp_path / "uploads" / "cache"))
+    with pytest.raises(ValueError, match="publicly served"):
+        file_processor.resolve_ocr_cache_root()
+
+
+def test_ocr_cache_evicts_least_recently_used(tmp_path):
+    cache = OcrCache(tmp_path, max_bytes=250)
+    for name in ("old", "middle", "new"):
+        cache.put(cache.key(name), {"text": "x" * 100, "metadata": {}})
+        time.sleep(0.01)
+
+    assert cache.get(cache.key("old")) is None
+    assert cache.get(cache.key("new")) is not None
+    assert cache.stats()["bytes"] <= 250
+
+
+def test_adaptive_dpi_reruns_only_low_confidence_pages(monkeypatch, tmp_path):
+    monkeypatch.setattr(file_processor.settings, "OCR_ADAPTIVE_DPI", True)
+    monkeypatch.setattr(file_processor.settings, "OCR_DPI_LADDER", [300, 150, 400])
+    monkeypatch.setattr(file_processor.settings, "OCR_MIN_CONFIDENCE", 80)
+    monkeypatch.setattr(file_processor, "pdf_page_count", lambda path: 3)
+    # Page 1 is clean, page 2 is a faint fax that reads well at 300 DPI, page 3 is blank.
+    confidence = {(1, 150): 95, (2, 150): 40, (2, 300): 88}
+    rasterized = []
+
+    def fake_convert(path, dpi, first_page, last_page):
+        rasterized.append((dpi, first_page, last_page))
+        pages = [_FakePage(number) for number in range(first_page, last_page + 1)]
+        for page in pages:
+            page.dpi = dpi
+        return pages
+
+    def fake_image_to_data(image, lang, output_type):
+        score = confidence.get((image.number, image.dpi))
+        if score is None:
+            return {"text": [""], "conf": [-1], "block_num": [1], "par_num": [1], "line_num": [1]}
+        return {
+            "text": ["", f"page{image.number}", f"at{image.dpi}"],
+            "conf": [-1, score, score],
+            "block_num": [1, 1, 1],
+            "par_num": [1, 1, 1],
+            "line_num": [1, 1, 1],
+        }
+
+    monkeypatch.setattr(file_processor, "convert_from_path", fake_convert)
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_data", fake_image_to_data)
+
+    result = file_processor._extract_pdf(tmp_path / "fax.pdf", workers=1, max_pages_in_flight=3)
+
+    assert rasterized == [(150, 1, 3), (300, 2, 3), (400, 3, 3)]
+    assert result.text == "page1 at150\n\npage2 at300"
+    assert [(page["dpi"], page.get("confidence"), page["passes"]) for page in result.metadata["pages"]] == [
+        (150, 95.0, 1),
+        (300, 88.0, 2),
+        (150, None, 3),
+    ]
+
+
+def _synthetic_page(width=1700, height=2200):
+    # Rows of short dark "words", like lines of text on a 200 DPI letter page.
+    page = Image.new("L", (width, height), 240)
+    draw = ImageDraw.Draw(page)
+    for top in range(300, height - 300, 60):
+        for left in range(200, width - 300, 90):
+            draw.rectangle((left, top, left + 70, top + 20), fill=30)
+    return page
+
+
+@pytest.mark.parametrize("angle", [0.0, 3.0, -2.0])
+def test_estimate_skew_recovers_rotation(angle):
+    tilted = _synthetic_page().rotate(angle, expand=True, fillcolor=240)
+
+    assert image_processor.estimate_skew(tilted, max_degrees=5) == pytest.approx(-angle, abs=0.5)
+
+
+def test_preprocess_downscales_binarizes_and_crops_scanner_border():
+    scan = Image.new("L", (3600, 4600), 15)
+    scan.paste(_synthetic_page(3400, 4400), (100, 100))
+    options = image_processor.PreprocessOptions(deskew=False)
+
+    prepared = image_processor.preprocess(scan, options, source_dpi=400)
+
+    assert set(prepared.getdata()) <= {0, 255}
+    # 400 -> 300 DPI, then the dark border and blank margins are cropped away.
+    assert prepared.width < 3600 * 0.75 * 0.9
+    assert prepared.getpixel((0, 0)) == 255
+
+
+def test_preprocessing_settings_are_part_of_ocr_cache_key(monkeypatch, tmp_path):
+    monkeypatch.setattr(file_processor.settings, "OCR_PREPROCESS", True)
+    key = file_processor._ocr_settings(tmp_path / "scan.png")
+    monkeypatch.setattr(file_processor.settings, "OCR_DESKEW", False)
+
+    assert file_processor._ocr_settings(tmp_path / "scan.png") != key
+
+
+def test_auto_engine_falls_back_to_pytesseract_and_is_reused(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tesserocr", None)
+    monkeypatch.setattr(ocr_engine, "_engines", {})
+
+    engine = ocr_engine.get_engine("auto", "eng")
+    assert isinstance(engine, ocr_engine.PytesseractEngine)
+    assert ocr_engine.get_engine("auto", "eng") is engine
+
+    # A forked worker must not reuse handles created by its parent.
+    monkeypatch.setattr(ocr_engine, "_engines_pid", -1)
+    assert ocr_engine.get_engine("auto", "eng") is not engine
+
+    with pytest.raises(ImportError):
+        ocr_engine.get_engine("tesserocr", "eng")
+    with pytest.raises(ValueError):
+        ocr_engine.get_engine("ocrmypdf", "eng")
+
+
+def _code(meaning):
+    code = Dataset()
+    code.CodeValue, code.CodingSchemeDesignator, code.CodeMeaning = meaning[:16], "99TEST", meaning
+    return code
+
+
+def _content(value_type, name, **values):
+    item = Dataset()
+    item.ValueType = value_type
+    item.ConceptNameCodeSequence = [_code(name)]
+    for keyword, value in values.items():
+        setattr(item, keyword, value)
+    return item
+
+
+def _write_dicom(path, sop_class="1.2.840.10008.5.1.4.1.1.7", **elements):
+    dataset = Dataset()
+    dataset.file_meta = FileMetaDataset()
+    dataset.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    dataset.file_meta.MediaStorageSOPClassUID = sop_class
+    dataset.file_meta.MediaStorageSOPInstanceUID = dataset.SOPInstanceUID = generate_uid()
+    dataset.SOPClassUID = sop_class
+    dataset.PatientName, dataset.PatientID = "Doe^Jane", "P-1001"
+    for keyword, value in elements.items():
+        setattr(dataset, keyword, value)
+    dataset.save_as(path, enforce_file_format=True)
+    return path
+
+
+def test_dicom_structured_report_text_is_extracted(tmp_path):
+    measurement = Dataset()
+    measurement.NumericValue = "4"
+    measurement.MeasurementUnitsCodeSequence = [_code("mm")]
+    findings = _content(
+        "CONTAINER",
+        "Findings",
+        ContentSequence=[
+            _content("TEXT", "Finding", TextValue="Disc bulge at L4-L5"),
+            _content("NUM", "Protrusion", MeasuredValueSequence=[measurement]),
+        ],
+    )
+    path = _write_dicom(
+        tmp_path / "report.dcm", sop_class="1.2.840.10008.5.1.4.1.1.88.11", Modality="SR", ContentSequence=[findings]
+    )
+
+    result = file_processor.extract_document(path)
+
+    header, report = result.text.split("\n\n")
+    assert header.splitlines() == ["Patient: Doe^Jane", "Patient ID: P-1001", "Modality: SR"]
+    assert report.splitlines() == ["Findings", "  Finding: Disc bulge at L4-L5", "  Protrusion: 4 mm"]
+    assert result.metadata["dicom"]["structured_report"] is True
+    assert result.metadata["dicom"]["frames"] == 0
+
+
+def test_dicom_encapsulated_pdf_goes_through_pdf_extraction(monkeypatch, tmp_path):
+    pdf_bytes = b"%PDF-1.4 fake" + b"x" * 64 * 1024
+    seen = {}
+
+    def fake_extract_pdf(path, *args, **kwargs):
+        seen["bytes"], seen["path"] = path.read_bytes(), path
+        return file_processor.ExtractionResult("Embedded discharge letter", {"pages": [{"page": 1, "method": "text"}]})
+
+    monkeypatch.setattr(file_processor, "_extract_pdf", fake_extract_pdf)
+    path = _write_dicom(
+        tmp_path / "letter.dcm",
+        sop_class="1.2.840.10008.5.1.4.1.1.104.1",
+        Modality="DOC",
+        MIMETypeOfEncapsulatedDocument="application/pdf",
+        EncapsulatedDocument=pdf_bytes,
+    )
+
+    result = file_processor.extract_document(path)
+
+    assert result.text.endswith("Embedded discharge letter")
+    assert seen["bytes"].rstrip(b"\0") == pdf_bytes
+    assert not seen["path"].exists()
+    assert result.metadata["pages"] == [{"page": 1, "method": "text"}]
+
+
+def test_dicom_frames_are_ocred_one_at_a_time_only_on_request(monkeypatch, tmp_path):
+    frames, rows, columns = 5, 32, 48
+    pixels = bytes(range(256)) * (frames * rows * columns * 2 // 256)
+    path = _write_dicom(
+        tmp_path / "cine.dcm",
+        Modality="XA",
+        Rows=rows,
+        Columns=columns,
+        NumberOfFrames=frames,
+        SamplesPerPixel=1,
+        PhotometricInterpretation="MONOCHROME2",
+        BitsAllocated=16,
+        BitsStored=12,
+        HighBit=11,
+        PixelRepresentation=0,
+        PixelData=pixels,
+    )
+    ocred = []
+
+    def fake_image_to_string(image, lang):
+        ocred.append((image.mode, image.size))
+        return f"annotation {len(ocred)}"
+
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_string", fake_image_to_string)
+    monkeypatch.setattr(file_processor, "_ocr_cache", None)
+    monkeypatch.setattr(file_processor.settings, "OCR_CACHE_MAX_BYTES", 0)
+
+    assert "frames" not in file_processor.extract_document(path).metadata
+    assert ocred == []
+
+    monkeypatch.setattr(file_processor.settings, "DICOM_OCR_FRAMES", True)
+    monkeypatch.setattr(file_processor.settings, "DICOM_MAX_OCR_FRAMES", 3)
+    result = file_processor.extract_document(path)
+
+    assert ocred == [("L", (columns, rows))] * 3
+    assert result.text.endswith("annotation 1\n\nannotation 2\n\nannotation 3")
+    assert [frame["frame"] for frame in result.metadata["frames"]] == [1, 2, 3]
+    assert dicom_processor.read(path).frames == frames
+
+
+def test_docx_and_xlsx_are_extracted_without_ocr(monkeypatch, tmp_path):
+    from docx import Document
+    from openpyxl import Workbook
+
+    def no_ocr(*args, **kwargs):
+        raise AssertionError("office documents must not be OCRed")
+
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_string", no_ocr)
+
+    letter = Document()
+    letter.add_paragraph("Referral: lumbar pain, please assess.")
+    table = letter.add_table(rows=2, cols=3)
+    table.cell(0, 0).merge(table.cell(0, 1)).text = "Medication"
+    table.cell(0, 2).text = "Dose"
+    table.cell(1, 0).text, table.cell(1, 1).text, table.cell(1, 2).text = "Ibuprofen", "oral", "400 mg"
+    letter.add_paragraph("Dr. Smith")
+    letter.save(tmp_path / "referral.docx")
+
+    workbook = Workbook()
+    ledger = workbook.active
+    ledger.title = "Ledger"
+    ledger.append(["Date", "Code", "Amount", None])
+    ledger.append([])
+    ledger.append(["2024-05-01", "98941", 65])
+    workbook.create_sheet("Empty")
+    workbook.save(tmp_path / "billing.xlsx")
+
+    docx_result = file_processor.extract_document(tmp_path / "referral.docx")
+    assert docx_result.text == (
+        "Referral: lumbar pain, please assess.\n\n"
+        "Medication | Dose\nIbuprofen | oral | 400 mg\n\n"
+        "Dr. Smith"
+    )
+    assert docx_result.metadata["document"] == {"format": "docx", "paragraphs": 2, "tables": 1}
+
+    xlsx_result = file_processor.extract_document(tmp_path / "billing.xlsx")
+    assert xlsx_result.text == "Sheet: Ledger\nDate\tCode\tAmount\n2024-05-01\t98941\t65"
+    assert xlsx_result.metadata["document"]["sheets"] == [{"name": "Ledger", "rows": 2}, {"name": "Empty", "rows": 0}]
+    assert allowed_file("referral.DOCX") and allowed_file("billing.xlsx")
@@ -1,6 +1,21 @@
+import asyncio
+import hashlib
+import io
+import re
+import threading
+import time
+from functools import partial
+
+import groq
+import httpx
 import pytest
 
+from backend.config import settings
+from backend.services import export_service, file_processor, llm, report_generator, summary_cache
+from backend.services.summary_cache import MemorySummaryBackend, SQLiteSummaryBackend
 from backend.services.validator import validate_upload
+from backend.utils.cache import TTLCache
+from backend.utils.exceptions import UploadTooLargeError
 from backend.utils.formatters import truncate_text
 
 
@@ -17,3 +32,318 @@ def test_validate_upload_accepts_known_types():
 def test_validate_upload_rejects_unknown_types():
     with pytest.raises(Exception):
         validate_upload("malware.exe")
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = type("Message", (), {"content": f"summary #{self.calls}"})
+        return type("Completion", (), {"choices": [type("Choice", (), {"message": message})]})
+
+
+def test_build_prompt_is_deterministic():
+    assert report_generator.build_prompt("Pt c/o neck pain") == report_generator.build_prompt("Pt c/o neck pain")
+
+
+def test_generate_summary_reuses_cached_completion(monkeypatch):
+    completions = _FakeCompletions()
+    client = type("Client", (), {"chat": type("Chat", (), {"completions": completions})})
+    monkeypatch.setattr(report_generator, "_client", lambda: client)
+    monkeypatch.setattr(report_generator, "_llm_client", None)
+    monkeypatch.setattr(report_generator.settings, "LLM_RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.setattr(report_generator, "_summary_cache", MemorySummaryBackend(max_entries=8, ttl_seconds=60))
+    monkeypatch.setattr(report_generator, "_summary_cache_ready", True)
+
+    first = report_generator.generate_summary("Cervical strain.\n\nROM limited.")
+    again = report_generator.generate_summary("  Cervical strain. ROM limited. ")
+
+    assert first == again == "summary #1"
+    assert completions.calls == 1
+
+
+def test_split_text_prefers_coarse_boundaries():
+    pages = ["Page one history.\nLine two.", "Page two exam findings.", "x" * 25]
+    chunks = report_generator.split_text("\n\n".join(pages), max_chars=30)
+
+    assert chunks[:2] == pages[:2]
+    assert chunks[2] == "x" * 25
+    assert all(len(chunk) <= 30 for chunk in chunks)
+    assert report_generator.split_text("word " * 20, max_chars=12) == ["word word"] * 10
+
+
+def test_long_text_is_map_reduced_with_bounded_concurrency(monkeypatch):
+    class RecordingBackend:
+        model = "stub"
+
+        def __init__(self):
+            self.latency_seconds = 0.05
+            self.prompts, self.in_flight, self.peak = [], 0, 0
+            self.lock = threading.Lock()
+
+        def complete(self, prompt, **params):
+            with self.lock:
+                self.prompts.append(prompt)
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+            try:
+                return "final report" if "Notes:\n" in prompt else f"notes {len(self.prompts)}"
+            finally:
+                time.sleep(self.latency_seconds)
+                with self.lock:
+                    self.in_flight -= 1
+
+    backend = RecordingBackend()
+    raw_text = "\n\n".join(f"Page {number}: " + "finding " * 100 for number in range(1, 13))
+
+    assert report_generator.summarize(raw_text, backend, chunk_chars=2000, concurrency=3) == "final report"
+    chunk_prompts = backend.prompts[:-1]
+    assert len(chunk_prompts) == 6
+    assert sorted(re.search(r"part (\d+) of 6", prompt).group(1) for prompt in chunk_prompts) == list("123456")
+    assert backend.peak == 3
+    assert "Notes:\nnotes" in backend.prompts[-1]
+
+    short = RecordingBackend()
+    report_generator.summarize("Cervical strain.", short, chunk_chars=2000)
+    assert short.prompts == [report_generator.build_prompt("Cervical strain.")]
+
+
+def test_rejected_provider_requests_are_not_retryable():
+    response = httpx.Response(401, request=httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions"))
+
+    with pytest.raises(llm.LlmRequestError):
+        with llm._groq_errors():
+            raise groq.AuthenticationError("invalid api key", response=response, body=None)
+
+
+def test_llm_client_retries_with_backoff_and_records_metrics():
+    provider = llm.StubProvider(
+        errors=[llm.RateLimitedError("429", retry_after=7), llm.ProviderUnavailableError("503")]
+    )
+    sleeps, calls = [], []
+    client = llm.LlmClient(
+        provider, backoff_base_seconds=1, backoff_max_seconds=4, sleep=sleeps.append, on_call=calls.append
+    )
+
+    assert client.complete("Cervical strain, ROM limited.") == "Cervical strain, ROM limited."
+    assert provider.calls == 3
+    assert sleeps[0] == 7  # Retry-After wins over a shorter jittered delay
+    assert 0 <= sleeps[1] <= 2
+    [metrics] = calls
+    assert (metrics.outcome, metrics.attempts, metrics.completion_tokens) == ("ok", 3, 7)
+    assert client.stats()["retries"] == 2
+
+    outage = llm.StubProvider(errors=[llm.ProviderUnavailableError("503")] * 2)
+    failing = llm.LlmClient(outage, max_attempts=2, sleep=sleeps.append)
+    with pytest.raises(llm.ProviderUnavailableError):
+        failing.complete("prompt")
+    assert failing.stats()["failures"] == 1
+
+
+def test_llm_client_stream_retries_until_the_first_delta():
+    sleeps = []
+    client = llm.LlmClient(llm.StubProvider(errors=[llm.ProviderUnavailableError("503")]), sleep=sleeps.append)
+
+    assert list(client.stream("Cervical strain, ROM limited.")) == ["Cervical", " strain,", " ROM", " limited."]
+    assert len(sleeps) == 1
+    assert client.stats()["completion_tokens"] == 8
+
+
+def test_circuit_breaker_fails_fast_then_lets_one_trial_through():
+    now = [0.0]
+    breaker = llm.CircuitBreaker(failure_threshold=2, reset_seconds=30, clock=lambda: now[0])
+    provider = llm.StubProvider(errors=[llm.ProviderUnavailableError("down")] * 3)
+    client = llm.LlmClient(provider, breaker=breaker, max_attempts=1)
+
+    for _ in range(2):
+        with pytest.raises(llm.ProviderUnavailableError):
+            client.complete("prompt")
+    with pytest.raises(llm.CircuitOpenError):
+        client.complete("prompt")
+    assert provider.calls == 2 and breaker.state == "open"
+
+    now[0] = 31
+    assert breaker.state == "half-open"
+    with pytest.raises(llm.ProviderUnavailableError):
+        client.complete("prompt")  # the trial fails: open again
+    with pytest.raises(llm.CircuitOpenError):
+        client.complete("prompt")
+
+    now[0] = 62
+    assert client.complete("back up") == "back up"
+    assert breaker.state == "closed"
+
+
+def test_abandoned_stream_releases_the_half_open_trial():
+    now = [0.0]
+    breaker = llm.CircuitBreaker(failure_threshold=1, reset_seconds=30, clock=lambda: now[0])
+    client = llm.LlmClient(llm.StubProvider(), breaker=breaker, max_attempts=1)
+    breaker.record_failure()
+
+    now[0] = 31
+    stream = client.stream("Cervical strain, ROM limited.")
+    assert next(stream) == "Cervical"
+    stream.close()  # the consumer stops reading during the trial
+    assert breaker.state == "open"
+    assert client.stats()["failures"] == 1
+
+    now[0] = 62
+    assert "".join(client.stream("back up")) == "back up"
+    assert breaker.state == "closed"
+
+
+def test_token_bucket_paces_callers_to_the_quota():
+    now, slept = [0.0], []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = llm.TokenBucket(per_minute=60, capacity=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(4):
+        bucket.acquire()
+    assert slept == [1.0, 1.0]
+
+    bucket.charge(3)
+    assert bucket.reserve(1) == 4.0
+
+
+def test_llm_client_caps_calls_in_flight():
+    in_flight, peak = [0], [0]
+    lock = threading.Lock()
+
+    class CountingProvider(llm.StubProvider):
+        def complete(self, prompt, **params):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            try:
+                return super().complete(prompt, **params)
+            finally:
+                with lock:
+                    in_flight[0] -= 1
+
+    client = llm.LlmClient(CountingProvider(latency_seconds=0.05), concurrency=llm.Semaphore(2))
+    threads = [threading.Thread(target=client.complete, args=(f"chunk {n}",)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 2
+    assert client.stats()["calls"] == 6
+
+
+def test_unreachable_redis_limits_fall_back_and_log_once(caplog):
+    url = "redis://127.0.0.1:1/0"  # nothing listens there
+    bucket = llm.RedisTokenBucket(url, "stub:requests", per_minute=600)
+    slots = llm.RedisSemaphore(url, "stub:calls", limit=2, lease_seconds=60)
+    client = llm.LlmClient(llm.StubProvider(), request_limiter=bucket, concurrency=slots)
+
+    with caplog.at_level("INFO", logger="backend.services.llm"):
+        for _ in range(3):
+            assert client.complete("prompt") == "prompt"
+    outages = [record for record in caplog.records if "unavailable" in record.getMessage()]
+    assert len(outages) == 2  # one per limit, not one per call
+    assert all(record.exc_info is None for record in outages)
+    assert client.stats()["limits_falling_back"] == ["llm-quota:stub:requests", "llm-slots:stub:calls"]
+
+    bucket._script = lambda keys, args: "0"  # Redis is back
+    caplog.clear()
+    with caplog.at_level("INFO", logger="backend.services.llm"):
+        client.complete("prompt")
+    assert any("reachable again" in record.getMessage() for record in caplog.records)
+    assert client.stats()["limits_falling_back"] == ["llm-slots:stub:calls"]
+
+
+def test_ttl_cache_expires_and_evicts_lru():
+    now = [0.0]
+    cache = TTLCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    now[0] = 11
+    assert cache.get("a") is None
+
+
+def test_sqlite_summary_backend_ttl_and_size(tmp_path):
+    now = [100.0]
+    backend = SQLiteSummaryBackend(tmp_path / "summaries.db", max_entries=2, ttl_seconds=30, clock=lambda: now[0])
+    for key in ("a", "b", "c"):
+        now[0] += 1
+        backend.set(key, key.upper())
+
+    assert backend.get("a") is None
+    assert backend.get("c") == "C"
+    now[0] += 60
+    assert backend.get("c") is None
+
+
+def test_default_summary_cache_is_shared_between_workers(tmp_path):
+    build = partial(
+        summary_cache.build_backend,
+        settings.SUMMARY_CACHE_BACKEND,
+        max_entries=8,
+        ttl_seconds=60,
+        path=tmp_path / "summaries.db",
+        redis_url="redis://unused",
+    )
+    first_worker, second_worker = build(), build()
+
+    first_worker.set("key", "Cervical strain.")
+    assert second_worker.get("key") == "Cervical strain."
+
+
+class _AsyncSource:
+    def __init__(self, payload):
+        self._buffer = io.BytesIO(payload)
+        self.reads = []
+
+    async def read(self, size=-1):
+        chunk = self._buffer.read(size)
+        self.reads.append(len(chunk))
+        return chunk
+
+
+def test_save_stream_hashes_in_fixed_chunks(tmp_path):
+    payload = b"x" * 10_000
+    source = _AsyncSource(payload)
+
+    stored = asyncio.run(file_processor.save_stream(source, "scan.pdf", tmp_path, max_bytes=0, chunk_size=4096))
+
+    assert stored.path.read_bytes() == payload
+    assert stored.sha256 == hashlib.sha256(payload).hexdigest()
+    assert stored.size == len(payload)
+    assert max(source.reads) == 4096
+
+
+def test_save_stream_stops_at_size_limit(tmp_path):
+    source = _AsyncSource(b"x" * 10_000)
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(file_processor.save_stream(source, "scan.pdf", tmp_path, max_bytes=5000, chunk_size=4096))
+
+    assert sum(source.reads) == 8192
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_reportlab_renderer_paginates_long_text(tmp_path):
+    raw_text = "\n".join(f"line {n} <b>& {'x' * 300}" for n in range(400))
+    destination = export_service.render_pdf(
+        "Diagnosis: <strain> & spasm", raw_text, tmp_path / "r.pdf", engine="reportlab"
+    )
+
+    data = destination.read_bytes()
+    assert data.startswith(b"%PDF")
+    assert len(re.findall(rb"/Type /Page\b", data)) > 10
+
+
+def test_get_renderer_rejects_unknown_engine():
+    with pytest.raises(ValueError):
+        export_service.get_renderer("latex")
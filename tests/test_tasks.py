@@ -0,0 +1,334 @@
+import pytest
+from pdf2image.exceptions import PDFPageCountError
+
+from backend.auth.dependencies import get_current_user
+from backend.celery_app import celery_app
+from backend.models import Report, User
+from backend.services import event_bus, file_processor, llm, report_generator, search_index
+from backend.tasks import report_tasks
+from tests.conftest import TestingSessionLocal
+
+generate_summary = report_generator.generate_summary
+
+
+@pytest.fixture()
+def eager_pipeline(monkeypatch, client, tmp_path):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(report_tasks, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(file_processor, "resolve_upload_root", lambda: tmp_path)
+    calls = {"ocr": 0, "summary": 0}
+
+    def fake_extract(path, on_page=None):
+        calls["ocr"] += 1
+        return file_processor.ExtractionResult("Lumbar strain.", {"pages": []})
+
+    def fake_summary(raw_text, on_partial=None):
+        calls["summary"] += 1
+        return f"Summary of {raw_text}"
+
+    monkeypatch.setattr(report_tasks.file_processor, "extract_document", fake_extract)
+    monkeypatch.setattr(report_tasks.report_generator, "generate_summary", fake_summary)
+    return calls
+
+
+def _create_report(db_session, tmp_path):
+    user = User(email="staff@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    report = Report(title="scan.pdf", owner_id=user.id, status="processing")
+    db_session.add(report)
+    db_session.commit()
+    upload = tmp_path / "scan.pdf"
+    upload.write_bytes(b"%PDF")
+    return report, upload
+
+
+def test_render_retry_resumes_without_redoing_ocr(monkeypatch, eager_pipeline, db_session, tmp_path):
+    report, upload = _create_report(db_session, tmp_path)
+    attempts = []
+
+    def flaky_render(summary, raw_text, destination):
+        attempts.append(destination)
+        if len(attempts) == 1:
+            raise RuntimeError("renderer crashed")
+        return destination
+
+    monkeypatch.setattr(report_tasks.export_service, "render_pdf", flaky_render)
+
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    db_session.refresh(report)
+    assert report.status == "completed"
+    assert report.completed_stage == "render"
+    assert report.ai_summary == "Summary of Lumbar strain."
+    assert len(attempts) == 2
+    assert eager_pipeline == {"ocr": 1, "summary": 1}
+    assert not upload.exists()
+
+
+def test_provider_outage_fails_the_summary_stage_instead_of_saving_the_error(
+    monkeypatch, eager_pipeline, db_session, tmp_path
+):
+    report, upload = _create_report(db_session, tmp_path)
+    monkeypatch.setattr(report_tasks.summarize_report, "max_retries", 0)
+    monkeypatch.setattr(report_generator, "generate_summary", generate_summary)
+    monkeypatch.setattr(report_generator, "_summary_cache_ready", True)
+    monkeypatch.setattr(report_generator, "_summary_cache", None)
+    outage = llm.StubProvider(errors=[llm.ProviderUnavailableError("503 from provider")])
+    monkeypatch.setattr(report_generator, "get_llm_backend", lambda: llm.LlmClient(outage, max_attempts=1))
+
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    db_session.refresh(report)
+    assert report.status == "failed"
+    # The summary stage stays open, so a resumed run asks the provider again.
+    assert report.completed_stage == "ocr"
+
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+    db_session.refresh(report)
+    assert report.status == "completed"
+    assert report.ai_summary.endswith("Raw text: Lumbar strain.")
+
+
+def test_completed_report_is_indexed_for_search(monkeypatch, eager_pipeline, db_session, tmp_path):
+    report, upload = _create_report(db_session, tmp_path)
+    monkeypatch.setattr(report_tasks.export_service, "render_pdf", lambda summary, raw_text, destination: destination)
+
+    assert search_index.search(db_session, report.owner_id, "lumbar", limit=10) == []
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+    # A re-indexed report replaces its entry instead of adding a second one.
+    db_session.refresh(report)
+    search_index.index_report(db_session, report)
+    db_session.commit()
+
+    hits = search_index.search(db_session, report.owner_id, "lumbar", limit=10)
+    assert [hit.report_id for hit in hits] == [report.id]
+    assert search_index.search(db_session, report.owner_id + 1, "lumbar", limit=10) == []
+
+
+def test_failed_pipeline_resumes_from_last_completed_stage(monkeypatch, eager_pipeline, db_session, tmp_path):
+    report, upload = _create_report(db_session, tmp_path)
+    monkeypatch.setattr(report_tasks.render_report, "max_retries", 0)
+
+    def broken_render(summary, raw_text, destination):
+        raise RuntimeError("renderer down")
+
+    monkeypatch.setattr(report_tasks.export_service, "render_pdf", broken_render)
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    db_session.refresh(report)
+    assert report.status == "failed"
+    assert report.completed_stage == "summary"
+    assert report.ai_summary == "Summary of Lumbar strain."
+
+    monkeypatch.setattr(report_tasks.export_service, "render_pdf", lambda summary, raw_text, destination: destination)
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    db_session.refresh(report)
+    assert report.status == "completed"
+    assert report.pdf_report == f"/uploads/reports/report_{report.id}.pdf"
+    assert eager_pipeline == {"ocr": 1, "summary": 1}
+
+
+def test_large_pdf_fans_out_page_ranges_and_merges_in_order(monkeypatch, eager_pipeline, db_session, tmp_path):
+    report, upload = _create_report(db_session, tmp_path)
+    monkeypatch.setattr(report_tasks.settings, "OCR_FANOUT_MIN_PAGES", 4)
+    monkeypatch.setattr(report_tasks.settings, "OCR_FANOUT_PAGES_PER_TASK", 2)
+    monkeypatch.setattr(report_tasks.export_service, "render_pdf", lambda summary, raw_text, destination: destination)
+    monkeypatch.setattr(file_processor, "pdf_page_count", lambda path: 5)
+    attempts = []
+
+    def fake_pages(path, first_page, last_page, on_page=None):
+        attempts.append((first_page, last_page))
+        if (first_page, last_page) == (3, 4) and attempts.count((3, 4)) == 1:
+            raise RuntimeError("worker lost")
+        pages = list(range(first_page, last_page + 1))
+        metadata = {"pages": [{"page": n, "method": "ocr"} for n in pages], "ocr_pages": pages}
+        return file_processor.ExtractionResult("\n\n".join(f"page {n}" for n in pages), metadata)
+
+    monkeypatch.setattr(file_processor, "extract_pdf_pages", fake_pages)
+
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    db_session.refresh(report)
+    assert report.status == "completed"
+    assert sorted(attempts) == [(1, 2), (3, 4), (3, 4), (5, 5)]
+    assert report.raw_text == "\n\n".join(f"page {n}" for n in range(1, 6))
+    assert report.ai_summary.startswith("Summary of page 1")
+    assert eager_pipeline == {"ocr": 0, "summary": 1}
+
+
+def test_failed_page_range_leaves_the_pdf_for_the_other_ranges(monkeypatch, eager_pipeline, db_session, tmp_path):
+    report, upload = _create_report(db_session, tmp_path)
+    monkeypatch.setattr(report_tasks.settings, "OCR_FANOUT_MIN_PAGES", 4)
+    monkeypatch.setattr(report_tasks.settings, "OCR_FANOUT_PAGES_PER_TASK", 2)
+    monkeypatch.setattr(report_tasks.ocr_page_range, "max_retries", 0)
+    monkeypatch.setattr(report_tasks.export_service, "render_pdf", lambda summary, raw_text, destination: destination)
+    monkeypatch.setattr(file_processor, "pdf_page_count", lambda path: 5)
+    ran = []
+
+    def first_range_fails(path, first_page, last_page, on_page=None):
+        # Ranges after the failed one are still pending when it gives up, and need the file.
+        ran.append((first_page, path.exists()))
+        if first_page == 1:
+            raise RuntimeError("worker lost")
+        return file_processor.ExtractionResult(f"pages {first_page}-{last_page}", {"pages": []})
+
+    monkeypatch.setattr(file_processor, "extract_pdf_pages", first_range_fails)
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    db_session.refresh(report)
+    assert report.status == "failed"
+    assert ran == [(1, True), (3, True), (5, True)]
+    assert upload.exists()
+
+    monkeypatch.setattr(
+        file_processor, "extract_pdf_pages", lambda path, first_page, last_page, on_page=None: (
+            file_processor.ExtractionResult(f"pages {first_page}-{last_page}", {"pages": []})
+        )
+    )
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    db_session.refresh(report)
+    assert report.status == "completed"
+    assert report.raw_text == "pages 1-2\n\npages 3-4\n\npages 5-5"
+    assert not upload.exists()
+
+
+class RecordingBus:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, report_id, event):
+        self.events.append(event)
+
+
+def test_unreadable_pdf_with_fanout_fails_the_report(monkeypatch, eager_pipeline, db_session, tmp_path):
+    report, upload = _create_report(db_session, tmp_path)
+    monkeypatch.setattr(report_tasks.settings, "OCR_FANOUT_MIN_PAGES", 4)
+    monkeypatch.setattr(report_tasks.ocr_report, "max_retries", 0)
+
+    def unreadable(path, on_page=None):
+        raise PDFPageCountError("Unable to get page count. Syntax Error: Couldn't find trailer dictionary")
+
+    monkeypatch.setattr(file_processor, "pdf_page_count", unreadable)
+    monkeypatch.setattr(report_tasks.file_processor, "extract_document", unreadable)
+    bus = RecordingBus()
+    event_bus.set_event_bus(bus)
+
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    db_session.refresh(report)
+    assert report.status == "failed"
+    assert bus.events[-1]["status"] == "failed"
+    assert upload.exists()
+
+
+def test_failed_ocr_keeps_the_upload_so_a_rerun_completes(monkeypatch, eager_pipeline, db_session, tmp_path):
+    report, upload = _create_report(db_session, tmp_path)
+    monkeypatch.setattr(report_tasks.ocr_report, "max_retries", 1)
+    monkeypatch.setattr(report_tasks.export_service, "render_pdf", lambda summary, raw_text, destination: destination)
+    attempts = []
+
+    def tesseract_down(path, on_page=None):
+        attempts.append(path)
+        raise RuntimeError("tesseract crashed")
+
+    monkeypatch.setattr(report_tasks.file_processor, "extract_document", tesseract_down)
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    db_session.refresh(report)
+    assert report.status == "failed"
+    assert len(attempts) == 2
+    assert upload.exists()
+
+    monkeypatch.setattr(
+        report_tasks.file_processor, "extract_document", lambda path, on_page=None: (
+            file_processor.ExtractionResult(path.read_bytes().decode(), {"pages": []})
+        )
+    )
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    db_session.refresh(report)
+    assert report.status == "completed"
+    assert report.raw_text == "%PDF"
+    assert not upload.exists()
+
+
+def test_permanent_errors_are_not_retried(monkeypatch, eager_pipeline, db_session, tmp_path):
+    report, upload = _create_report(db_session, tmp_path)
+    attempts = []
+
+    def bad_scan(path, on_page=None):
+        attempts.append(path)
+        raise PDFPageCountError("Unable to get page count.")
+
+    monkeypatch.setattr(report_tasks.file_processor, "extract_document", bad_scan)
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    db_session.refresh(report)
+    assert report.status == "failed"
+    assert len(attempts) == 1
+
+
+def test_pipeline_publishes_progress_events(monkeypatch, eager_pipeline, db_session, tmp_path):
+    report, upload = _create_report(db_session, tmp_path)
+    report.status = "queued"
+    db_session.commit()
+    bus = RecordingBus()
+    event_bus.set_event_bus(bus)
+    monkeypatch.setattr(report_tasks.export_service, "render_pdf", lambda summary, raw_text, destination: destination)
+    monkeypatch.setattr(file_processor, "page_count", lambda path: 2)
+
+    def fake_extract(path, on_page=None):
+        for page in (1, 2):
+            on_page(page)
+        return file_processor.ExtractionResult("Lumbar strain.", {"pages": []})
+
+    monkeypatch.setattr(report_tasks.file_processor, "extract_document", fake_extract)
+
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    assert [(event["type"], event.get("status", event.get("page"))) for event in bus.events] == [
+        ("status", "processing"),
+        ("ocr_progress", 1),
+        ("ocr_progress", 2),
+        ("status", "summarizing"),
+        ("status", "rendering"),
+        ("status", "completed"),
+    ]
+    assert bus.events[-1]["pdf_report"] == f"/uploads/reports/report_{report.id}.pdf"
+
+
+def test_summary_is_saved_and_published_while_it_streams(monkeypatch, client, eager_pipeline, db_session, tmp_path):
+    report, upload = _create_report(db_session, tmp_path)
+    monkeypatch.setattr(report_generator, "generate_summary", generate_summary)
+    monkeypatch.setattr(report_generator, "get_llm_backend", lambda: llm.LlmClient(llm.StubProvider()))
+    monkeypatch.setattr(report_generator, "_summary_cache_ready", True)
+    monkeypatch.setattr(report_generator, "_summary_cache", None)
+    monkeypatch.setattr(report_generator.settings, "SUMMARY_STREAM_FLUSH_CHARS", 40)
+    monkeypatch.setattr(report_tasks.export_service, "render_pdf", lambda summary, raw_text, destination: destination)
+    owner = db_session.get(User, report.owner_id)
+    client.app.dependency_overrides[get_current_user] = lambda: owner
+    previews = []
+
+    class StreamingBus(RecordingBus):
+        def publish(self, report_id, event):
+            super().publish(report_id, event)
+            if event["type"] == "summary_delta" and len(previews) < 3:
+                previews.append(client.get(f"/api/reports/{report_id}").json()["preview"])
+
+    bus = StreamingBus()
+    event_bus.set_event_bus(bus)
+
+    report_tasks.process_report.delay(report.id, str(upload), report.owner_id)
+
+    db_session.refresh(report)
+    deltas = [event["text"] for event in bus.events if event["type"] == "summary_delta"]
+    assert len(deltas) > 3
+    assert "".join(deltas) == report.ai_summary
+    assert report.ai_summary.endswith("Raw text: Lumbar strain.")
+    assert report.summary_partial is None
+    # Each partial summary was committed before its event went out, so successive GETs see it grow.
+    assert previews == ["".join(deltas[: index + 1]) for index in range(3)]
+    assert [event["offset"] for event in bus.events if event["type"] == "summary_delta"][:2] == [0, len(deltas[0])]